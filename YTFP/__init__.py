@@ -5,23 +5,91 @@ Yahoo!路線情報スクレイピングライブラリ
 キャッシング機能と非同期処理に対応したAPIも含まれています。
 """
 
-# 基本コンポーネント
-from .api import YahooTransitAPI
-from .parser import extract_routes_from_html, extract_route_info
+import importlib
+from typing import TYPE_CHECKING
 
-# 拡張API（キャッシング対応）
-from .enhanced_api import EnhancedYahooTransitAPI
+# エラー定義とロガー（軽量なため常に読み込む。ロガーのハンドラは最初の使用時に設定される）
+# logger はサブモジュール名と同じため、遅延読み込みにするとサブモジュールの読み込み後に
+# パッケージ属性がモジュールで上書きされてしまう
+from .errors import YahooTransitError, RequestError, ParseError, RateLimitError
+from .logger import Logger, logger
 
-# 非同期API
-from .async_api import AsyncYahooTransitAPI
-from .async_enhanced_api import AsyncEnhancedYahooTransitAPI
+# 公開名 -> 定義しているサブモジュール
+# requests・aiohttp・bs4などを読み込むサブモジュールは、最初に属性が参照されたときに読み込む
+_LAZY_IMPORTS = {
+    # 基本コンポーネント
+    "YahooTransitAPI": ".api",
+    "extract_routes_from_html": ".parser",
+    "extract_route_info": ".parser",
+    "IncrementalRouteParser": ".parser",
+    "Route": ".models",
+    "StationStop": ".models",
+    "TransportLeg": ".models",
+    "routes_from_dicts": ".models",
+    
+    # 拡張API（キャッシング対応）
+    "EnhancedYahooTransitAPI": ".enhanced_api",
+    
+    # 非同期API
+    "AsyncYahooTransitAPI": ".async_api",
+    "AsyncEnhancedYahooTransitAPI": ".async_enhanced_api",
+    
+    # バッチ検索
+    "SearchResult": ".batch",
+    
+    # ユーティリティ
+    "CacheManager": ".cache",
+    "RouteCachePolicy": ".cache_policy",
+    "RateLimiter": ".ratelimit",
+    "TokenBucket": ".ratelimit",
+    "RetryPolicy": ".retry",
+    "StationIndex": ".station_index",
+    "RouteGraph": ".route_graph",
+    "Instrumentation": ".instrumentation",
+    "MetricsAggregator": ".instrumentation",
+    "StatsDExporter": ".instrumentation",
+    "TimingEvent": ".instrumentation",
+}
 
-# エラー定義
-from .errors import YahooTransitError, RequestError, ParseError, RateLimitError
+if TYPE_CHECKING:
+    # 基本コンポーネント
+    from .api import YahooTransitAPI
+    from .parser import (
+        extract_routes_from_html, extract_route_info,
+        IncrementalRouteParser,
+    )
+    from .models import Route, StationStop, TransportLeg, routes_from_dicts
 
-# ユーティリティ
-from .cache import CacheManager
-from .logger import Logger, logger
+    # 拡張API（キャッシング対応）
+    from .enhanced_api import EnhancedYahooTransitAPI
+
+    # 非同期API
+    from .async_api import AsyncYahooTransitAPI
+    from .async_enhanced_api import AsyncEnhancedYahooTransitAPI
+
+    # バッチ検索
+    from .batch import SearchResult
+
+    # ユーティリティ
+    from .cache import CacheManager
+    from .cache_policy import RouteCachePolicy
+    from .ratelimit import RateLimiter, TokenBucket
+    from .retry import RetryPolicy
+    from .station_index import StationIndex
+    from .route_graph import RouteGraph
+    from .instrumentation import Instrumentation, MetricsAggregator, StatsDExporter, TimingEvent
+
+def __getattr__(name):
+    """公開名が最初に参照されたときにサブモジュールを読み込む"""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
 __version__ = "0.2.0"
 __all__ = [
@@ -29,6 +97,11 @@ __all__ = [
     "YahooTransitAPI",
     "extract_routes_from_html",
     "extract_route_info",
+    "IncrementalRouteParser",
+    "Route",
+    "StationStop",
+    "TransportLeg",
+    "routes_from_dicts",
     
     # 拡張API
     "EnhancedYahooTransitAPI",
@@ -37,6 +110,9 @@ __all__ = [
     "AsyncYahooTransitAPI",
     "AsyncEnhancedYahooTransitAPI",
     
+    # バッチ検索
+    "SearchResult",
+    
     # エラー
     "YahooTransitError",
     "RequestError",
@@ -45,6 +121,16 @@ __all__ = [
     
     # ユーティリティ
     "CacheManager",
+    "RouteCachePolicy",
+    "RateLimiter",
+    "TokenBucket",
+    "RetryPolicy",
+    "StationIndex",
+    "RouteGraph",
+    "Instrumentation",
+    "MetricsAggregator",
+    "StatsDExporter",
+    "TimingEvent",
     "Logger",
     "logger"
 ]
\ No newline at end of file
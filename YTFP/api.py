@@ -1,5 +1,14 @@
+import time
+
 import requests
-from .parser import extract_routes_from_html
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .batch import SearchResult, normalize_query
+from .connection import mount_adapters, request_timeout, resolve_connection_config
+from .errors import RequestError
+from .instrumentation import EVENT_DOWNLOAD, EVENT_PARSE, EVENT_REQUEST, EVENT_TTFB, Instrumentation
+from .parser import DEFAULT_ENGINE, extract_routes_from_html
+from .retry import NO_RETRY
 
 class YahooTransitAPI:
     """Yahoo!路線情報のAPIクライアント"""
@@ -31,16 +40,37 @@ class YahooTransitAPI:
     SUGGEST_API_URL = f"{BASE_URL}/api/suggest"
     SEARCH_URL = f"{BASE_URL}/search/result"
     
-    def __init__(self, headers=None):
+    def __init__(self, headers=None, parser_config=None, rate_limiter=None, retry_policy=None,
+                 connection_config=None, station_index=None, instrumentation=None, route_graph=None):
         """
         Yahoo!路線情報クライアントを初期化する
         
         Args:
             headers (dict, optional): リクエストに使用するカスタムヘッダー
+            parser_config (dict, optional): extract_routes_from_htmlに渡すパーサー設定
+                （例: {"engine": "lxml"}）
+            rate_limiter (RateLimiter, optional): リクエスト頻度を制御するレートリミッター。
+                複数のクライアントで同じインスタンスを共有できる
+            retry_policy (RetryPolicy, optional): 一時的なエラーの再試行ポリシー（デフォルトは再試行なし）
+            connection_config (dict, optional): コネクションプールとタイムアウトの設定
+                （例: {"pool_maxsize": 32, "connect_timeout": 3, "read_timeout": 10}）
+            station_index (StationIndex, optional): 駅名候補をローカルで検索するインデックス。
+                一致する駅があればAPIを呼び出さずに返し、APIの応答はインデックスに追加する
+            instrumentation (Instrumentation, optional): 処理時間の計測イベントの通知先
+            route_graph (RouteGraph, optional): 検索した経路を追加する経路グラフ
         """
         self.headers = headers or self.DEFAULT_HEADERS
+        self.parser_config = parser_config or {}
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or NO_RETRY
+        self.station_index = station_index
+        self.instrumentation = instrumentation or Instrumentation()
+        self.route_graph = route_graph
+        self.connection_config = resolve_connection_config(connection_config)
+        self._timeout = request_timeout(self.connection_config)
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        mount_adapters(self.session, self.connection_config)
     
     def get_station_suggestions(self, station_query):
         """
@@ -52,11 +82,16 @@ class YahooTransitAPI:
         Returns:
             dict: 駅名候補を含むJSON応答
         """
-        response = self.session.get(
-            f"{self.SUGGEST_API_URL}?value={station_query}"
-        )
-        response.raise_for_status()
-        return response.json()
+        if self.station_index is not None:
+            local_result = self.station_index.suggest(station_query)
+            if local_result is not None:
+                return local_result
+        
+        response = self._get(f"{self.SUGGEST_API_URL}?value={station_query}", "suggest")
+        result = response.json()
+        if self.station_index is not None:
+            self.station_index.add_suggestions(result, station_query)
+        return result
     
     def search_routes(self, from_station, to_station, date=None, time=None, via=None, sort=None):
         """
@@ -88,13 +123,113 @@ class YahooTransitAPI:
         if sort:
             params["sort"] = sort
             
-        response = self.session.get(self.SEARCH_URL, params=params)
-        response.raise_for_status()
+        response = self._get(self.SEARCH_URL, "search", params=params)
         
         # HTMLから経路情報を抽出
-        routes = extract_routes_from_html(response.text)
+        with self.instrumentation.timer(EVENT_PARSE, engine=self.parser_config.get("engine", DEFAULT_ENGINE)):
+            routes = extract_routes_from_html(response.text, **self.parser_config)
+        if self.route_graph is not None:
+            self.route_graph.add_routes(routes)
         return routes
         
+    def _get(self, url, endpoint, params=None):
+        """
+        レート制限と再試行ポリシーを適用してGETリクエストを送信する
+        
+        Args:
+            url (str): リクエスト先のURL
+            endpoint (str): レート制限の単位となるエンドポイント名（"suggest" / "search"）
+            params (dict, optional): クエリパラメータ
+            
+        Returns:
+            requests.Response: 成功したレスポンス
+            
+        Raises:
+            RateLimitError: 429応答で再試行を打ち切った場合
+            RequestError: その他のHTTPエラー・通信エラーで再試行を打ち切った場合
+        """
+        policy = self.retry_policy
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(url, endpoint)
+            try:
+                start_time = time.perf_counter()
+                response = self.session.get(url, params=params, timeout=self._timeout)
+                self._record_response(endpoint, response, time.perf_counter() - start_time)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not policy.should_retry("GET", attempt):
+                    raise RequestError(None, str(e)) from e
+                time.sleep(policy.backoff(attempt))
+                continue
+            except requests.RequestException as e:
+                # URLの誤りなど、再試行しても解決しないエラー
+                raise RequestError(None, str(e)) from e
+            
+            if response.ok:
+                return response
+            
+            retry_after = policy.parse_retry_after(response.headers.get("Retry-After"))
+            if not policy.should_retry("GET", attempt, response.status_code, retry_after):
+                raise policy.error_for(response.status_code, response.reason, retry_after)
+            response.close()
+            time.sleep(policy.backoff(attempt, retry_after))
+    
+    def _record_response(self, endpoint, response, elapsed):
+        """レスポンスの受信時間を計測イベントとして通知する（requestsではDNS解決・接続は計測できない）"""
+        instrumentation = self.instrumentation
+        if not instrumentation.enabled:
+            return
+        # response.elapsed はリクエスト送信からレスポンスヘッダーの解析完了まで
+        ttfb = response.elapsed.total_seconds()
+        instrumentation.emit(EVENT_TTFB, ttfb, endpoint=endpoint, status=response.status_code)
+        instrumentation.emit(EVENT_DOWNLOAD, max(0.0, elapsed - ttfb), endpoint=endpoint)
+        instrumentation.emit(EVENT_REQUEST, elapsed, endpoint=endpoint, status=response.status_code)
+    
+    def _search_query(self, index, query):
+        """バッチ検索の1件を実行し、例外も含めてSearchResultとして返す"""
+        try:
+            routes = self.search_routes(**normalize_query(query))
+        except Exception as e:
+            return SearchResult(index, query, None, e)
+        return SearchResult(index, query, routes, None)
+    
+    def search_many(self, queries, concurrency=4):
+        """
+        複数の経路検索を並行して実行し、完了した順に結果を返す
+        
+        Args:
+            queries (iterable): 検索条件のイテラブル。各要素は ("出発駅", "到着駅")、
+                ("出発駅", "到着駅", {"time": "0900"}) または search_routes のキーワード引数の辞書
+            concurrency (int): 同時に実行する検索数の上限
+            
+        Yields:
+            SearchResult: 完了した検索の結果。失敗した検索は error に例外が入る
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        
+        query_iter = enumerate(queries)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = set()
+            try:
+                while True:
+                    # 実行中の検索がconcurrency件になるまで補充する
+                    for index, query in query_iter:
+                        pending.add(executor.submit(self._search_query, index, query))
+                        if len(pending) >= concurrency:
+                            break
+                    if not pending:
+                        return
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            finally:
+                # 途中で反復が中断された場合は未開始の検索を取り消す
+                for future in pending:
+                    future.cancel()
+        
     def close(self):
         """セッションをクローズする"""
         self.session.close()
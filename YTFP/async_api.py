@@ -7,9 +7,24 @@ aiohttp を使用して非同期HTTPリクエストを実行します。
 
 import aiohttp
 import asyncio
-from typing import List, Dict, Optional, Any
+import codecs
+import functools
+import os
+import time
+from concurrent.futures import Executor
+from typing import AsyncIterator, Iterable, List, Dict, Optional, Any
 
-from .parser import extract_routes_from_html
+from .batch import SearchResult, normalize_query
+from .connection import create_client_session, resolve_connection_config
+from .errors import RequestError
+from .instrumentation import (
+    EVENT_DOWNLOAD, EVENT_PARSE, EVENT_REQUEST, Instrumentation, create_trace_config,
+)
+from .parser import DEFAULT_ENGINE, IncrementalRouteParser, extract_routes_from_html
+from .ratelimit import RateLimiter
+from .route_graph import RouteGraph
+from .retry import NO_RETRY, RetryPolicy
+from .station_index import StationIndex
 
 class AsyncYahooTransitAPI:
     """Yahoo!路線情報の非同期APIクライアント"""
@@ -42,22 +57,60 @@ class AsyncYahooTransitAPI:
     SUGGEST_API_URL = f"{BASE_URL}/api/suggest"
     SEARCH_URL = f"{BASE_URL}/search/result"
     
-    def __init__(self, headers=None, session=None):
+    # search_routes_stream で一度に読み込むバイト数
+    STREAM_CHUNK_SIZE = 16384
+    
+    def __init__(self, headers=None, session=None, parser_config=None,
+                 parse_executor: Optional[Executor] = None,
+                 max_pending_parses: Optional[int] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 connection_config: Optional[Dict[str, Any]] = None,
+                 station_index: Optional[StationIndex] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 route_graph: Optional[RouteGraph] = None):
         """
         非同期クライアントの初期化
         
         Args:
             headers: カスタムHTTPヘッダー
             session: 既存のaiohttp.ClientSession（指定しない場合は新規作成）
+            parser_config: extract_routes_from_htmlに渡すパーサー設定（例: {"engine": "lxml"}）
+            parse_executor: HTML解析を実行するExecutor（ProcessPoolExecutorなど）。
+                指定しない場合はイベントループ上で同期的に解析する
+            max_pending_parses: parse_executorに同時に投入できる解析数の上限。
+                上限に達した場合は空きが出るまで待機する（デフォルト: CPU数の2倍）
+            rate_limiter: リクエスト頻度を制御するレートリミッター。
+                複数のクライアントで同じインスタンスを共有できる
+            retry_policy: 一時的なエラーの再試行ポリシー（デフォルトは再試行なし）
+            connection_config: コネクションプール・DNSキャッシュ・タイムアウトの設定
+                （例: {"limit": 50, "limit_per_host": 20, "total_timeout": 30}）。
+                sessionを指定した場合は使用されない
+            station_index: 駅名候補をローカルで検索するインデックス。
+                一致する駅があればAPIを呼び出さずに返し、APIの応答はインデックスに追加する
+            instrumentation: 処理時間の計測イベントの通知先。DNS解決・接続の計測は
+                このクライアントが作成したセッションでのみ行われる
+            route_graph: 検索した経路を追加する経路グラフ
         """
         self.headers = headers or self.DEFAULT_HEADERS
+        self.parser_config = parser_config or {}
+        self.parse_executor = parse_executor
+        self.max_pending_parses = max_pending_parses or (os.cpu_count() or 1) * 2
+        self._parse_semaphore = None
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or NO_RETRY
+        self.connection_config = resolve_connection_config(connection_config)
+        self.station_index = station_index
+        self.instrumentation = instrumentation or Instrumentation()
+        self.route_graph = route_graph
         self._session = session
         self._owned_session = session is None
     
     async def __aenter__(self):
         """非同期コンテキストマネージャーのエントリーポイント"""
         if self._session is None:
-            self._session = aiohttp.ClientSession(headers=self.headers)
+            self._session = create_client_session(self.headers, self.connection_config,
+                                                  [create_trace_config(self.instrumentation)])
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -68,7 +121,8 @@ class AsyncYahooTransitAPI:
     async def _ensure_session(self):
         """セッションが存在することを確認"""
         if self._session is None:
-            self._session = aiohttp.ClientSession(headers=self.headers)
+            self._session = create_client_session(self.headers, self.connection_config,
+                                                  [create_trace_config(self.instrumentation)])
             self._owned_session = True
     
     async def get_station_suggestions_async(self, station_query: str) -> Dict[str, Any]:
@@ -81,13 +135,17 @@ class AsyncYahooTransitAPI:
         Returns:
             dict: 駅名候補を含むJSON応答
         """
+        if self.station_index is not None:
+            local_result = self.station_index.suggest(station_query)
+            if local_result is not None:
+                return local_result
+        
         await self._ensure_session()
-            
-        async with self._session.get(
-            f"{self.SUGGEST_API_URL}?value={station_query}"
-        ) as response:
-            response.raise_for_status()
-            return await response.json()
+        result = await self._get(f"{self.SUGGEST_API_URL}?value={station_query}", "suggest",
+                                 json=True)
+        if self.station_index is not None:
+            self.station_index.add_suggestions(result, station_query)
+        return result
     
     async def search_routes_async(self, from_station: str, to_station: str, 
                                 date: Optional[str] = None,
@@ -125,12 +183,238 @@ class AsyncYahooTransitAPI:
         if sort:
             params["sort"] = sort
         
-        async with self._session.get(self.SEARCH_URL, params=params) as response:
-            response.raise_for_status()
-            html = await response.text()
-            # 現状ではパース処理は同期的に行う
-            # 注: 将来的に非同期パーサーを実装する可能性あり
-            return extract_routes_from_html(html)
+        html = await self._get(self.SEARCH_URL, "search", params=params)
+        
+        # 接続を解放してからパースする
+        routes = await self._parse_routes(html)
+        if self.route_graph is not None:
+            self.route_graph.add_routes(routes)
+        return routes
+    
+    async def search_routes_stream(self, from_station: str, to_station: str,
+                                   date: Optional[str] = None,
+                                   time: Optional[str] = None,
+                                   via: Optional[str] = None,
+                                   sort: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        2駅間の経路を検索し、受信した経路から順に返す非同期ジェネレーター
+        
+        レスポンス本文をチャンクごとに受け取りながら解析し、経路div (route01など) が
+        閉じた時点でその経路情報を返す。ページ全体の受信を待たずに最初の経路を処理でき、
+        解析済みのHTMLは破棄されるためメモリ使用量も抑えられる。
+        経路divが見つからなかった場合は、受信したHTML全体を通常どおり解析する。
+        
+        Args:
+            from_station: 出発駅
+            to_station: 到着駅
+            date: 日付（例: "20250522"）
+            time: 時刻（例: "0900"）
+            via: 経由駅
+            sort: ソート方法（例: "time"）
+            
+        Yields:
+            dict: 経路情報
+        """
+        await self._ensure_session()
+        
+        params = {
+            "from": from_station,
+            "to": to_station
+        }
+        if date:
+            params["date"] = date
+        if time:
+            params["time"] = time
+        if via:
+            params["via"] = via
+        if sort:
+            params["sort"] = sort
+        
+        async for route in self._stream_routes(params):
+            yield route
+    
+    async def _stream_routes(self, params: Dict[str, str]) -> AsyncIterator[Dict[str, Any]]:
+        """検索結果ページを受信しながら解析し、経路を順に返す（search_routes_streamの本体）"""
+        parser = IncrementalRouteParser(**self.parser_config)
+        response, start_time = await self._get(self.SEARCH_URL, "search", params=params, stream=True)
+        # 受信・解析の時間は、呼び出し側が経路を処理している時間を除いて積算する
+        headers_time = time.perf_counter() - start_time
+        download_time = parse_time = 0.0
+        async with response:
+            decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(errors="replace")
+            try:
+                mark = time.perf_counter()
+                async for chunk in response.content.iter_chunked(self.STREAM_CHUNK_SIZE):
+                    parse_start = time.perf_counter()
+                    download_time += parse_start - mark
+                    routes = parser.feed(decoder.decode(chunk))
+                    parse_time += time.perf_counter() - parse_start
+                    for route in routes:
+                        if self.route_graph is not None:
+                            self.route_graph.add_route(route)
+                        yield route
+                    mark = time.perf_counter()
+                parse_start = time.perf_counter()
+                download_time += parse_start - mark
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise RequestError(None, str(e) or type(e).__name__) from e
+            self.instrumentation.emit(EVENT_DOWNLOAD, download_time, endpoint="search")
+            self.instrumentation.emit(EVENT_REQUEST, headers_time + download_time,
+                                      endpoint="search", status=response.status)
+            routes = parser.feed(decoder.decode(b"", final=True))
+        routes += parser.close()
+        parse_time += time.perf_counter() - parse_start
+        self.instrumentation.emit(EVENT_PARSE, parse_time,
+                                  engine=self.parser_config.get("engine", DEFAULT_ENGINE))
+        
+        for route in routes:
+            if self.route_graph is not None:
+                self.route_graph.add_route(route)
+            yield route
+    
+    async def _get(self, url: str, endpoint: str,
+                   params: Optional[Dict[str, str]] = None, json: bool = False,
+                   stream: bool = False) -> Any:
+        """
+        レート制限と再試行ポリシーを適用してGETリクエストを送信し、レスポンス本文を返す
+        
+        Args:
+            url: リクエスト先のURL
+            endpoint: レート制限の単位となるエンドポイント名（"suggest" / "search"）
+            params: クエリパラメータ
+            json: Trueの場合は本文をJSONとして、Falseの場合はテキストとして返す
+            stream: Trueの場合は本文を読まずに (レスポンス, リクエストの開始時刻) を返す
+                （呼び出し側で解放し、download・requestイベントを通知すること）
+            
+        Raises:
+            RateLimitError: 429応答で再試行を打ち切った場合
+            RequestError: その他のHTTPエラー・通信エラーで再試行を打ち切った場合
+        """
+        policy = self.retry_policy
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(url, endpoint)
+            try:
+                start_time = time.perf_counter()
+                response = await self._session.get(url, params=params,
+                                                   trace_request_ctx={"endpoint": endpoint})
+                if response.status < 400 and stream:
+                    return response, start_time
+                async with response:
+                    if response.status < 400:
+                        body_start = time.perf_counter()
+                        body = await response.json() if json else await response.text()
+                        end_time = time.perf_counter()
+                        self.instrumentation.emit(EVENT_DOWNLOAD, end_time - body_start, endpoint=endpoint)
+                        self.instrumentation.emit(EVENT_REQUEST, end_time - start_time,
+                                                  endpoint=endpoint, status=response.status)
+                        return body
+                    status, reason = response.status, response.reason
+                    self.instrumentation.emit(EVENT_REQUEST, time.perf_counter() - start_time,
+                                              endpoint=endpoint, status=status)
+                    retry_after = policy.parse_retry_after(response.headers.get("Retry-After"))
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if not policy.should_retry("GET", attempt):
+                    raise RequestError(None, str(e) or type(e).__name__) from e
+                await asyncio.sleep(policy.backoff(attempt))
+                continue
+            except aiohttp.ClientError as e:
+                # URLの誤りなど、再試行しても解決しないエラー
+                raise RequestError(None, str(e) or type(e).__name__) from e
+            
+            if not policy.should_retry("GET", attempt, status, retry_after):
+                raise policy.error_for(status, reason, retry_after)
+            await asyncio.sleep(policy.backoff(attempt, retry_after))
+    
+    async def _parse_routes(self, html: str) -> List[Dict[str, Any]]:
+        """
+        HTMLから経路情報を抽出する
+        
+        parse_executorが指定されている場合はExecutor上で解析し、イベントループをブロックしない。
+        同時に投入する解析数はmax_pending_parsesで制限され、超過分は待機する（バックプレッシャー）。
+        parseイベントには待機時間を含めず、解析の開始から完了までを計測する。
+        """
+        engine = self.parser_config.get("engine", DEFAULT_ENGINE)
+        if self.parse_executor is None:
+            with self.instrumentation.timer(EVENT_PARSE, engine=engine):
+                return extract_routes_from_html(html, **self.parser_config)
+        
+        if self._parse_semaphore is None:
+            self._parse_semaphore = asyncio.Semaphore(self.max_pending_parses)
+        
+        async with self._parse_semaphore:
+            loop = asyncio.get_running_loop()
+            with self.instrumentation.timer(EVENT_PARSE, engine=engine):
+                return await loop.run_in_executor(
+                    self.parse_executor,
+                    functools.partial(extract_routes_from_html, html, **self.parser_config)
+                )
+    
+    async def _search_query(self, index: int, query: Any) -> SearchResult:
+        """バッチ検索の1件を実行し、例外も含めてSearchResultとして返す"""
+        try:
+            routes = await self.search_routes_async(**normalize_query(query))
+        except Exception as e:
+            return SearchResult(index, query, None, e)
+        return SearchResult(index, query, routes, None)
+    
+    async def search_many(self, queries: Iterable[Any], concurrency: int = 10) -> AsyncIterator[SearchResult]:
+        """
+        複数の経路検索を同時実行数を制限して実行し、完了した順に結果を返す
+        
+        Args:
+            queries: 検索条件のイテラブル。各要素は ("出発駅", "到着駅")、
+                ("出発駅", "到着駅", {"time": "0900"}) または search_routes_async のキーワード引数の辞書
+            concurrency: 同時に実行する検索数の上限
+            
+        Yields:
+            SearchResult: 完了した検索の結果。失敗した検索は error に例外が入る
+            
+        Raises:
+            Exception: queries の反復中に発生した例外（実行中の検索は取り消される）
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        
+        await self._ensure_session()
+        
+        query_iter = enumerate(queries)
+        # 結果キューにも上限を設け、呼び出し側の処理が遅い場合は検索を待機させる
+        results: "asyncio.Queue[Optional[SearchResult]]" = asyncio.Queue(maxsize=concurrency)
+        
+        errors: List[Exception] = []
+        
+        async def worker():
+            cancelled = False
+            try:
+                for index, query in query_iter:
+                    await results.put(await self._search_query(index, query))
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            except Exception as e:
+                errors.append(e)  # queriesの反復中の例外は呼び出し側で送出する
+            finally:
+                if not cancelled:
+                    await results.put(None)  # このワーカーの終了を通知
+        
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        remaining = len(workers)
+        try:
+            while remaining:
+                result = await results.get()
+                if result is None:
+                    if errors:
+                        raise errors[0]
+                    remaining -= 1
+                    continue
+                yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
     
     async def close(self):
         """セッションを閉じる"""
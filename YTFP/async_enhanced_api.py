@@ -5,19 +5,37 @@ Yahoo!路線情報ライブラリの拡張非同期API
 非同期版Yahoo!路線情報APIクライアントを提供します。
 """
 
+import asyncio
+import functools
 import hashlib
 import json
-from typing import Dict, List, Any, Optional
+import logging
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 
 from .async_api import AsyncYahooTransitAPI
-from .cache import CacheManager
+from .cache import CacheManager, CACHE_MISS, CACHE_FRESH
+from .cache_policy import RouteCachePolicy
 from .errors import RequestError, ParseError, YahooTransitError
+from .instrumentation import EVENT_CACHE_LOOKUP, EVENT_CACHE_STORE, Instrumentation
 from .logger import logger
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .route_graph import RouteGraph
+from .singleflight import AsyncSingleFlight
+from .station_index import StationIndex
 
 class AsyncEnhancedYahooTransitAPI(AsyncYahooTransitAPI):
     """キャッシング機能を持つ非同期Yahoo!路線情報APIクライアント"""
     
-    def __init__(self, headers=None, session=None, cache_config=None):
+    def __init__(self, headers=None, session=None, cache_config=None, parser_config=None,
+                 parse_executor=None, max_pending_parses=None,
+                 cache_policy: Optional[RouteCachePolicy] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 connection_config: Optional[Dict[str, Any]] = None,
+                 station_index: Optional[StationIndex] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 route_graph: Optional[RouteGraph] = None):
         """
         拡張非同期APIクライアントの初期化
         
@@ -28,8 +46,26 @@ class AsyncEnhancedYahooTransitAPI(AsyncYahooTransitAPI):
                 - None: デフォルト設定でキャッシングを有効化
                 - False: キャッシングを無効化
                 - dict: キャッシュの詳細設定（CacheManagerのパラメータ）
+            parser_config: extract_routes_from_htmlに渡すパーサー設定
+            parse_executor: HTML解析を実行するExecutor（ProcessPoolExecutorなど）
+            max_pending_parses: parse_executorに同時に投入できる解析数の上限
+            cache_policy: 経路検索の日時に応じてキャッシュキーと有効期間を決めるポリシー
+            rate_limiter: リクエスト頻度を制御するレートリミッター（キャッシュヒット時は消費しない）
+            retry_policy: 一時的なエラーの再試行ポリシー
+            connection_config: コネクションプールとタイムアウトの設定
+            station_index: 駅名候補をローカルで検索するインデックス（キャッシュより先に参照する）
+            instrumentation: 処理時間の計測イベントの通知先（キャッシュの参照・保存も計測する）
+            route_graph: 検索した経路を追加する経路グラフ（キャッシュヒット時は追加しない）
         """
-        super().__init__(headers, session)
+        super().__init__(headers, session, parser_config=parser_config,
+                         parse_executor=parse_executor,
+                         max_pending_parses=max_pending_parses,
+                         rate_limiter=rate_limiter,
+                         retry_policy=retry_policy,
+                         connection_config=connection_config,
+                         station_index=station_index,
+                         instrumentation=instrumentation,
+                         route_graph=route_graph)
         
         # キャッシュを無効化したい場合はcache_config=Falseを指定
         if cache_config is not False:
@@ -38,6 +74,15 @@ class AsyncEnhancedYahooTransitAPI(AsyncYahooTransitAPI):
         else:
             self.cache = None
             logger.info("非同期クライアント: キャッシングが無効化されました")
+        
+        self.cache_policy = cache_policy
+        
+        # 同一キャッシュキーの同時リクエストを1回にまとめる
+        self._inflight = AsyncSingleFlight()
+        
+        # 期限切れ・期限間近のエントリのバックグラウンド更新（single-flightの共有Future）
+        self._refresh_tasks: Dict[str, "asyncio.Future[Any]"] = {}
+        self._closed = False
     
     def _get_cache_key(self, method: str, **params) -> str:
         """パラメータからキャッシュキーを生成"""
@@ -45,6 +90,84 @@ class AsyncEnhancedYahooTransitAPI(AsyncYahooTransitAPI):
         param_str = json.dumps(params, sort_keys=True)
         return f"{method}:{hashlib.md5(param_str.encode()).hexdigest()}"
     
+    def _route_cache_key(self, from_station: str, to_station: str,
+                         kwargs: Dict[str, Any]) -> Tuple[str, Optional[int]]:
+        """
+        経路検索のキャッシュキーと有効期間を決定
+
+        丸めた時刻はキャッシュキーにだけ使い、APIへのリクエストには指定された時刻をそのまま使う。
+        """
+        # ポリシーがあれば出発時刻を丸め、日時に応じたTTLを使用
+        key_params = self.cache_policy.normalize(kwargs) if self.cache_policy else kwargs
+        ttl = self.cache_policy.ttl_for(kwargs) if self.cache_policy else None
+        cache_key = self._get_cache_key("routes", 
+                                     from_station=from_station, 
+                                     to_station=to_station, 
+                                     **key_params)
+        return cache_key, ttl
+    
+    def _filter_routes(self, routes: List[Dict[str, Any]], kwargs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """キャッシュの枠を共有した結果から、指定した時刻より前に出発する経路を除く"""
+        return self.cache_policy.filter_routes(routes, kwargs) if self.cache_policy else routes
+    
+    async def _cache_lookup(self, cache_key: str) -> Tuple[str, Any]:
+        """キャッシュを参照し、所要時間を計測イベントとして通知"""
+        with self.instrumentation.timer(EVENT_CACHE_LOOKUP) as labels:
+            state, value = await self.cache.alookup(cache_key)
+            labels["result"] = state
+        return state, value
+    
+    async def _cache_store(self, cache_key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """キャッシュに保存し、所要時間を計測イベントとして通知"""
+        with self.instrumentation.timer(EVENT_CACHE_STORE):
+            await self.cache.aset(cache_key, value, ttl)
+    
+    def _schedule_refresh(self, cache_key: str, fetch, *args) -> None:
+        """
+        キャッシュエントリをバックグラウンドで更新
+
+        同じキーの更新・検索が実行中の場合やクライアントを閉じた後は何もしない。
+        更新はsingle-flightの処理として開始し、そのFutureを保持してclose()で取り消せるようにする。
+        """
+        if self._closed or self._inflight.in_flight(cache_key):
+            return
+        future, _ = self._inflight.start(cache_key, fetch, *args)
+        self._refresh_tasks[cache_key] = future
+        future.add_done_callback(functools.partial(self._refresh_done, cache_key))
+    
+    def _refresh_done(self, cache_key: str, future: "asyncio.Future[Any]") -> None:
+        """バックグラウンド更新の完了時の処理"""
+        self._refresh_tasks.pop(cache_key, None)
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning("非同期バックグラウンド更新エラー: %s", future.exception())
+    
+    async def _cancel_refreshes(self) -> None:
+        """実行中のバックグラウンド更新をキャンセルし、終了を待つ"""
+        self._closed = True
+        futures = list(self._refresh_tasks.values())
+        self._refresh_tasks.clear()
+        for future in futures:
+            future.cancel()
+        if futures:
+            await asyncio.gather(*futures, return_exceptions=True)
+    
+    async def _fetch_station_suggestions(self, cache_key: str, station_query: str) -> Dict[str, Any]:
+        """APIから駅名候補を非同期に取得してキャッシュに保存"""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("非同期APIリクエスト: 駅名候補取得 '%s'", station_query)
+        result = await super().get_station_suggestions_async(station_query)
+        await self._cache_store(cache_key, result)
+        return result
+    
+    async def _fetch_routes(self, cache_key: str, from_station: str, to_station: str,
+                            kwargs: Dict[str, Any], ttl: Optional[int] = None) -> List[Dict[str, Any]]:
+        """APIから経路を非同期に検索してキャッシュに保存"""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("非同期APIリクエスト: 経路検索 '%s' -> '%s'", from_station, to_station)
+        result = await super().search_routes_async(from_station, to_station, **kwargs)
+        await self._cache_store(cache_key, result, ttl)
+        return result
+    
     async def get_station_suggestions_async(self, station_query: str) -> Dict[str, Any]:
         """
         駅名候補を非同期に取得（キャッシング対応）
@@ -59,29 +182,34 @@ class AsyncEnhancedYahooTransitAPI(AsyncYahooTransitAPI):
             RequestError: HTTPリクエストでエラーが発生した場合
             YahooTransitError: その他のエラーが発生した場合
         """
+        # 駅名インデックスで応答できる入力であればAPIもキャッシュも使わずに返す
+        if self.station_index is not None:
+            local_result = self.station_index.suggest(station_query)
+            if local_result is not None:
+                return local_result
+        
         # キャッシングが無効なら通常の処理
         if not self.cache:
             return await super().get_station_suggestions_async(station_query)
         
         # キャッシュキーの生成
         cache_key = self._get_cache_key("suggestions", query=station_query)
-        cached_result = self.cache.get(cache_key)
+        state, cached_result = await self._cache_lookup(cache_key)
         
         # キャッシュヒット時はキャッシュから返す
-        if cached_result is not None:
-            logger.debug(f"キャッシュヒット (非同期): {cache_key}")
+        # 期限切れ（stale_ttl内）・期限間近（refresh_ahead）の場合はバックグラウンドで更新する
+        if state != CACHE_MISS:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("キャッシュヒット (非同期, %s): %s", state, cache_key)
+            if state != CACHE_FRESH:
+                self._schedule_refresh(cache_key, self._fetch_station_suggestions, cache_key, station_query)
             return cached_result
         
         try:
-            # 通常のAPIリクエスト
-            logger.debug(f"非同期APIリクエスト: 駅名候補取得 '{station_query}'")
-            result = await super().get_station_suggestions_async(station_query)
-            
-            # 結果をキャッシュに保存
-            self.cache.set(cache_key, result)
-            return result
+            # 同じキーのリクエストが実行中であればその結果を待つ
+            return await self._inflight.do(cache_key, self._fetch_station_suggestions, cache_key, station_query)
         except Exception as e:
-            logger.error(f"非同期駅名候補取得エラー: {str(e)}")
+            logger.error("非同期駅名候補取得エラー: %s", e)
             # 元の例外を保持して再送出
             raise
     
@@ -110,27 +238,68 @@ class AsyncEnhancedYahooTransitAPI(AsyncYahooTransitAPI):
         if not self.cache:
             return await super().search_routes_async(from_station, to_station, **kwargs)
         
-        # キャッシュキーの生成
-        cache_key = self._get_cache_key("routes", 
-                                     from_station=from_station, 
-                                     to_station=to_station, 
-                                     **kwargs)
-        cached_result = self.cache.get(cache_key)
+        cache_key, ttl = self._route_cache_key(from_station, to_station, kwargs)
+        state, cached_result = await self._cache_lookup(cache_key)
         
         # キャッシュヒット時はキャッシュから返す
-        if cached_result is not None:
-            logger.debug(f"キャッシュヒット (非同期): {cache_key}")
-            return cached_result
+        # 期限切れ（stale_ttl内）・期限間近（refresh_ahead）の場合はバックグラウンドで更新する
+        if state != CACHE_MISS:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("キャッシュヒット (非同期, %s): %s", state, cache_key)
+            if state != CACHE_FRESH:
+                self._schedule_refresh(cache_key, self._fetch_routes, cache_key, from_station, to_station, kwargs, ttl)
+            return self._filter_routes(cached_result, kwargs)
         
         try:
-            # 通常のAPIリクエスト
-            logger.debug(f"非同期APIリクエスト: 経路検索 '{from_station}' -> '{to_station}'")
-            result = await super().search_routes_async(from_station, to_station, **kwargs)
-            
-            # 結果をキャッシュに保存
-            self.cache.set(cache_key, result)
-            return result
+            # 同じキーのリクエストが実行中であればその結果を待つ
+            result = await self._inflight.do(cache_key, self._fetch_routes, cache_key, from_station, to_station, kwargs, ttl)
+            return self._filter_routes(result, kwargs)
         except Exception as e:
-            logger.error(f"非同期経路検索エラー: {str(e)}")
+            logger.error("非同期経路検索エラー: %s", e)
             # 元の例外を保持して再送出
-            raise
\ No newline at end of file
+            raise
+    
+    async def search_routes_stream(self, from_station: str, to_station: str,
+                                   **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        経路を検索し、受信した経路から順に返す（キャッシング対応）
+        
+        キャッシュヒット時はキャッシュ済みの経路を返す。キャッシュミス時はストリーミングで
+        受信・解析し、最後まで受信できた場合に経路のリストをキャッシュに保存する。
+        ストリーミングでは同時リクエストの集約 (single-flight) は行わない。
+        """
+        if not self.cache:
+            async for route in super().search_routes_stream(from_station, to_station, **kwargs):
+                yield route
+            return
+        
+        cache_key, ttl = self._route_cache_key(from_station, to_station, kwargs)
+        state, cached_result = await self._cache_lookup(cache_key)
+        if state != CACHE_MISS:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("キャッシュヒット (非同期, %s): %s", state, cache_key)
+            if state != CACHE_FRESH:
+                self._schedule_refresh(cache_key, self._fetch_routes, cache_key, from_station, to_station, kwargs, ttl)
+            for route in self._filter_routes(cached_result, kwargs):
+                yield route
+            return
+        
+        routes = []
+        async for route in super().search_routes_stream(from_station, to_station, **kwargs):
+            routes.append(route)
+            yield route
+        await self._cache_store(cache_key, routes, ttl)
+    
+    async def __aenter__(self):
+        self._closed = False
+        return await super().__aenter__()
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """バックグラウンド更新をキャンセルし、終了を待ってからセッションを閉じる"""
+        await self._cancel_refreshes()
+        await super().__aexit__(exc_type, exc_val, exc_tb)
+    
+    async def close(self):
+        """バックグラウンド更新をキャンセルし、終了を待ってからセッションを閉じる"""
+        await self._cancel_refreshes()
+        await super().close()
\ No newline at end of file
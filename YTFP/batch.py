@@ -0,0 +1,41 @@
+"""
+Yahoo!路線情報ライブラリのバッチ検索ユーティリティ
+
+このモジュールは、複数の経路検索をまとめて実行する search_many で使用する
+検索条件の正規化と結果の型を提供します。
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional
+
+class SearchResult(NamedTuple):
+    """バッチ検索の1件分の結果"""
+
+    index: int                                  # queries内での位置
+    query: Any                                  # 呼び出し元が渡した検索条件
+    routes: Optional[List[Dict[str, Any]]]      # 経路情報のリスト（エラー時はNone）
+    error: Optional[BaseException]              # 発生した例外（成功時はNone）
+
+    @property
+    def ok(self) -> bool:
+        """検索が成功したかどうか"""
+        return self.error is None
+
+def normalize_query(query: Any) -> Dict[str, Any]:
+    """
+    検索条件をsearch_routesのキーワード引数に変換する
+
+    以下の形式を受け付ける:
+        - ("出発駅", "到着駅")
+        - ("出発駅", "到着駅", {"date": "20250522", "time": "0900"})
+        - {"from_station": "出発駅", "to_station": "到着駅", "time": "0900", ...}
+    """
+    if isinstance(query, dict):
+        if "from_station" not in query or "to_station" not in query:
+            raise ValueError(f"Query must contain 'from_station' and 'to_station': {query!r}")
+        return dict(query)
+    if isinstance(query, (tuple, list)) and len(query) in (2, 3):
+        params = dict(query[2]) if len(query) == 3 else {}
+        params["from_station"] = query[0]
+        params["to_station"] = query[1]
+        return params
+    raise TypeError(f"Unsupported query format: {query!r}")
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""
+Yahoo!路線情報ライブラリのベンチマーク
+
+保存済みの検索結果ページと駅名候補のJSONをローカルのスタブサーバーから返し、
+ネットワークに接続せずに各クライアントの性能を計測します。
+
+使い方:
+    python -m YTFP.benchmarks.run --output results.json  # 同梱のページを使用
+    python -m YTFP.benchmarks.run --pages result1.html result2.html --suggest suggest.json --output results.json
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+# スタブサーバーはaiohttpを読み込むため、最初に参照されたときに読み込む
+# （import_time など他のサブモジュールだけを使う場合に影響しないようにする）
+_LAZY_IMPORTS = {
+    "StubServer": ".stub_server",
+}
+
+if TYPE_CHECKING:
+    from .stub_server import StubServer
+
+def __getattr__(name):
+    """公開名が最初に参照されたときにサブモジュールを読み込む"""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
+__all__ = ["StubServer"]
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+ベンチマーク用の同梱データ
+
+パッケージに同梱した検索結果ページと駅名候補APIの応答を読み込みます。
+ページは検索結果ページのマークアップ（ヘッダー・広告・スクリプト・コメントを含む）を再現したもので、
+駅IDなどの識別子は匿名化しています。保存済みのページを指定しない場合のデフォルトとして使用します。
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+RESULT_PAGE = os.path.join(DATA_DIR, "result_page.html")
+SUGGEST_RESPONSE = os.path.join(DATA_DIR, "suggest.json")
+
+def load_pages(paths: Optional[Sequence[str]] = None) -> List[str]:
+    """検索結果ページのHTMLを読み込む（pathsを省略した場合は同梱のページ）"""
+    pages = []
+    for path in paths or [RESULT_PAGE]:
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+def load_suggestions(path: Optional[str] = None) -> Dict[str, Any]:
+    """駅名候補APIの応答を読み込む（pathを省略した場合は同梱の応答）"""
+    with open(path or SUGGEST_RESPONSE, encoding="utf-8") as f:
+        return json.load(f)
\ No newline at end of file
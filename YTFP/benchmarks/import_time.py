@@ -0,0 +1,102 @@
+"""
+パッケージのインポート時間の計測
+
+新しいPythonプロセスで `python -X importtime` を実行し、YTFPの読み込みにかかる時間と、
+そのときに読み込まれる重い依存ライブラリ（requests, aiohttp, bs4, lxml）を調べてJSONで出力します。
+
+使い方:
+    python -m YTFP.benchmarks.import_time [--repeat 5] [--max-ms 300] [--output import_time.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+# シナリオ名 -> 実行するコード
+SCENARIOS = {
+    "import YTFP": "import YTFP",
+    "sync client": "from YTFP import YahooTransitAPI",
+    "enhanced client": "from YTFP import EnhancedYahooTransitAPI",
+    "async client": "from YTFP import AsyncYahooTransitAPI",
+}
+
+HEAVY_MODULES = ("requests", "aiohttp", "bs4", "lxml")
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$")
+
+def _package_root() -> str:
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+def measure(code: str) -> Tuple[float, List[str]]:
+    """
+    新しいプロセスでcodeを実行し、(YTFP関連の累積インポート時間（ミリ秒）, 読み込まれた重い依存ライブラリ) を返す
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_package_root(), os.environ.get("PYTHONPATH")])))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True,
+    )
+    total_us = 0
+    loaded = set()
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        # 最上位のエントリ（インデントが1文字）のうちYTFPのものを合計する
+        # 遅延読み込みしたサブモジュールは YTFP とは別の最上位エントリになる
+        if indent == 1 and name.split(".")[0] == "YTFP":
+            total_us += cumulative
+        if name in HEAVY_MODULES:
+            loaded.add(name)
+    return total_us / 1000, sorted(loaded)
+
+def run(repeat: int = 5) -> Dict[str, Any]:
+    """全てのシナリオを計測し、結果を辞書で返す"""
+    results = {}
+    for scenario, code in SCENARIOS.items():
+        samples = []
+        loaded: List[str] = []
+        for _ in range(repeat):
+            elapsed, loaded = measure(code)
+            samples.append(elapsed)
+        results[scenario] = {
+            "code": code,
+            "median_ms": statistics.median(samples),
+            "min_ms": min(samples),
+            "max_ms": max(samples),
+            "heavy_modules": loaded,
+        }
+    return {"python": sys.version.split()[0], "repeat": repeat, "scenarios": results}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="YTFPのインポート時間を計測")
+    parser.add_argument("--repeat", type=int, default=5, help="シナリオごとの計測回数")
+    parser.add_argument("--max-ms", type=float, help="「import YTFP」の中央値の上限（超えた場合は終了コード1）")
+    parser.add_argument("--output", help="結果のJSONの出力先（省略時は標準出力）")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    for scenario, result in results["scenarios"].items():
+        print(f"{scenario:<16} {result['median_ms']:>8.1f} ms  {', '.join(result['heavy_modules']) or '-'}",
+              file=sys.stderr)
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.max_ms is not None and results["scenarios"]["import YTFP"]["median_ms"] > args.max_ms:
+        print(f"import YTFP exceeded {args.max_ms} ms", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,254 @@
+"""
+オフラインベンチマークの実行
+
+スタブサーバーに対して同期・拡張・非同期・拡張非同期の各クライアントで経路検索を実行し、
+スループット、レイテンシのパーセンタイル、1経路あたりの解析時間、キャッシュのヒット・ミスのコスト、
+メモリ使用量を計測してJSONで出力します。リリース間の結果を比較して性能の劣化を検出できます。
+
+ページ・駅名候補を指定しない場合は同梱のデータ (fixtures.py) を使用します。
+
+使い方:
+    python -m YTFP.benchmarks.run [--pages result1.html result2.html] [--suggest suggest.json]
+        [--requests 200] [--concurrency 8] [--delay 0.005] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from .. import __version__
+from ..api import YahooTransitAPI
+from ..async_api import AsyncYahooTransitAPI
+from ..async_enhanced_api import AsyncEnhancedYahooTransitAPI
+from ..enhanced_api import EnhancedYahooTransitAPI
+from ..errors import ConfigurationError
+from ..parser import PARSER_ENGINES, extract_routes_from_html
+from .fixtures import load_pages, load_suggestions
+from .stub_server import StubServer
+
+Query = Tuple[str, str]
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """レイテンシ（秒）の平均とパーセンタイル（ミリ秒）を返す"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def percentile(p: float) -> float:
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+        return ordered[index] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+def bench_parse(pages: List[str], repeat: int) -> Dict[str, Any]:
+    """パーサーエンジンごとの1経路あたりの解析時間を計測"""
+    results = {}
+    for engine in PARSER_ENGINES:
+        for scoped in (False, True):
+            try:
+                route_count = sum(len(extract_routes_from_html(page, engine=engine, scoped=scoped)) for page in pages)
+            except ConfigurationError:
+                continue  # エンジンが未インストール
+            start_time = time.perf_counter()
+            for _ in range(repeat):
+                for page in pages:
+                    extract_routes_from_html(page, engine=engine, scoped=scoped)
+            elapsed = time.perf_counter() - start_time
+            results[f"{engine}{'+scoped' if scoped else ''}"] = {
+                "routes_per_pass": route_count,
+                "ms_per_page": elapsed / (repeat * len(pages)) * 1000,
+                "ms_per_route": elapsed / (repeat * route_count) * 1000 if route_count else None,
+            }
+    return results
+
+def _run_sync(api, queries: List[Query], concurrency: int) -> Tuple[float, List[float]]:
+    def timed(query: Query) -> float:
+        start_time = time.perf_counter()
+        api.search_routes(*query)
+        return time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed, queries))
+    return time.perf_counter() - start_time, latencies
+
+async def _run_async(api, queries: List[Query], concurrency: int) -> Tuple[float, List[float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(query: Query) -> float:
+        async with semaphore:
+            start_time = time.perf_counter()
+            await api.search_routes_async(*query)
+            return time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    latencies = await asyncio.gather(*(timed(query) for query in queries))
+    return time.perf_counter() - start_time, list(latencies)
+
+def _client_factories(cache_dir: str, concurrency: int) -> Dict[str, Tuple[bool, Callable[[], Any]]]:
+    """クライアント名 -> (非同期かどうか, 新しいクライアントを作成する関数)"""
+    connection = {"pool_maxsize": concurrency, "limit": concurrency}
+
+    def cache_config() -> Dict[str, Any]:
+        # 計測ごとに空のキャッシュから始める
+        return {"cache_dir": tempfile.mkdtemp(dir=cache_dir)}
+
+    return {
+        "sync": (False, lambda: YahooTransitAPI(connection_config=connection)),
+        "enhanced": (False, lambda: EnhancedYahooTransitAPI(cache_config=cache_config(),
+                                                            connection_config=connection)),
+        "async": (True, lambda: AsyncYahooTransitAPI(connection_config=connection)),
+        "async_enhanced": (True, lambda: AsyncEnhancedYahooTransitAPI(cache_config=cache_config(),
+                                                                      connection_config=connection)),
+    }
+
+def _measure(server: StubServer, is_async: bool, factory: Callable[[], Any],
+             queries: List[Query], concurrency: int) -> Tuple[float, List[float]]:
+    api = factory()
+    server.configure(api)
+    if not is_async:
+        try:
+            return _run_sync(api, queries, concurrency)
+        finally:
+            api.close()
+
+    async def run() -> Tuple[float, List[float]]:
+        async with api:
+            return await _run_async(api, queries, concurrency)
+    return asyncio.run(run())
+
+def bench_clients(server: StubServer, queries: List[Query], concurrency: int,
+                  memory: bool) -> Dict[str, Any]:
+    """各クライアントのスループット・レイテンシ・キャッシュのコスト・メモリ使用量を計測"""
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name, (is_async, factory) in _client_factories(cache_dir, concurrency).items():
+            elapsed, latencies = _measure(server, is_async, factory, queries, concurrency)
+            result: Dict[str, Any] = {
+                "requests": len(queries),
+                "throughput_rps": len(queries) / elapsed,
+                "latency": summarize(latencies),
+            }
+
+            if name.endswith("enhanced"):
+                # 同じクライアントで同じクエリを2回実行し、1回目（ミス）と2回目（ヒット）を比較する
+                api = factory()
+                server.configure(api)
+                cache_queries = queries[:min(len(queries), 50)]
+                if is_async:
+                    async def twice():
+                        async with api:
+                            misses = (await _run_async(api, cache_queries, 1))[1]
+                            hits = (await _run_async(api, cache_queries, 1))[1]
+                            return misses, hits
+                    misses, hits = asyncio.run(twice())
+                else:
+                    misses = _run_sync(api, cache_queries, 1)[1]
+                    hits = _run_sync(api, cache_queries, 1)[1]
+                    api.close()
+                result["cache_miss"] = summarize(misses)
+                result["cache_hit"] = summarize(hits)
+
+            if memory:
+                tracemalloc.start()
+                _measure(server, is_async, factory, queries, concurrency)
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                result["memory"] = {"peak_kib": peak / 1024, "retained_kib": current / 1024}
+
+            results[name] = result
+    return results
+
+def run_benchmarks(pages: List[str], suggestions: Dict[str, Any] = None,
+                   requests: int = 200, concurrency: int = 8, delay: float = 0.005,
+                   parse_repeat: int = 20, memory: bool = True) -> Dict[str, Any]:
+    """全てのベンチマークを実行し、結果を辞書で返す"""
+    queries = [(f"駅{i}", "東京") for i in range(requests)]
+    with StubServer(pages, suggestions, delay=delay) as server:
+        clients = bench_clients(server, queries, concurrency, memory)
+
+        # 駅名候補（キャッシュ・インデックスを使わない場合の往復時間）
+        api = YahooTransitAPI()
+        server.configure(api)
+        suggest_latencies = []
+        for query, _ in queries[:min(len(queries), 50)]:
+            start_time = time.perf_counter()
+            api.get_station_suggestions(query)
+            suggest_latencies.append(time.perf_counter() - start_time)
+        api.close()
+
+    return {
+        "meta": {
+            "version": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "pages": len(pages),
+            "requests": requests,
+            "concurrency": concurrency,
+            "server_delay_ms": delay * 1000,
+        },
+        "parse": bench_parse(pages, parse_repeat),
+        "clients": clients,
+        "suggest": summarize(suggest_latencies),
+    }
+
+def _print_summary(results: Dict[str, Any]) -> None:
+    """結果の概要を標準エラー出力に表示"""
+    out = sys.stderr
+    print(f"{'parser':<16} {'ms/page':>10} {'ms/route':>10}", file=out)
+    for name, result in results["parse"].items():
+        per_route = result["ms_per_route"]
+        print(f"{name:<16} {result['ms_per_page']:>10.3f} {'-' if per_route is None else format(per_route, '10.3f'):>10}", file=out)
+    print(f"\n{'client':<16} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'hit':>8} {'miss':>8} {'peakKiB':>9}", file=out)
+    for name, result in results["clients"].items():
+        latency = result["latency"]
+        hit = result.get("cache_hit", {}).get("mean_ms")
+        miss = result.get("cache_miss", {}).get("mean_ms")
+        peak = result.get("memory", {}).get("peak_kib")
+        cols = [f"{v:>8.2f}" if v is not None else f"{'-':>8}" for v in (hit, miss)]
+        print(f"{name:<16} {result['throughput_rps']:>8.1f} {latency['p50_ms']:>8.2f} {latency['p95_ms']:>8.2f} "
+              f"{latency['p99_ms']:>8.2f} {cols[0]} {cols[1]} {'-' if peak is None else format(peak, '9.0f'):>9}", file=out)
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="スタブサーバーを使用したオフラインベンチマーク")
+    parser.add_argument("--pages", nargs="+", help="保存済みの検索結果ページ（HTML）。省略時は同梱のページ")
+    parser.add_argument("--suggest", help="駅名候補APIの応答（JSON）。省略時は同梱の応答")
+    parser.add_argument("--requests", type=int, default=200, help="クライアントごとのリクエスト数")
+    parser.add_argument("--concurrency", type=int, default=8, help="同時実行数")
+    parser.add_argument("--delay", type=float, default=0.005, help="スタブサーバーの応答遅延（秒）")
+    parser.add_argument("--parse-repeat", type=int, default=20, help="解析時間の計測の繰り返し回数")
+    parser.add_argument("--no-memory", action="store_true", help="メモリ使用量を計測しない")
+    parser.add_argument("--output", help="結果のJSONの出力先（省略時は標準出力）")
+    args = parser.parse_args(argv)
+
+    pages = load_pages(args.pages)
+    suggestions = load_suggestions(args.suggest)
+
+    results = run_benchmarks(pages, suggestions, requests=args.requests, concurrency=args.concurrency,
+                             delay=args.delay, parse_repeat=args.parse_repeat, memory=not args.no_memory)
+    _print_summary(results)
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+ベンチマーク用のスタブサーバー
+
+保存済みの検索結果ページと駅名候補APIの応答を返すaiohttpサーバーを別スレッドで起動します。
+応答を指定しない場合は同梱のページと駅名候補 (fixtures.py) を返します。
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from .fixtures import load_pages, load_suggestions
+
+class StubServer:
+    """保存済みの応答を返すローカルのYahoo!路線情報スタブサーバー"""
+
+    def __init__(self, pages: Optional[List[str]] = None,
+                 suggestions: Optional[Dict[str, Any]] = None,
+                 delay: float = 0.0,
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        """
+        Args:
+            pages: /search/result で順番に返す検索結果ページのHTML（省略時は同梱のページ）
+            suggestions: /api/suggest で返す応答。駅名（value）ごとの応答の辞書、
+                または全ての駅名に共通の応答 ({"Result": [...]})。省略時は同梱の応答
+            delay: 応答を返すまでの遅延（秒）。ネットワークの往復時間の代わりに使用する
+            host: 待ち受けるホスト
+            port: 待ち受けるポート（0の場合は空いているポートを使用）
+        """
+        if pages is None:
+            pages = load_pages()
+        if not pages:
+            raise ValueError("pages must not be empty")
+        self.pages = [page.encode("utf-8") for page in pages]
+        self.suggestions = load_suggestions() if suggestions is None else suggestions
+        self.delay = delay
+        self.host = host
+        self.port = port
+        self.request_count = 0
+        self._page_cycle = itertools.cycle(self.pages)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def configure(self, api) -> None:
+        """クライアントのリクエスト先をこのサーバーに向ける"""
+        api.SEARCH_URL = f"{self.base_url}/search/result"
+        api.SUGGEST_API_URL = f"{self.base_url}/api/suggest"
+
+    async def _search(self, request: web.Request) -> web.Response:
+        self.request_count += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return web.Response(body=next(self._page_cycle), content_type="text/html", charset="utf-8")
+
+    async def _suggest(self, request: web.Request) -> web.Response:
+        self.request_count += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        value = request.query.get("value", "")
+        if "Result" in self.suggestions:
+            body = self.suggestions
+        else:
+            body = self.suggestions.get(value, {"Result": []})
+        return web.Response(text=json.dumps(body, ensure_ascii=False), content_type="application/json")
+
+    def start(self) -> "StubServer":
+        """サーバーを別スレッドで起動"""
+        self._loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_get("/search/result", self._search)
+        app.router.add_get("/api/suggest", self._suggest)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.host, self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """サーバーを停止"""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
\ No newline at end of file
@@ -2,14 +2,26 @@
 Yahoo!路線情報ライブラリのキャッシング機能
 
 このモジュールは、APIリクエストの結果をキャッシュするための機能を提供します。
-メモリ内キャッシュとファイルベースの永続キャッシュの両方をサポートします。
+メモリ内キャッシュと永続キャッシュ（ファイルまたはSQLite）の両方をサポートします。
 """
 
+import asyncio
 import time
 import json
 import os
+import threading
+from collections import OrderedDict
 from typing import Dict, Any, Optional, Union, Tuple
 
+from .cache_backends import CacheBackend, CacheCodec, FileCacheBackend, SQLiteCacheBackend
+from .errors import ConfigurationError
+
+# lookup() が返すキャッシュエントリの状態
+CACHE_MISS = "miss"        # エントリなし
+CACHE_FRESH = "fresh"      # 有効期限内
+CACHE_REFRESH = "refresh"  # 有効期限内だが期限が近い（refresh_ahead）
+CACHE_STALE = "stale"      # 期限切れだがstale_ttlの猶予期間内
+
 class CacheManager:
     """キャッシング機能を提供するクラス"""
     
@@ -17,7 +29,14 @@ class CacheManager:
                  cache_dir: Optional[str] = None, 
                  ttl: int = 3600,  # デフォルト1時間
                  max_memory_entries: int = 100,
-                 use_file_cache: bool = True):
+                 use_file_cache: bool = True,
+                 max_memory_bytes: Optional[int] = None,
+                 backend: Union[str, CacheBackend] = "file",
+                 serializer: str = "json",
+                 compression: Optional[str] = None,
+                 file_lock: bool = False,
+                 stale_ttl: int = 0,
+                 refresh_ahead: int = 0):
         """
         キャッシュマネージャーの初期化
         
@@ -26,99 +45,254 @@ class CacheManager:
             ttl: キャッシュの有効期間（秒）
             max_memory_entries: メモリ内キャッシュの最大エントリ数
             use_file_cache: ファイルキャッシュを使用するかどうか
+            max_memory_bytes: メモリ内キャッシュの概算最大バイト数（Noneの場合は無制限）
+            backend: 永続キャッシュのバックエンド
+                - "file": キーごとにJSONファイルを作成（デフォルト）
+                - "sqlite": cache_dir内の単一のSQLiteファイルに保存
+                - CacheBackendのインスタンス
+            serializer: 永続キャッシュのシリアライザ（"json" / "pickle" / "msgpack"）
+            compression: 永続キャッシュの圧縮方式（None / "zlib" / "zstd"）
+            file_lock: ファイルバックエンドで書き込み時にアドバイザリロックを取得するかどうか
+            stale_ttl: 有効期限切れ後もエントリを保持し、期限切れデータとして返す猶予期間（秒）
+            refresh_ahead: 有効期限までの残り時間がこの秒数以下になったエントリを更新対象とする
         """
-        self.memory_cache: Dict[str, Tuple[float, Any]] = {}  # (expiry_time, data)
+        # 最近使用された順に並ぶLRU (key -> (expiry_time, data, size))
+        self.memory_cache: "OrderedDict[str, Tuple[float, Any, int]]" = OrderedDict()
+        self.memory_bytes = 0
         self.ttl = ttl
         self.max_memory_entries = max_memory_entries
+        self.max_memory_bytes = max_memory_bytes
         self.use_file_cache = use_file_cache
+        self.file_lock = file_lock
+        self.stale_ttl = stale_ttl
+        self.refresh_ahead = refresh_ahead
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._lock = threading.RLock()
         
+        self.backend: Optional[CacheBackend] = None
         if use_file_cache:
             self.cache_dir = cache_dir or os.path.join(os.path.expanduser("~"), ".yahoosc_cache")
-            os.makedirs(self.cache_dir, exist_ok=True)
+            self.backend = self._create_backend(backend, CacheCodec(serializer, compression))
     
-    def _get_cache_file_path(self, key: str) -> str:
-        """キャッシュファイルのパスを取得"""
-        import hashlib
-        hashed_key = hashlib.md5(key.encode()).hexdigest()
-        return os.path.join(self.cache_dir, f"{hashed_key}.json")
+    def _create_backend(self, backend: Union[str, CacheBackend], codec: CacheCodec) -> CacheBackend:
+        """永続キャッシュのバックエンドを生成"""
+        if isinstance(backend, CacheBackend):
+            return backend
+        if backend == "file":
+            return FileCacheBackend(self.cache_dir, codec, lock=self.file_lock)
+        if backend == "sqlite":
+            return SQLiteCacheBackend(os.path.join(self.cache_dir, "cache.sqlite3"), codec=codec)
+        raise ConfigurationError(f"Unknown cache backend: {backend!r}")
     
-    def get(self, key: str) -> Optional[Any]:
-        """キャッシュからデータを取得"""
-        # メモリキャッシュを確認
-        if key in self.memory_cache:
-            expiry_time, data = self.memory_cache[key]
-            if expiry_time > time.time():
-                return data
-            # 期限切れの場合は削除
+    def _count(self, name: str) -> None:
+        """統計情報のカウンタを加算"""
+        with self._lock:
+            self.stats[name] += 1
+    
+    def _estimate_size(self, data: Any) -> int:
+        """データの概算バイト数を取得（バイト数制限が無効な場合は0）"""
+        if self.max_memory_bytes is None:
+            return 0
+        try:
+            return len(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        except (TypeError, ValueError):
+            return 0
+    
+    def _classify(self, expiry_time: float, now: float) -> str:
+        """有効期限からエントリの状態を判定"""
+        if expiry_time > now:
+            if self.refresh_ahead and expiry_time - now <= self.refresh_ahead:
+                return CACHE_REFRESH
+            return CACHE_FRESH
+        if expiry_time + self.stale_ttl > now:
+            return CACHE_STALE
+        return CACHE_MISS
+    
+    def _memory_lookup(self, key: str) -> Tuple[str, Any]:
+        """メモリキャッシュからデータを取得し、(状態, データ) を返す"""
+        with self._lock:
+            entry = self.memory_cache.get(key)
+            if entry is None:
+                return CACHE_MISS, None
+            expiry_time, data, size = entry
+            state = self._classify(expiry_time, time.time())
+            if state != CACHE_MISS:
+                self.memory_cache.move_to_end(key)
+                return state, data
+            # 猶予期間も過ぎた場合は削除
             del self.memory_cache[key]
+            self.memory_bytes -= size
+            self.stats["expirations"] += 1
+            return CACHE_MISS, None
+    
+    def _memory_set(self, key: str, expiry_time: float, data: Any) -> None:
+        """メモリキャッシュにデータを設定し、上限を超えた分を古い順に削除"""
+        size = self._estimate_size(data)
+        with self._lock:
+            old_entry = self.memory_cache.pop(key, None)
+            if old_entry is not None:
+                self.memory_bytes -= old_entry[2]
+            self.memory_cache[key] = (expiry_time, data, size)
+            self.memory_bytes += size
+            
+            # 最も長く使われていないエントリから削除 (O(1))
+            while len(self.memory_cache) > 1 and (
+                len(self.memory_cache) > self.max_memory_entries
+                or (self.max_memory_bytes is not None and self.memory_bytes > self.max_memory_bytes)
+            ):
+                _, (_, _, evicted_size) = self.memory_cache.popitem(last=False)
+                self.memory_bytes -= evicted_size
+                self.stats["evictions"] += 1
+    
+    def _memory_delete(self, key: str) -> None:
+        """メモリキャッシュから削除"""
+        with self._lock:
+            entry = self.memory_cache.pop(key, None)
+            if entry is not None:
+                self.memory_bytes -= entry[2]
+    
+    def _persistent_lookup(self, key: str) -> Tuple[str, Any]:
+        """永続キャッシュからデータを取得し、(状態, データ) を返す"""
+        if self.backend is None:
+            return CACHE_MISS, None
+        entry = self.backend.get(key)
+        if entry is None:
+            return CACHE_MISS, None
+        expiry_time, data = entry
+        # 有効期限をチェック
+        now = time.time()
+        state = self._classify(expiry_time, now)
+        if state != CACHE_MISS:
+            # メモリキャッシュにも追加
+            self._memory_set(key, expiry_time, data)
+            return state, data
+        # 期限切れのエントリを削除（読み込み後に他のプロセスが書き込んだエントリは残す）
+        self.backend.delete_expired(key, now - self.stale_ttl)
+        self._count("expirations")
+        return CACHE_MISS, None
+    
+    def _count_lookup(self, state: str) -> None:
+        """lookupの結果を統計情報に反映"""
+        if state == CACHE_STALE:
+            self._count("stale_hits")
+        else:
+            self._count("misses" if state == CACHE_MISS else "hits")
+    
+    def lookup(self, key: str) -> Tuple[str, Any]:
+        """
+        キャッシュからデータを取得し、(状態, データ) を返す
         
-        # ファイルキャッシュを確認
-        if self.use_file_cache:
-            cache_file = self._get_cache_file_path(key)
-            if os.path.exists(cache_file):
-                try:
-                    with open(cache_file, 'r', encoding='utf-8') as f:
-                        cache_data = json.load(f)
-                    
-                    # 有効期限をチェック
-                    if cache_data.get('expiry', 0) > time.time():
-                        # メモリキャッシュにも追加
-                        self.memory_cache[key] = (cache_data['expiry'], cache_data['data'])
-                        return cache_data['data']
-                    else:
-                        # 期限切れのファイルを削除
-                        os.remove(cache_file)
-                except (json.JSONDecodeError, KeyError, OSError):
-                    pass
+        状態は CACHE_FRESH / CACHE_REFRESH / CACHE_STALE / CACHE_MISS のいずれか。
+        CACHE_STALE の場合も期限切れのデータを返すため、呼び出し側でバックグラウンド更新を行える。
+        """
+        # メモリキャッシュ、永続キャッシュの順に確認
+        state, data = self._memory_lookup(key)
+        if state == CACHE_MISS:
+            state, data = self._persistent_lookup(key)
+        self._count_lookup(state)
+        return state, data
+    
+    def get(self, key: str) -> Optional[Any]:
+        """キャッシュからデータを取得（期限切れのデータは返さない）"""
+        state, data = self._memory_lookup(key)
+        if state == CACHE_MISS:
+            state, data = self._persistent_lookup(key)
         
-        return None
+        found = state in (CACHE_FRESH, CACHE_REFRESH)
+        self._count("hits" if found else "misses")
+        return data if found else None
     
     def set(self, key: str, data: Any, ttl: Optional[int] = None) -> None:
         """データをキャッシュに設定"""
-        expiry_time = time.time() + (ttl or self.ttl)
+        expiry_time = time.time() + (self.ttl if ttl is None else ttl)
         
-        # メモリキャッシュが最大サイズに達した場合、最も古いエントリを削除
-        if len(self.memory_cache) >= self.max_memory_entries:
-            oldest_key = min(self.memory_cache.keys(), 
-                            key=lambda k: self.memory_cache[k][0])
-            del self.memory_cache[oldest_key]
+        # メモリキャッシュに追加（上限を超えた場合は最も長く使われていないエントリを削除）
+        self._memory_set(key, expiry_time, data)
         
-        # メモリキャッシュに追加
-        self.memory_cache[key] = (expiry_time, data)
+        # 永続キャッシュに保存
+        if self.backend is not None:
+            self.backend.set(key, expiry_time, data)
+    
+    async def alookup(self, key: str) -> Tuple[str, Any]:
+        """
+        キャッシュからデータを非同期に取得し、(状態, データ) を返す
         
-        # ファイルキャッシュに保存
-        if self.use_file_cache:
-            cache_file = self._get_cache_file_path(key)
-            try:
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    json.dump({
-                        'expiry': expiry_time,
-                        'data': data
-                    }, f, ensure_ascii=False)
-            except OSError:
-                pass  # ファイル書き込みエラーは無視
+        メモリキャッシュにヒットした場合はその場で返し、
+        永続キャッシュへのアクセスはExecutor上で行うためイベントループをブロックしない。
+        """
+        state, data = self._memory_lookup(key)
+        if state == CACHE_MISS and self.backend is not None:
+            loop = asyncio.get_running_loop()
+            state, data = await loop.run_in_executor(None, self._persistent_lookup, key)
+        self._count_lookup(state)
+        return state, data
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """
+        キャッシュからデータを非同期に取得（期限切れのデータは返さない）
+        
+        メモリキャッシュにヒットした場合はその場で返し、
+        永続キャッシュへのアクセスはExecutor上で行うためイベントループをブロックしない。
+        """
+        state, data = self._memory_lookup(key)
+        if state == CACHE_MISS and self.backend is not None:
+            loop = asyncio.get_running_loop()
+            state, data = await loop.run_in_executor(None, self._persistent_lookup, key)
+        
+        found = state in (CACHE_FRESH, CACHE_REFRESH)
+        self._count("hits" if found else "misses")
+        return data if found else None
+    
+    async def aset(self, key: str, data: Any, ttl: Optional[int] = None) -> None:
+        """
+        データをキャッシュに非同期に設定
+        
+        メモリキャッシュには即座に反映し、永続キャッシュへの書き込みはExecutor上で行う。
+        """
+        expiry_time = time.time() + (self.ttl if ttl is None else ttl)
+        self._memory_set(key, expiry_time, data)
+        
+        if self.backend is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.backend.set, key, expiry_time, data)
     
     def invalidate(self, key: str) -> None:
         """特定のキーのキャッシュを無効化"""
-        if key in self.memory_cache:
-            del self.memory_cache[key]
+        self._memory_delete(key)
         
-        if self.use_file_cache:
-            cache_file = self._get_cache_file_path(key)
-            if os.path.exists(cache_file):
-                try:
-                    os.remove(cache_file)
-                except OSError:
-                    pass
+        if self.backend is not None:
+            self.backend.delete(key)
     
     def clear(self) -> None:
         """全てのキャッシュをクリア"""
-        self.memory_cache.clear()
+        with self._lock:
+            self.memory_cache.clear()
+            self.memory_bytes = 0
         
-        if self.use_file_cache:
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.json'):
-                    try:
-                        os.remove(os.path.join(self.cache_dir, filename))
-                    except OSError:
-                        pass
\ No newline at end of file
+        if self.backend is not None:
+            self.backend.clear()
+    
+    def purge_expired(self) -> int:
+        """期限切れのエントリを一括削除し、永続キャッシュから削除した件数を返す"""
+        # 猶予期間 (stale_ttl) 内のエントリは残す
+        now = time.time() - self.stale_ttl
+        with self._lock:
+            for key in [k for k, entry in self.memory_cache.items() if entry[0] <= now]:
+                self.memory_bytes -= self.memory_cache.pop(key)[2]
+        
+        if self.backend is not None:
+            return self.backend.purge_expired(now)
+        return 0
+    
+    def close(self) -> None:
+        """永続キャッシュのリソースを解放"""
+        if self.backend is not None:
+            self.backend.close()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """ヒット数・ミス数・削除数などの統計情報を取得"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self.memory_cache)
+            stats["memory_bytes"] = self.memory_bytes
+        return stats
\ No newline at end of file
@@ -0,0 +1,434 @@
+"""
+Yahoo!路線情報ライブラリの永続キャッシュバックエンド
+
+このモジュールは、CacheManagerの永続キャッシュ層として使用するバックエンドを提供します。
+キーごとにJSONファイルを作成するファイルバックエンドと、
+単一のSQLiteファイルにまとめて保存するSQLiteバックエンドをサポートします。
+保存形式（シリアライザと圧縮方式）はCacheCodecで設定できます。
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+import time
+import tempfile
+import zlib
+from contextlib import contextmanager
+from typing import Any, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .errors import ConfigurationError
+
+# 保存データの先頭に付けるヘッダー: マジック(4バイト) + シリアライザID(1バイト) + 圧縮方式ID(1バイト)
+_MAGIC = b"YTC1"
+_HEADER = struct.Struct(">4sBB")
+# ファイルバックエンドではヘッダーの直後に有効期限を格納する
+_EXPIRY = struct.Struct(">d")
+
+_SERIALIZER_IDS = {"json": 1, "pickle": 2, "msgpack": 3}
+_COMPRESSION_IDS = {None: 0, "zlib": 1, "zstd": 2}
+
+# 読み込み時にコードが実行されない形式。pickleは設定されている場合だけ読み込む
+_SAFE_SERIALIZERS = ("json", "msgpack")
+
+# 壊れたエントリ・読み込めない形式のエントリを読み込んだときに発生する例外（キャッシュミスとして扱う）
+_DECODE_ERRORS = (ValueError, KeyError, TypeError, EOFError, AttributeError, ImportError, struct.error,
+                  pickle.UnpicklingError, ConfigurationError, zlib.error)
+
+def _import_optional(module_name: str):
+    """オプションの依存ライブラリをインポート"""
+    try:
+        return __import__(module_name)
+    except ImportError:
+        raise ConfigurationError(
+            f"'{module_name}' is required for this cache format (pip install {module_name})"
+        ) from None
+
+class CacheCodec:
+    """
+    キャッシュデータのシリアライズと圧縮を行うクラス
+
+    エンコードしたデータの先頭には形式を示すヘッダーが付くため、
+    設定を変更しても以前の形式で保存されたエントリを読み込むことができます。
+    ヘッダーのないデータは従来のJSON形式として扱います。
+    pickle形式のエントリは、serializer="pickle" を設定した場合だけ読み込みます。
+    """
+
+    def __init__(self, serializer: str = "json", compression: Optional[str] = None,
+                 compression_level: Optional[int] = None):
+        """
+        Args:
+            serializer: シリアライザ（"json" / "pickle" / "msgpack"）
+            compression: 圧縮方式（None / "zlib" / "zstd"）
+            compression_level: 圧縮レベル（Noneの場合は各方式のデフォルト）
+        """
+        if serializer not in _SERIALIZER_IDS:
+            raise ConfigurationError(f"Unknown cache serializer: {serializer!r}")
+        if compression not in _COMPRESSION_IDS:
+            raise ConfigurationError(f"Unknown cache compression: {compression!r}")
+        self.serializer = serializer
+        self.compression = compression
+        self.compression_level = compression_level
+        self._header = _HEADER.pack(_MAGIC, _SERIALIZER_IDS[serializer], _COMPRESSION_IDS[compression])
+        self._accepted_ids = {_SERIALIZER_IDS[name] for name in set(_SAFE_SERIALIZERS) | {serializer}}
+
+        # 必要なライブラリが無い場合は設定時点でエラーにする
+        if serializer == "msgpack":
+            _import_optional("msgpack")
+        if compression == "zstd":
+            _import_optional("zstandard")
+
+    @property
+    def header_size(self) -> int:
+        """ヘッダーのバイト数"""
+        return _HEADER.size
+
+    def encode(self, data: Any) -> bytes:
+        """データをヘッダー付きのバイト列に変換"""
+        return self._header + self._compress(self._serialize(data))
+
+    def decode(self, payload: bytes) -> Any:
+        """
+        ヘッダー付きのバイト列（またはヘッダーのない従来のJSON）からデータを復元
+
+        Raises:
+            ValueError: 受け入れない形式（設定されていないpickleなど）のデータの場合
+        """
+        payload = bytes(payload)
+        if not self.has_header(payload):
+            return json.loads(payload.decode('utf-8'))
+        _, serializer_id, compression_id = _HEADER.unpack_from(payload)
+        if serializer_id not in self._accepted_ids:
+            raise ValueError(f"Serializer id {serializer_id} is not accepted by this codec")
+        body = self._decompress(compression_id, payload[_HEADER.size:])
+        return self._deserialize(serializer_id, body)
+
+    @staticmethod
+    def has_header(payload: bytes) -> bool:
+        """ヘッダー付きの形式かどうか"""
+        return payload[:len(_MAGIC)] == _MAGIC
+
+    def _serialize(self, data: Any) -> bytes:
+        if self.serializer == "pickle":
+            return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.serializer == "msgpack":
+            return _import_optional("msgpack").packb(data, use_bin_type=True)
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def _deserialize(self, serializer_id: int, body: bytes) -> Any:
+        if serializer_id == _SERIALIZER_IDS["pickle"]:
+            return pickle.loads(body)
+        if serializer_id == _SERIALIZER_IDS["msgpack"]:
+            return _import_optional("msgpack").unpackb(body, raw=False)
+        if serializer_id == _SERIALIZER_IDS["json"]:
+            return json.loads(body.decode('utf-8'))
+        raise ValueError(f"Unknown serializer id: {serializer_id}")
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.compression == "zlib":
+            level = -1 if self.compression_level is None else self.compression_level
+            return zlib.compress(body, level)
+        if self.compression == "zstd":
+            zstandard = _import_optional("zstandard")
+            level = 3 if self.compression_level is None else self.compression_level
+            return zstandard.ZstdCompressor(level=level).compress(body)
+        return body
+
+    def _decompress(self, compression_id: int, body: bytes) -> bytes:
+        if compression_id == _COMPRESSION_IDS["zlib"]:
+            return zlib.decompress(body)
+        if compression_id == _COMPRESSION_IDS["zstd"]:
+            zstandard = _import_optional("zstandard")
+            try:
+                return zstandard.ZstdDecompressor().decompress(body)
+            except zstandard.ZstdError as e:
+                raise ValueError(str(e)) from e
+        if compression_id == _COMPRESSION_IDS[None]:
+            return body
+        raise ValueError(f"Unknown compression id: {compression_id}")
+
+class CacheBackend:
+    """永続キャッシュバックエンドの基底クラス"""
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        """
+        キャッシュエントリを取得する
+
+        Returns:
+            (expiry_time, data) のタプル。存在しない場合はNone
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, expiry_time: float, data: Any) -> None:
+        """キャッシュエントリを保存する"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """キャッシュエントリを削除する"""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """全てのキャッシュエントリを削除する"""
+        raise NotImplementedError
+
+    def delete_expired(self, key: str, now: float) -> bool:
+        """
+        有効期限がnow以前のエントリだけを削除し、削除した場合はTrueを返す
+
+        読み込んでから削除するまでの間に他のプロセスが書き込んだ新しいエントリを消さないよう、
+        サブクラスでは確認と削除をまとめて行う。
+        """
+        entry = self.get(key)
+        if entry is None or entry[0] > now:
+            return False
+        self.delete(key)
+        return True
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """期限切れのエントリを一括削除し、削除した件数を返す"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """バックエンドが保持するリソースを解放する"""
+        pass
+
+class FileCacheBackend(CacheBackend):
+    """
+    キーごとにJSONファイルを作成するバックエンド
+
+    書き込みは同じディレクトリ内の一時ファイルに行い、os.replaceで置き換えるため、
+    他プロセスの読み込みや書き込み途中のクラッシュで不完全なファイルが見えることはありません。
+    """
+
+    LOCK_FILE_NAME = ".lock"
+    TEMP_FILE_SUFFIX = ".tmp"
+
+    def __init__(self, cache_dir: str, codec: Optional[CacheCodec] = None,
+                 lock: bool = False, fsync: bool = False):
+        """
+        Args:
+            cache_dir: キャッシュファイルを保存するディレクトリ
+            codec: 保存形式（指定しない場合はJSON・無圧縮）
+            lock: 書き込み・削除時にディレクトリ単位のアドバイザリロックを取得するかどうか（POSIXのみ）。
+                期限切れの削除では確認から削除までロックを保持し、その間に書き込まれたエントリを消さない
+            fsync: 置き換え前に一時ファイルをディスクに同期するかどうか
+        """
+        if lock and fcntl is None:
+            raise ConfigurationError("File locking for the cache is not supported on this platform")
+        self.cache_dir = cache_dir
+        self.codec = codec or CacheCodec()
+        self.lock = lock
+        self.fsync = fsync
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        """lock=Trueの場合、ディレクトリ単位の排他ロックを取得する"""
+        if not self.lock:
+            yield
+            return
+        with open(os.path.join(self.cache_dir, self.LOCK_FILE_NAME), 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _get_cache_file_path(self, key: str) -> str:
+        """キャッシュファイルのパスを取得"""
+        hashed_key = hashlib.md5(key.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{hashed_key}.json")
+
+    def _read_file(self, cache_file: str) -> Optional[Tuple[float, Any]]:
+        """
+        キャッシュファイルを読み込む
+
+        ファイルはヘッダー・有効期限・データの順に格納される。
+        ヘッダーのないファイルは従来の {'expiry': ..., 'data': ...} 形式のJSONとして読み込む。
+        """
+        try:
+            with open(cache_file, 'rb') as f:
+                content = f.read()
+            if not self.codec.has_header(content):
+                cache_data = json.loads(content.decode('utf-8'))
+                return cache_data['expiry'], cache_data['data']
+            header_size = self.codec.header_size
+            (expiry_time,) = _EXPIRY.unpack_from(content, header_size)
+            return expiry_time, self.codec.decode(content[:header_size] + content[header_size + _EXPIRY.size:])
+        except _DECODE_ERRORS + (OSError,):
+            return None
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        return self._read_file(self._get_cache_file_path(key))
+
+    def set(self, key: str, expiry_time: float, data: Any) -> None:
+        cache_file = self._get_cache_file_path(key)
+        encoded = self.codec.encode(data)
+        header_size = self.codec.header_size
+        temp_path = None
+        try:
+            # 一時ファイルに書き込んでから置き換える（読み込み側には常に完全なファイルが見える）
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=self.TEMP_FILE_SUFFIX)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(encoded[:header_size])
+                f.write(_EXPIRY.pack(expiry_time))
+                f.write(encoded[header_size:])
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            with self._locked():
+                os.replace(temp_path, cache_file)
+            temp_path = None
+        except OSError:
+            pass  # ファイル書き込みエラーは無視
+        finally:
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def delete(self, key: str) -> None:
+        with self._locked():
+            try:
+                os.remove(self._get_cache_file_path(key))
+            except OSError:
+                pass
+
+    def _remove_if_expired(self, cache_file: str, now: float) -> bool:
+        """有効期限がnow以前のファイルを削除する（ロックは呼び出し側で取得する）"""
+        entry = self._read_file(cache_file)
+        if entry is None or entry[0] > now:
+            return False
+        try:
+            os.remove(cache_file)
+            return True
+        except OSError:
+            return False
+
+    def delete_expired(self, key: str, now: float) -> bool:
+        with self._locked():
+            return self._remove_if_expired(self._get_cache_file_path(key), now)
+
+    def clear(self) -> None:
+        with self._locked():
+            for filename in os.listdir(self.cache_dir):
+                # 書き込み途中でクラッシュした場合に残る一時ファイルも削除する
+                if filename.endswith('.json') or filename.endswith(self.TEMP_FILE_SUFFIX):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, filename))
+                    except OSError:
+                        pass
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        purged = 0
+        # 走査中はロックを保持し、期限切れと判定してから削除するまでに置き換えられたファイルを消さない
+        with self._locked():
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.json'):
+                    purged += self._remove_if_expired(os.path.join(self.cache_dir, filename), now)
+        return purged
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    単一のSQLiteファイルに保存するバックエンド
+
+    WALモードで動作するため、複数のワーカープロセスから同じファイルを安全に読み書きできます。
+    有効期限列にはインデックスが張られており、期限切れエントリは1回のDELETEで一括削除されます。
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0, codec: Optional[CacheCodec] = None):
+        """
+        Args:
+            path: SQLiteデータベースファイルのパス
+            timeout: 他プロセスのロック解除を待つ最大秒数
+            codec: 保存形式（指定しない場合はJSON・無圧縮）
+        """
+        self.path = path
+        self.timeout = timeout
+        self.codec = codec or CacheCodec()
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, expiry REAL NOT NULL, data BLOB NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expiry ON cache (expiry)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """スレッド・プロセスごとの接続を取得"""
+        conn = getattr(self._local, 'conn', None)
+        # fork後の子プロセスでは親の接続を使い回さない
+        if conn is not None and getattr(self._local, 'pid', None) == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        try:
+            row = self._connect().execute(
+                "SELECT expiry, data FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            return row[0], self.codec.decode(row[1])
+        except _DECODE_ERRORS + (sqlite3.Error,):
+            return None
+
+    def set(self, key: str, expiry_time: float, data: Any) -> None:
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO cache (key, expiry, data) VALUES (?, ?, ?)",
+                (key, expiry_time, self.codec.encode(data))
+            )
+        except sqlite3.Error:
+            pass  # 書き込みエラーは無視
+
+    def delete(self, key: str) -> None:
+        try:
+            self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error:
+            pass
+
+    def delete_expired(self, key: str, now: float) -> bool:
+        try:
+            return self._connect().execute(
+                "DELETE FROM cache WHERE key = ? AND expiry <= ?", (key, now)).rowcount > 0
+        except sqlite3.Error:
+            return False
+
+    def clear(self) -> None:
+        try:
+            self._connect().execute("DELETE FROM cache")
+        except sqlite3.Error:
+            pass
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        try:
+            return self._connect().execute("DELETE FROM cache WHERE expiry <= ?", (now,)).rowcount
+        except sqlite3.Error:
+            return 0
+
+    def close(self) -> None:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
\ No newline at end of file
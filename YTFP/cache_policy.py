@@ -0,0 +1,125 @@
+"""
+Yahoo!路線情報ライブラリのキャッシュポリシー
+
+このモジュールは、経路検索の日時に応じてキャッシュキーと有効期間を決定するポリシーを提供します。
+出発時刻を一定の間隔（例: 5分）に丸めてキャッシュキーを共有し、
+過去の日時の検索は長期間、「現在時刻」の検索は短期間だけキャッシュします。
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# Yahoo!路線情報の日時は日本時間
+JST = timezone(timedelta(hours=9), "JST")
+
+_DATE_RE = re.compile(r'^(\d{4})(\d{2})(\d{2})$')
+_TIME_RE = re.compile(r'^(\d{1,2}):?(\d{2})$')
+_DEPARTURE_RE = re.compile(r'(\d{1,2}):(\d{2})')
+
+class RouteCachePolicy:
+    """経路検索の日時に応じたキャッシュキーと有効期間のポリシー"""
+
+    def __init__(self,
+                 bucket_minutes: int = 5,
+                 now_ttl: int = 60,
+                 past_ttl: int = 365 * 24 * 3600,
+                 future_ttl: Optional[int] = None,
+                 tz: timezone = JST):
+        """
+        Args:
+            bucket_minutes: 出発時刻を丸める間隔（分）。1以下の場合は丸めない
+            now_ttl: 日時を指定しない（現在時刻の）検索の有効期間（秒）
+            past_ttl: 過去の日時の検索の有効期間（秒）。時刻表は変わらないため長期間保持する
+            future_ttl: 未来の日時の検索の有効期間（秒）。Noneの場合はCacheManagerのttlを使用
+            tz: 日時の解釈に使用するタイムゾーン
+        """
+        self.bucket_minutes = bucket_minutes
+        self.now_ttl = now_ttl
+        self.past_ttl = past_ttl
+        self.future_ttl = future_ttl
+        self.tz = tz
+
+    def _now(self) -> datetime:
+        """現在時刻（テスト時に差し替え可能）"""
+        return datetime.now(self.tz)
+
+    def _parse(self, params: Dict[str, Any]) -> Tuple[Optional[datetime], bool, bool]:
+        """
+        パラメータの日付・時刻を解釈する
+
+        Returns:
+            (検索日時, 日付が指定されているか, 時刻が指定されているか)。解釈できない場合の日時はNone
+        """
+        date, time = params.get("date"), params.get("time")
+        now = self._now()
+        date_match = _DATE_RE.match(str(date)) if date else None
+        time_match = _TIME_RE.match(str(time)) if time else None
+        if (date and not date_match) or (time and not time_match):
+            return None, bool(date), bool(time)
+
+        year, month, day = (int(g) for g in date_match.groups()) if date_match else (now.year, now.month, now.day)
+        hour, minute = (int(g) for g in time_match.groups()) if time_match else (23, 59)
+        try:
+            return datetime(year, month, day, hour, minute, tzinfo=self.tz), bool(date), bool(time)
+        except ValueError:
+            return None, bool(date), bool(time)
+
+    def normalize(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        キャッシュキーの生成に使用するパラメータを返す
+
+        出発時刻はbucket_minutes単位に切り捨てる。丸めはキャッシュキーにだけ使い、APIへのリクエストには
+        指定された時刻をそのまま使う（枠を共有した結果はfilter_routesで指定時刻より前の経路を除く）。
+        日付なしで時刻のみ指定された検索は「今日」を意味するため、日付を補ってキーが日をまたいで共有されないようにする。
+        """
+        when, has_date, has_time = self._parse(params)
+        if when is None or not has_time:
+            return dict(params)
+
+        normalized = dict(params)
+        if self.bucket_minutes > 1:
+            minute = when.minute - when.minute % self.bucket_minutes
+            when = when.replace(minute=minute)
+        normalized["time"] = when.strftime("%H%M")
+        if not has_date:
+            normalized["date"] = when.strftime("%Y%m%d")
+        return normalized
+
+    def filter_routes(self, routes: List[Dict[str, Any]], params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        同じ枠のキャッシュを共有した検索の結果から、指定した時刻より前に出発する経路を除く
+
+        キャッシュには枠内の別の時刻で検索した結果が入っていることがあるため、
+        枠の先頭から指定した時刻までの間に出発する経路を取り除く。
+        出発時刻を解釈できない経路や、枠の外（日をまたいだ深夜の便など）の経路はそのまま残す。
+        """
+        when, _, has_time = self._parse(params)
+        if when is None or not has_time or self.bucket_minutes <= 1:
+            return routes
+        requested = when.hour * 60 + when.minute
+        result = []
+        for route in routes:
+            match = _DEPARTURE_RE.search(str(route.get("departure_time") or ""))
+            if match:
+                departure = int(match.group(1)) * 60 + int(match.group(2))
+                if 0 < (requested - departure) % (24 * 60) < self.bucket_minutes:
+                    continue
+            result.append(route)
+        return result if len(result) != len(routes) else routes
+
+    def ttl_for(self, params: Dict[str, Any]) -> Optional[int]:
+        """
+        検索の日時からキャッシュの有効期間（秒）を決定する
+
+        Returns:
+            有効期間。Noneの場合はCacheManagerのデフォルトを使用する
+        """
+        when, has_date, has_time = self._parse(params)
+        if not has_date and not has_time:
+            return self.now_ttl
+        if when is None:
+            return self.future_ttl
+        if when < self._now():
+            return self.past_ttl
+        return self.future_ttl
\ No newline at end of file
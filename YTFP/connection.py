@@ -0,0 +1,80 @@
+"""
+Yahoo!路線情報ライブラリの接続設定
+
+このモジュールは、同期クライアント（requests）と非同期クライアント（aiohttp）の
+コネクションプール・キープアライブ・DNSキャッシュ・タイムアウトの設定を扱います。
+クライアントには connection_config として辞書で指定します。
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .errors import ConfigurationError
+
+DEFAULT_CONNECTION_CONFIG: Dict[str, Any] = {
+    # requests (HTTPAdapter)
+    "pool_connections": 10,    # プールを保持するホスト数
+    "pool_maxsize": 10,        # ホストごとに保持する接続数
+    "pool_block": False,       # プールが満杯のとき空きを待つかどうか
+    # aiohttp (TCPConnector)
+    "limit": 100,              # 同時接続数の上限（0は無制限）
+    "limit_per_host": 0,       # ホストごとの同時接続数の上限（0は無制限）
+    "ttl_dns_cache": 10,       # DNSキャッシュの有効期間（秒、Noneは無期限）
+    "keepalive_timeout": 15,   # 使用されていない接続を保持する時間（秒）
+    # 共通のタイムアウト（秒、Noneは無制限）
+    "connect_timeout": None,
+    "read_timeout": None,
+    "total_timeout": None,     # aiohttpのみ。リクエスト全体のタイムアウト
+}
+
+def resolve_connection_config(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """connection_configにデフォルト値を補い、未知のキーがあればConfigurationErrorを送出する"""
+    resolved = dict(DEFAULT_CONNECTION_CONFIG)
+    if config:
+        unknown = set(config) - set(DEFAULT_CONNECTION_CONFIG)
+        if unknown:
+            raise ConfigurationError(f"Unknown connection options: {', '.join(sorted(unknown))}")
+        resolved.update(config)
+    return resolved
+
+def request_timeout(config: Dict[str, Any]) -> Optional[Tuple[Optional[float], Optional[float]]]:
+    """requestsに渡すタイムアウト (connect, read) を返す（どちらも未指定ならNone）"""
+    if config["connect_timeout"] is None and config["read_timeout"] is None:
+        return None
+    return (config["connect_timeout"], config["read_timeout"])
+
+def mount_adapters(session, config: Dict[str, Any]) -> None:
+    """プールサイズを設定したHTTPAdapterをrequests.Sessionに登録する"""
+    # 非同期クライアントだけを使う場合にrequestsを読み込まないよう、ここでインポートする
+    from requests.adapters import HTTPAdapter
+
+    adapter = HTTPAdapter(
+        pool_connections=config["pool_connections"],
+        pool_maxsize=config["pool_maxsize"],
+        pool_block=config["pool_block"],
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+def create_client_session(headers: Dict[str, str], config: Dict[str, Any],
+                          trace_configs: Optional[List[Any]] = None):
+    """TCPConnectorとタイムアウトを設定したaiohttp.ClientSessionを作成する"""
+    # 同期クライアントだけを使う場合にaiohttpを読み込まないよう、ここでインポートする
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(
+        limit=config["limit"],
+        limit_per_host=config["limit_per_host"],
+        ttl_dns_cache=config["ttl_dns_cache"],
+        use_dns_cache=config["ttl_dns_cache"] != 0,
+        keepalive_timeout=config["keepalive_timeout"],
+    )
+    kwargs: Dict[str, Any] = {"headers": headers, "connector": connector}
+    if trace_configs:
+        kwargs["trace_configs"] = trace_configs
+    if any(config[k] is not None for k in ("connect_timeout", "read_timeout", "total_timeout")):
+        kwargs["timeout"] = aiohttp.ClientTimeout(
+            total=config["total_timeout"],
+            sock_connect=config["connect_timeout"],
+            sock_read=config["read_timeout"],
+        )
+    return aiohttp.ClientSession(**kwargs)
\ No newline at end of file
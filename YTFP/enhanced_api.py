@@ -7,17 +7,37 @@ Yahoo!路線情報ライブラリの拡張API
 
 import hashlib
 import json
-from typing import Dict, List, Any, Optional, Union
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Union
 
 from .api import YahooTransitAPI
-from .cache import CacheManager
+from .cache import CacheManager, CACHE_MISS, CACHE_FRESH
+from .cache_policy import RouteCachePolicy
 from .errors import RequestError, ParseError, YahooTransitError
+from .instrumentation import EVENT_CACHE_LOOKUP, EVENT_CACHE_STORE, Instrumentation
 from .logger import logger
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .route_graph import RouteGraph
+from .singleflight import SingleFlight
+from .station_index import StationIndex
 
 class EnhancedYahooTransitAPI(YahooTransitAPI):
     """キャッシング機能を持つYahoo!路線情報APIクライアント"""
     
-    def __init__(self, headers=None, cache_config=None):
+    # バックグラウンド更新に使用するスレッド数
+    REFRESH_WORKERS = 4
+    
+    def __init__(self, headers=None, cache_config=None, parser_config=None,
+                 cache_policy: Optional[RouteCachePolicy] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 connection_config: Optional[Dict[str, Any]] = None,
+                 station_index: Optional[StationIndex] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 route_graph: Optional[RouteGraph] = None):
         """
         拡張APIクライアントの初期化
         
@@ -27,8 +47,21 @@ class EnhancedYahooTransitAPI(YahooTransitAPI):
                 - None: デフォルト設定でキャッシングを有効化
                 - False: キャッシングを無効化
                 - dict: キャッシュの詳細設定（CacheManagerのパラメータ）
+            parser_config: extract_routes_from_htmlに渡すパーサー設定
+            cache_policy: 経路検索の日時に応じてキャッシュキーと有効期間を決めるポリシー
+            rate_limiter: リクエスト頻度を制御するレートリミッター（キャッシュヒット時は消費しない）
+            retry_policy: 一時的なエラーの再試行ポリシー
+            connection_config: コネクションプールとタイムアウトの設定
+            station_index: 駅名候補をローカルで検索するインデックス（キャッシュより先に参照する）
+            instrumentation: 処理時間の計測イベントの通知先（キャッシュの参照・保存も計測する）
+            route_graph: 検索した経路を追加する経路グラフ（キャッシュヒット時は追加しない）
         """
-        super().__init__(headers)
+        super().__init__(headers, parser_config=parser_config, rate_limiter=rate_limiter,
+                         retry_policy=retry_policy,
+                         connection_config=connection_config,
+                         station_index=station_index,
+                         instrumentation=instrumentation,
+                         route_graph=route_graph)
         
         # キャッシュを無効化したい場合はcache_config=Falseを指定
         if cache_config is not False:
@@ -37,6 +70,17 @@ class EnhancedYahooTransitAPI(YahooTransitAPI):
         else:
             self.cache = None
             logger.info("キャッシングが無効化されました")
+        
+        self.cache_policy = cache_policy
+        
+        # 同一キャッシュキーの同時リクエストを1回にまとめる
+        self._inflight = SingleFlight()
+        
+        # 期限切れ・期限間近のエントリのバックグラウンド更新
+        self._refresh_lock = threading.Lock()
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+        self._pending_refreshes: Dict[str, Future] = {}
+        self._closed = False
     
     def _get_cache_key(self, method: str, **params) -> str:
         """パラメータからキャッシュキーを生成"""
@@ -44,6 +88,64 @@ class EnhancedYahooTransitAPI(YahooTransitAPI):
         param_str = json.dumps(params, sort_keys=True)
         return f"{method}:{hashlib.md5(param_str.encode()).hexdigest()}"
     
+    def _cache_lookup(self, cache_key: str) -> Tuple[str, Any]:
+        """キャッシュを参照し、所要時間を計測イベントとして通知"""
+        with self.instrumentation.timer(EVENT_CACHE_LOOKUP) as labels:
+            state, value = self.cache.lookup(cache_key)
+            labels["result"] = state
+        return state, value
+    
+    def _cache_store(self, cache_key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """キャッシュに保存し、所要時間を計測イベントとして通知"""
+        with self.instrumentation.timer(EVENT_CACHE_STORE):
+            self.cache.set(cache_key, value, ttl)
+    
+    def _schedule_refresh(self, cache_key: str, fetch, *args) -> None:
+        """
+        キャッシュエントリをバックグラウンドで更新
+
+        同じキーの更新が予定済みの場合やクライアントを閉じた後は何もしない。
+        """
+        with self._refresh_lock:
+            if self._closed or cache_key in self._pending_refreshes:
+                return
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=self.REFRESH_WORKERS, thread_name_prefix="yahoosc-refresh"
+                )
+            self._pending_refreshes[cache_key] = self._refresh_executor.submit(self._refresh, cache_key, fetch, *args)
+    
+    def _refresh(self, cache_key: str, fetch, *args) -> None:
+        """バックグラウンド更新の本体"""
+        try:
+            self._inflight.do(cache_key, fetch, *args)
+        except Exception as e:
+            logger.warning("バックグラウンド更新エラー: %s", e)
+        finally:
+            with self._refresh_lock:
+                self._pending_refreshes.pop(cache_key, None)
+    
+    def _fetch_station_suggestions(self, cache_key: str, station_query: str) -> Dict[str, Any]:
+        """APIから駅名候補を取得してキャッシュに保存"""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("APIリクエスト: 駅名候補取得 '%s'", station_query)
+        result = super().get_station_suggestions(station_query)
+        self._cache_store(cache_key, result)
+        return result
+    
+    def _filter_routes(self, routes: List[Dict[str, Any]], kwargs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """キャッシュの枠を共有した結果から、指定した時刻より前に出発する経路を除く"""
+        return self.cache_policy.filter_routes(routes, kwargs) if self.cache_policy else routes
+    
+    def _fetch_routes(self, cache_key: str, from_station: str, to_station: str,
+                      kwargs: Dict[str, Any], ttl: Optional[int] = None) -> List[Dict[str, Any]]:
+        """APIから経路を検索してキャッシュに保存"""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("APIリクエスト: 経路検索 '%s' -> '%s'", from_station, to_station)
+        result = super().search_routes(from_station, to_station, **kwargs)
+        self._cache_store(cache_key, result, ttl)
+        return result
+    
     def get_station_suggestions(self, station_query: str) -> Dict[str, Any]:
         """
         駅名候補を取得（キャッシング対応）
@@ -58,29 +160,34 @@ class EnhancedYahooTransitAPI(YahooTransitAPI):
             RequestError: HTTPリクエストでエラーが発生した場合
             YahooTransitError: その他のエラーが発生した場合
         """
+        # 駅名インデックスで応答できる入力であればAPIもキャッシュも使わずに返す
+        if self.station_index is not None:
+            local_result = self.station_index.suggest(station_query)
+            if local_result is not None:
+                return local_result
+        
         # キャッシングが無効なら通常の処理
         if not self.cache:
             return super().get_station_suggestions(station_query)
         
         # キャッシュキーの生成
         cache_key = self._get_cache_key("suggestions", query=station_query)
-        cached_result = self.cache.get(cache_key)
+        state, cached_result = self._cache_lookup(cache_key)
         
         # キャッシュヒット時はキャッシュから返す
-        if cached_result is not None:
-            logger.debug(f"キャッシュヒット: {cache_key}")
+        # 期限切れ（stale_ttl内）・期限間近（refresh_ahead）の場合はバックグラウンドで更新する
+        if state != CACHE_MISS:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("キャッシュヒット (%s): %s", state, cache_key)
+            if state != CACHE_FRESH:
+                self._schedule_refresh(cache_key, self._fetch_station_suggestions, cache_key, station_query)
             return cached_result
         
         try:
-            # 通常のAPIリクエスト
-            logger.debug(f"APIリクエスト: 駅名候補取得 '{station_query}'")
-            result = super().get_station_suggestions(station_query)
-            
-            # 結果をキャッシュに保存
-            self.cache.set(cache_key, result)
-            return result
+            # 同じキーのリクエストが実行中であればその結果を待つ
+            return self._inflight.do(cache_key, self._fetch_station_suggestions, cache_key, station_query)
         except Exception as e:
-            logger.error(f"駅名候補取得エラー: {str(e)}")
+            logger.error("駅名候補取得エラー: %s", e)
             # 元の例外を保持して再送出
             raise
     
@@ -109,27 +216,49 @@ class EnhancedYahooTransitAPI(YahooTransitAPI):
         if not self.cache:
             return super().search_routes(from_station, to_station, **kwargs)
         
-        # キャッシュキーの生成
+        # キャッシュキーと有効期間の決定（ポリシーがあれば出発時刻を丸め、日時に応じたTTLを使用）
+        # APIへのリクエストには指定された時刻をそのまま使う
+        key_params = self.cache_policy.normalize(kwargs) if self.cache_policy else kwargs
+        ttl = self.cache_policy.ttl_for(kwargs) if self.cache_policy else None
         cache_key = self._get_cache_key("routes", 
                                      from_station=from_station, 
                                      to_station=to_station, 
-                                     **kwargs)
-        cached_result = self.cache.get(cache_key)
+                                     **key_params)
+        state, cached_result = self._cache_lookup(cache_key)
         
         # キャッシュヒット時はキャッシュから返す
-        if cached_result is not None:
-            logger.debug(f"キャッシュヒット: {cache_key}")
-            return cached_result
+        # 期限切れ（stale_ttl内）・期限間近（refresh_ahead）の場合はバックグラウンドで更新する
+        if state != CACHE_MISS:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("キャッシュヒット (%s): %s", state, cache_key)
+            if state != CACHE_FRESH:
+                self._schedule_refresh(cache_key, self._fetch_routes, cache_key, from_station, to_station, kwargs, ttl)
+            return self._filter_routes(cached_result, kwargs)
         
         try:
-            # 通常のAPIリクエスト
-            logger.debug(f"APIリクエスト: 経路検索 '{from_station}' -> '{to_station}'")
-            result = super().search_routes(from_station, to_station, **kwargs)
-            
-            # 結果をキャッシュに保存
-            self.cache.set(cache_key, result)
-            return result
+            # 同じキーのリクエストが実行中であればその結果を待つ
+            result = self._inflight.do(cache_key, self._fetch_routes, cache_key, from_station, to_station, kwargs, ttl)
+            return self._filter_routes(result, kwargs)
         except Exception as e:
-            logger.error(f"経路検索エラー: {str(e)}")
+            logger.error("経路検索エラー: %s", e)
             # 元の例外を保持して再送出
-            raise
\ No newline at end of file
+            raise
+    
+    def close(self):
+        """
+        バックグラウンド更新を終了してからセッションを閉じる
+
+        開始前の更新は取り消し、実行中の更新（HTTPリクエスト）は完了を待つ。
+        閉じた後はバックグラウンド更新を行わない。
+        """
+        with self._refresh_lock:
+            self._closed = True
+            executor, self._refresh_executor = self._refresh_executor, None
+            pending = list(self._pending_refreshes.items())
+        for cache_key, future in pending:
+            if future.cancel():
+                with self._refresh_lock:
+                    self._pending_refreshes.pop(cache_key, None)
+        if executor is not None:
+            executor.shutdown(wait=True)
+        super().close()
\ No newline at end of file
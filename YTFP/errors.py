@@ -14,7 +14,11 @@ class RequestError(YahooTransitError):
     def __init__(self, status_code, message):
         self.status_code = status_code
         self.message = message
-        super().__init__(f"HTTP Error {status_code}: {message}")
+        if status_code is None:
+            # 接続エラー・タイムアウトなどレスポンスを受信できなかった場合
+            super().__init__(f"Request Error: {message}")
+        else:
+            super().__init__(f"HTTP Error {status_code}: {message}")
 
 class ParseError(YahooTransitError):
     """HTML解析エラー"""
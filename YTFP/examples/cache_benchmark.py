@@ -0,0 +1,80 @@
+"""
+キャッシュ保存形式のベンチマーク
+
+保存済みの検索結果ページから抽出した経路リストを、シリアライザと圧縮方式の組み合わせごとに
+キャッシュへ保存し、1エントリあたりのディスク使用量と読み込み時間を計測します。
+ページを指定しない場合は YTFP/benchmarks/data の同梱ページを使用します。
+
+使い方:
+    python cache_benchmark.py [result1.html result2.html ...] [--repeat 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# ライブラリをインポートするためのパスを追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from YTFP.benchmarks.fixtures import RESULT_PAGE
+from YTFP.cache import CacheManager
+from YTFP.errors import ConfigurationError
+from YTFP.parser import extract_routes_from_html
+
+SERIALIZERS = ["json", "pickle", "msgpack"]
+COMPRESSIONS = [None, "zlib", "zstd"]
+
+def bench_format(payloads, backend, serializer, compression, repeat):
+    """指定した形式での (1エントリあたりのバイト数, 1エントリあたりの読み込み秒数) を返す"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = CacheManager(cache_dir=cache_dir, backend=backend,
+                             serializer=serializer, compression=compression)
+        keys = [f"routes:{i}" for i in range(len(payloads))]
+        for key, routes in zip(keys, payloads):
+            cache.set(key, routes)
+
+        if backend == "sqlite":
+            # SQLiteファイルのサイズはページ単位で増えるため、格納データのバイト数を集計する
+            disk_bytes = cache.backend._connect().execute("SELECT SUM(LENGTH(data)) FROM cache").fetchone()[0]
+        else:
+            disk_bytes = sum(
+                os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir)
+            )
+
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            for key in keys:
+                cache.memory_cache.clear()  # 永続キャッシュからの読み込みを計測する
+                cache.get(key)
+        load_time = (time.perf_counter() - start_time) / (repeat * len(keys))
+        cache.close()
+    return disk_bytes / len(payloads), load_time
+
+def main():
+    parser = argparse.ArgumentParser(description="キャッシュ保存形式のベンチマーク")
+    parser.add_argument("pages", nargs="*", help="保存済みの検索結果ページ (HTML)。省略時は同梱のページ")
+    parser.add_argument("--repeat", type=int, default=200, help="読み込みの繰り返し回数")
+    parser.add_argument("--backend", default="file", choices=["file", "sqlite"], help="永続キャッシュのバックエンド")
+    args = parser.parse_args()
+
+    payloads = []
+    for path in args.pages or [RESULT_PAGE]:
+        with open(path, encoding="utf-8") as f:
+            payloads.append(extract_routes_from_html(f.read()))
+
+    print(f"バックエンド: {args.backend}, エントリ数: {len(payloads)}")
+    print(f"{'形式':<20} {'バイト/エントリ':>14} {'読み込み/エントリ':>16}")
+    for serializer in SERIALIZERS:
+        for compression in COMPRESSIONS:
+            name = f"{serializer}+{compression or 'none'}"
+            try:
+                size, load_time = bench_format(payloads, args.backend, serializer, compression, args.repeat)
+            except ConfigurationError as e:
+                print(f"{name:<20} スキップ ({e})")
+                continue
+            print(f"{name:<20} {size:>14.0f} {load_time * 1e6:>14.1f}µs")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
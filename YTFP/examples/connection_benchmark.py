@@ -0,0 +1,100 @@
+"""
+コネクションプール設定のベンチマーク
+
+ローカルに起動したスタブサーバーに対して、デフォルト設定とconnection_configで調整した設定の
+同期クライアント・非同期クライアントで search_many を実行し、スループットを比較します。
+
+使い方:
+    python connection_benchmark.py [result.html] [--requests 400] [--concurrency 32] [--delay 0.01]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+
+from aiohttp import web
+
+# ライブラリをインポートするためのパスを追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from YTFP.api import YahooTransitAPI
+from YTFP.async_api import AsyncYahooTransitAPI
+
+EMPTY_PAGE = '<html><body><div id="srline" class="elmRouteDetail"><div id="route01"></div></div></body></html>'
+
+def start_stub_server(html, delay):
+    """検索結果ページを返すスタブサーバーを別スレッドで起動し、ベースURLを返す"""
+    async def search(request):
+        if delay:
+            await asyncio.sleep(delay)
+        return web.Response(text=html, content_type="text/html")
+
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_get("/search/result", search)
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f"http://127.0.0.1:{port}"
+
+def bench_sync(base_url, queries, concurrency, connection_config):
+    """同期クライアントで全クエリを実行し、1秒あたりのリクエスト数を返す"""
+    api = YahooTransitAPI(connection_config=connection_config)
+    api.SEARCH_URL = f"{base_url}/search/result"
+    start_time = time.perf_counter()
+    for result in api.search_many(queries, concurrency=concurrency):
+        if not result.ok:
+            raise result.error
+    elapsed = time.perf_counter() - start_time
+    api.close()
+    return len(queries) / elapsed
+
+async def bench_async(base_url, queries, concurrency, connection_config):
+    """非同期クライアントで全クエリを実行し、1秒あたりのリクエスト数を返す"""
+    async with AsyncYahooTransitAPI(connection_config=connection_config) as api:
+        api.SEARCH_URL = f"{base_url}/search/result"
+        start_time = time.perf_counter()
+        async for result in api.search_many(queries, concurrency=concurrency):
+            if not result.ok:
+                raise result.error
+        return len(queries) / (time.perf_counter() - start_time)
+
+def main():
+    parser = argparse.ArgumentParser(description="コネクションプール設定のベンチマーク")
+    parser.add_argument("html", nargs="?", help="スタブサーバーが返す検索結果ページ")
+    parser.add_argument("--requests", type=int, default=400, help="リクエスト数")
+    parser.add_argument("--concurrency", type=int, default=32, help="同時実行数")
+    parser.add_argument("--delay", type=float, default=0.01, help="スタブサーバーの応答遅延（秒）")
+    args = parser.parse_args()
+
+    html = EMPTY_PAGE
+    if args.html:
+        with open(args.html, encoding="utf-8") as f:
+            html = f.read()
+
+    # デフォルト設定ではプール満杯の警告が大量に出るため抑制する
+    logging.getLogger("urllib3.connectionpool").setLevel(logging.ERROR)
+
+    base_url = start_stub_server(html, args.delay)
+    queries = [(f"駅{i}", "東京") for i in range(args.requests)]
+    tuned_sync = {"pool_maxsize": args.concurrency, "connect_timeout": 3, "read_timeout": 10}
+    tuned_async = {"limit": args.concurrency, "limit_per_host": args.concurrency,
+                   "ttl_dns_cache": 300, "keepalive_timeout": 30, "total_timeout": 30}
+
+    print(f"{'client':<8} {'config':<8} {'req/s':>10}")
+    for label, config in (("default", None), ("tuned", tuned_sync)):
+        rate = bench_sync(base_url, queries, args.concurrency, config)
+        print(f"{'sync':<8} {label:<8} {rate:>10.1f}")
+    for label, config in (("default", None), ("tuned", tuned_async)):
+        rate = asyncio.run(bench_async(base_url, queries, args.concurrency, config))
+        print(f"{'async':<8} {label:<8} {rate:>10.1f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
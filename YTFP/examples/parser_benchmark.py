@@ -0,0 +1,73 @@
+"""
+HTMLパーサーのマイクロベンチマーク
+
+保存済みの検索結果ページを使用して、パーサーエンジンと解析オプションごとに
+1ページあたり・1ルートあたりの解析時間を計測します。
+ページを指定しない場合は YTFP/benchmarks/data の同梱ページを使用します。
+
+使い方:
+    python parser_benchmark.py [result1.html result2.html ...] [--repeat 20]
+"""
+
+import argparse
+import sys
+import os
+import time
+
+# ライブラリをインポートするためのパスを追加
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from YTFP.parser import PARSER_ENGINES, extract_routes_from_html, extract_route_info, _make_soup
+from YTFP.errors import ConfigurationError
+from YTFP.benchmarks.fixtures import RESULT_PAGE
+
+def bench_page(html, repeat, **parser_options):
+    """ページ全体の解析時間（秒）とルート数を返す"""
+    routes = extract_routes_from_html(html, **parser_options)
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        extract_routes_from_html(html, **parser_options)
+    return (time.perf_counter() - start_time) / repeat, len(routes)
+
+def bench_route_info(html, repeat, engine):
+    """ツリー構築を除いたextract_route_info単体の1ルートあたりの時間（秒）を返す"""
+    container = _make_soup(html, engine).find('div', id='srline', class_='elmRouteDetail')
+    if not container:
+        return None
+    route_divs = container.find_all('div', recursive=False)
+    if not route_divs:
+        return None
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for route_div in route_divs:
+            extract_route_info(route_div)
+    return (time.perf_counter() - start_time) / (repeat * len(route_divs))
+
+def main():
+    parser = argparse.ArgumentParser(description="HTMLパーサーのベンチマーク")
+    parser.add_argument("pages", nargs="*", help="保存済みの検索結果ページ (HTML)。省略時は同梱のページ")
+    parser.add_argument("--repeat", type=int, default=20, help="各計測の繰り返し回数")
+    args = parser.parse_args()
+
+    for path in args.pages or [RESULT_PAGE]:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        print(f"===== {os.path.basename(path)} ({len(html) / 1024:.0f} KiB) =====")
+
+        for engine in PARSER_ENGINES:
+            try:
+                route_cost = bench_route_info(html, args.repeat, engine)
+            except ConfigurationError as e:
+                print(f"  {engine}: スキップ ({e})")
+                continue
+            if route_cost is not None:
+                print(f"  {engine:<5} extract_route_info: {route_cost * 1000:.3f}ms/ルート")
+
+            for scoped in (False, True):
+                page_cost, route_count = bench_page(html, args.repeat, engine=engine, scoped=scoped, prefer_json=False)
+                per_route = page_cost / route_count if route_count else 0.0
+                print(f"  {engine:<5} scoped={scoped!s:<5}: {page_cost * 1000:.2f}ms/ページ, "
+                      f"{per_route * 1000:.3f}ms/ルート ({route_count}ルート)")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
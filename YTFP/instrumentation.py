@@ -0,0 +1,278 @@
+"""
+Yahoo!路線情報ライブラリの計測機能
+
+このモジュールは、リクエストごとの処理時間（DNS解決、接続、最初のバイトまでの時間、本文の受信、
+HTML解析、キャッシュの参照・保存）をイベントとして通知する仕組みと、
+イベントを集計するヒストグラム、Prometheusテキスト形式・StatsDへの出力機能を提供します。
+"""
+
+import bisect
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# イベント名
+EVENT_DNS = "dns"                    # DNS解決（非同期クライアントのみ）
+EVENT_CONNECT = "connect"            # 接続の確立（非同期クライアントのみ）
+EVENT_TTFB = "ttfb"                  # リクエスト送信からレスポンスヘッダー受信まで
+EVENT_DOWNLOAD = "download"          # レスポンス本文の受信
+EVENT_REQUEST = "request"            # 1回のHTTPリクエスト全体（再試行は別々に数える）
+EVENT_PARSE = "parse"                # HTMLの解析
+EVENT_CACHE_LOOKUP = "cache_lookup"  # キャッシュの参照（result: miss / fresh / refresh / stale）
+EVENT_CACHE_STORE = "cache_store"    # キャッシュへの保存
+
+# ヒストグラムのデフォルトのバケット境界（秒）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class TimingEvent(NamedTuple):
+    """計測イベント"""
+    name: str                 # イベント名（EVENT_*）
+    duration: float           # 所要時間（秒）
+    labels: Dict[str, Any]    # endpoint, status, engine, result など
+
+class _Timer:
+    """with文で囲んだ処理の時間を計測してイベントを通知する"""
+
+    __slots__ = ("_instrumentation", "_name", "labels", "_start")
+
+    def __init__(self, instrumentation: "Instrumentation", name: str, labels: Dict[str, Any]):
+        self._instrumentation = instrumentation
+        self._name = name
+        self.labels = labels
+
+    def __enter__(self) -> Dict[str, Any]:
+        self._start = time.perf_counter()
+        return self.labels
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is not None:
+            self.labels.setdefault("error", exc_type.__name__)
+        self._instrumentation.emit(self._name, time.perf_counter() - self._start, **self.labels)
+
+class Instrumentation:
+    """計測イベントの通知先（コールバック）を管理するクラス"""
+
+    def __init__(self, callbacks: Sequence[Callable[[TimingEvent], None]] = ()):
+        """
+        Args:
+            callbacks: TimingEventを受け取るコールバック（MetricsAggregator、StatsDExporterなど）
+        """
+        self._callbacks: Tuple[Callable[[TimingEvent], None], ...] = tuple(callbacks)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """通知先が登録されているかどうか"""
+        return bool(self._callbacks)
+
+    def subscribe(self, callback: Callable[[TimingEvent], None]) -> None:
+        """通知先を追加"""
+        with self._lock:
+            self._callbacks = self._callbacks + (callback,)
+
+    def unsubscribe(self, callback: Callable[[TimingEvent], None]) -> None:
+        """通知先を削除"""
+        with self._lock:
+            self._callbacks = tuple(c for c in self._callbacks if c is not callback)
+
+    def emit(self, name: str, duration: float, **labels: Any) -> None:
+        """イベントを通知（コールバックの例外は無視する）"""
+        callbacks = self._callbacks
+        if not callbacks:
+            return
+        event = TimingEvent(name, duration, labels)
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception:
+                pass
+
+    def timer(self, name: str, **labels: Any) -> _Timer:
+        """
+        with文で囲んだ処理の時間を計測するコンテキストマネージャーを返す
+
+        with文の値はラベルの辞書で、処理中にラベルを追加できる。
+        """
+        return _Timer(self, name, labels)
+
+class Histogram:
+    """累積バケット方式のヒストグラム"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 最後は+Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """(上限, その値以下の観測数) のリストを返す（最後の上限はinf）"""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """バケットの上限からq分位点（0-1）を概算する"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return float("inf")
+
+class MetricsAggregator:
+    """イベントをイベント名とラベルごとのヒストグラムに集計する通知先"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 label_names: Sequence[str] = ("endpoint", "status", "engine", "result", "error")):
+        """
+        Args:
+            buckets: ヒストグラムのバケット境界（秒）
+            label_names: 集計に使用するラベル名（それ以外のラベルは無視する）
+        """
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: TimingEvent) -> None:
+        labels = tuple((k, str(event.labels[k])) for k in self.label_names if event.labels.get(k) is not None)
+        key = (event.name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(event.duration)
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """集計結果を {イベント名: [{"labels", "count", "sum", "p50", "p95", "p99"}, ...]} で返す"""
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                result.setdefault(name, []).append({
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "p50": histogram.quantile(0.5),
+                    "p95": histogram.quantile(0.95),
+                    "p99": histogram.quantile(0.99),
+                })
+        return result
+
+    def reset(self) -> None:
+        """集計結果を破棄"""
+        with self._lock:
+            self._histograms.clear()
+
+    def to_prometheus(self, prefix: str = "yahoosc") -> str:
+        """集計結果をPrometheusのテキスト形式で返す"""
+        def format_labels(labels, le=None):
+            pairs = [f'{k}="{_escape_label(v)}"' for k, v in labels]
+            if le is not None:
+                pairs.append(f'le="{le}"')
+            return "{" + ",".join(pairs) + "}" if pairs else ""
+
+        lines = []
+        current = None
+        with self._lock:
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                metric = f"{prefix}_{name}_seconds"
+                if metric != current:
+                    lines.append(f"# TYPE {metric} histogram")
+                    current = metric
+                for bound, total in histogram.cumulative():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{metric}_bucket{format_labels(labels, le)} {total}")
+                lines.append(f"{metric}_sum{format_labels(labels)} {histogram.sum}")
+                lines.append(f"{metric}_count{format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class StatsDExporter:
+    """イベントをStatsDのタイマー（ミリ秒）としてUDPで送信する通知先"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8125,
+                 prefix: str = "yahoosc", tags: bool = False):
+        """
+        Args:
+            host: StatsDサーバーのホスト
+            port: StatsDサーバーのポート
+            prefix: メトリクス名の接頭辞
+            tags: Trueの場合はラベルをDogStatsD形式のタグ (|#key:value) として送信する。
+                Falseの場合はラベルを使用しない
+        """
+        self.address = (host, port)
+        self.prefix = prefix
+        self.tags = tags
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def format(self, event: TimingEvent) -> str:
+        """イベントをStatsDの1行に変換"""
+        line = f"{self.prefix}.{event.name}:{event.duration * 1000:.3f}|ms"
+        if self.tags and event.labels:
+            line += "|#" + ",".join(f"{k}:{v}" for k, v in event.labels.items() if v is not None)
+        return line
+
+    def __call__(self, event: TimingEvent) -> None:
+        try:
+            self._socket.sendto(self.format(event).encode("utf-8"), self.address)
+        except OSError:
+            pass  # 計測のためにリクエストを失敗させない
+
+    def close(self) -> None:
+        self._socket.close()
+
+def create_trace_config(instrumentation: Instrumentation):
+    """
+    aiohttpのTraceConfigを作成し、DNS解決・接続・最初のバイトまでの時間をイベントとして通知する
+
+    リクエスト時に trace_request_ctx としてラベルの辞書を渡すと、イベントのラベルに使用される。
+    """
+    import aiohttp
+
+    def labels_of(trace_config_ctx) -> Dict[str, Any]:
+        return dict(getattr(trace_config_ctx, "trace_request_ctx", None) or {})
+
+    async def on_request_start(session, trace_config_ctx, params):
+        trace_config_ctx.request_start = time.perf_counter()
+
+    async def on_dns_start(session, trace_config_ctx, params):
+        trace_config_ctx.dns_start = time.perf_counter()
+
+    async def on_dns_end(session, trace_config_ctx, params):
+        instrumentation.emit(EVENT_DNS, time.perf_counter() - trace_config_ctx.dns_start,
+                             **labels_of(trace_config_ctx))
+
+    async def on_connect_start(session, trace_config_ctx, params):
+        trace_config_ctx.connect_start = time.perf_counter()
+
+    async def on_connect_end(session, trace_config_ctx, params):
+        instrumentation.emit(EVENT_CONNECT, time.perf_counter() - trace_config_ctx.connect_start,
+                             **labels_of(trace_config_ctx))
+
+    async def on_request_end(session, trace_config_ctx, params):
+        instrumentation.emit(EVENT_TTFB, time.perf_counter() - trace_config_ctx.request_start,
+                             status=params.response.status, **labels_of(trace_config_ctx))
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_dns_resolvehost_start.append(on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_end)
+    trace_config.on_connection_create_start.append(on_connect_start)
+    trace_config.on_connection_create_end.append(on_connect_end)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
\ No newline at end of file
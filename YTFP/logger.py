@@ -4,9 +4,13 @@ Yahoo!路線情報ライブラリのロギング機能
 このモジュールは、ライブラリ内でのロギングを一元管理するための機能を提供します。
 """
 
+import atexit
 import logging
 import os
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
 class Logger:
@@ -15,38 +19,80 @@ class Logger:
     _instance = None
     
     @classmethod
-    def get_instance(cls, level=None, log_file=None):
+    def get_instance(cls, level=None, log_file=None, use_queue=None):
         """シングルトンインスタンスを取得"""
         if cls._instance is None:
-            cls._instance = cls(level, log_file)
+            cls._instance = cls(level, log_file, use_queue)
         return cls._instance
     
-    def __init__(self, level=None, log_file=None):
-        """ロガーの初期化"""
-        self.logger = logging.getLogger("yahoosc")
+    def __init__(self, level=None, log_file=None, use_queue=None):
+        """
+        ロガーの初期化
+        
+        use_queue=True（または環境変数 YAHOOSC_LOG_QUEUE=1）の場合は、
+        ハンドラへの書き込みを別スレッドで行う（enable_queue() を参照）
+        
+        ハンドラの設定はインポート時ではなく、最初にロガーを使用したときに行う
+        """
+        self._logger = logging.getLogger("yahoosc")
+        self._level = level
+        self._log_file = log_file
+        self._use_queue = use_queue
+        self._configured = False
+        self._configure_lock = threading.Lock()
+        self._queue_handler = None
+        self._listener = None
+    
+    @property
+    def logger(self):
+        """設定済みのlogging.Loggerを取得"""
+        if not self._configured:
+            self._configure()
+        return self._logger
+    
+    def _configure(self):
+        """ログレベルとハンドラを設定する（最初に一度だけ）"""
+        with self._configure_lock:
+            if self._configured:
+                return
+            self._configured = True
+            self._setup_handlers()
+    
+    def _setup_handlers(self):
+        use_queue = self._use_queue
+        if use_queue is None:
+            use_queue = os.environ.get("YAHOOSC_LOG_QUEUE", "") not in ("", "0")
         
         # すでにハンドラがあれば追加しない
-        if self.logger.handlers:
+        if self._logger.handlers:
+            if use_queue:
+                self.enable_queue()
             return
             
-        # ログレベルの設定
-        log_level = self._get_log_level(level)
-        self.logger.setLevel(log_level)
+        # ログレベルの設定（アプリケーションが先に設定している場合はそれを優先）
+        log_level = self._get_log_level(self._level)
+        if self._level is not None or self._logger.level == logging.NOTSET:
+            self._logger.setLevel(log_level)
+        else:
+            log_level = self._logger.level
         
         # コンソールへの出力
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(log_level)
         console_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         console_handler.setFormatter(console_formatter)
-        self.logger.addHandler(console_handler)
+        self._logger.addHandler(console_handler)
         
         # ファイルへの出力（指定がある場合）
-        if log_file:
-            file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        if self._log_file:
+            file_handler = logging.FileHandler(self._log_file, encoding='utf-8')
             file_handler.setLevel(log_level)
             file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
             file_handler.setFormatter(file_formatter)
-            self.logger.addHandler(file_handler)
+            self._logger.addHandler(file_handler)
+        
+        if use_queue:
+            self.enable_queue()
     
     def _get_log_level(self, level=None):
         """ログレベルを取得（環境変数からも取得可能）"""
@@ -67,25 +113,60 @@ class Logger:
         else:
             return logging.WARNING  # デフォルト
     
-    def debug(self, message):
+    def isEnabledFor(self, level):
+        """指定したレベルのログが出力されるかどうか（頻繁に呼ばれる箇所でのガードに使用する）"""
+        return self.logger.isEnabledFor(level)
+    
+    # 引数は logging と同じ %形式で渡す（例: logger.debug("キャッシュヒット: %s", key)）。
+    # メッセージの組み立てはログが実際に出力されるときまで遅延される。
+    def debug(self, message, *args, **kwargs):
         """デバッグレベルのログを出力"""
-        self.logger.debug(message)
+        self.logger.debug(message, *args, **kwargs)
     
-    def info(self, message):
+    def info(self, message, *args, **kwargs):
         """情報レベルのログを出力"""
-        self.logger.info(message)
+        self.logger.info(message, *args, **kwargs)
     
-    def warning(self, message):
+    def warning(self, message, *args, **kwargs):
         """警告レベルのログを出力"""
-        self.logger.warning(message)
+        self.logger.warning(message, *args, **kwargs)
     
-    def error(self, message):
+    def error(self, message, *args, **kwargs):
         """エラーレベルのログを出力"""
-        self.logger.error(message)
+        self.logger.error(message, *args, **kwargs)
     
-    def critical(self, message):
+    def critical(self, message, *args, **kwargs):
         """致命的エラーレベルのログを出力"""
-        self.logger.critical(message)
+        self.logger.critical(message, *args, **kwargs)
+    
+    def enable_queue(self):
+        """
+        登録済みのハンドラをQueueListenerに移し、ログの書き込み（ファイル・コンソールへのI/O）を
+        別スレッドで行う。呼び出し元のスレッドはキューへの追加だけを行う。
+        """
+        if self._listener is not None:
+            return
+        handlers = list(self.logger.handlers)
+        log_queue = queue.SimpleQueue()
+        self._queue_handler = QueueHandler(log_queue)
+        for handler in handlers:
+            self.logger.removeHandler(handler)
+        self.logger.addHandler(self._queue_handler)
+        self._listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+        atexit.register(self.disable_queue)
+    
+    def disable_queue(self):
+        """キューに残ったログを書き込み、ハンドラを元に戻す"""
+        if self._listener is None:
+            return
+        self._listener.stop()
+        self.logger.removeHandler(self._queue_handler)
+        for handler in self._listener.handlers:
+            self.logger.addHandler(handler)
+        self._listener = None
+        self._queue_handler = None
+        atexit.unregister(self.disable_queue)
 
-# 使いやすいようにシングルトンインスタンスを事前に作成
+# 使いやすいようにシングルトンインスタンスを事前に作成（ハンドラの設定は最初の使用時）
 logger = Logger.get_instance()
\ No newline at end of file
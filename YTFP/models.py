@@ -0,0 +1,264 @@
+"""
+Yahoo!路線情報ライブラリのデータモデル
+
+このモジュールは、パーサーが返す経路情報の辞書をコンパクトに保持するためのクラスを提供します。
+各クラスは __slots__ を使用し、料金・時間・乗り換え回数などの数値は int として保持します。
+to_dict() で従来の辞書形式に戻すことができます。数値は標準の形式（「1,240円」「32分」など）に整形し、
+元の文字列が標準の形式と異なるフィールドだけ元の文字列を保持して、数値を変更していなければそれを返します。
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+_INT_RE = re.compile(r'\d[\d,]*')
+_HOURS_MINUTES_RE = re.compile(r'(?:(\d+)時間)?\s*(?:(\d+)分)?')
+
+# 元の辞書が持っていたキーの並び。同じ並びのタプルを共有してメモリを節約する
+_KEY_LAYOUTS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+def _intern_layout(keys) -> Tuple[str, ...]:
+    """キーの並びを共有タプルとして取得"""
+    layout = tuple(keys)
+    return _KEY_LAYOUTS.setdefault(layout, layout)
+
+def _parse_int(text: Optional[str]) -> Optional[int]:
+    """「540円」「1,240円」「1回」などの文字列から整数を取り出す"""
+    if text is None:
+        return None
+    match = _INT_RE.search(str(text))
+    return int(match.group(0).replace(',', '')) if match else None
+
+def _parse_minutes(text: Optional[str]) -> Optional[int]:
+    """「32分」「1時間5分」などの文字列を分単位の整数に変換する"""
+    if text is None:
+        return None
+    match = _HOURS_MINUTES_RE.search(str(text))
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes = match.groups()
+    return int(hours or 0) * 60 + int(minutes or 0)
+
+def _format_minutes(minutes: Optional[int]) -> Optional[str]:
+    """分単位の整数を従来の文字列形式に戻す"""
+    if minutes is None:
+        return None
+    if minutes >= 60:
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}時間{minutes}分" if minutes else f"{hours}時間"
+    return f"{minutes}分"
+
+def _format_unit(value: Optional[int], unit: str) -> Optional[str]:
+    """整数に単位を付けて従来の文字列形式に戻す"""
+    return None if value is None else f"{value:,}{unit}"
+
+# 標準の形式と異なる元の文字列: ((キー, 解析した数値, 元の文字列), ...)。ほとんどの経路ではNone
+_Sources = Optional[Tuple[Tuple[str, Optional[int], str], ...]]
+
+def _parse_source(sources: List[Tuple[str, Optional[int], str]], key: str, text: Any,
+                  parse, formatter) -> Optional[int]:
+    """文字列を数値に変換し、標準の形式に整形して元の文字列と異なる場合だけsourcesに記録する"""
+    value = parse(text)
+    if isinstance(text, str) and formatter(value) != text:
+        sources.append((key, value, text))
+    return value
+
+def _format_source(sources: _Sources, key: str, value: Optional[int], formatter) -> Optional[str]:
+    """元の文字列を保持していて数値が変更されていなければ元の文字列を、それ以外は整形した文字列を返す"""
+    if sources:
+        for source_key, source_value, text in sources:
+            if source_key == key and source_value == value:
+                return text
+    return formatter(value)
+
+def _format_yen(value: Optional[int]) -> Optional[str]:
+    return _format_unit(value, '円')
+
+class StationStop:
+    """経路上の駅ノード"""
+
+    __slots__ = ('type', 'time', 'station_name', '_layout')
+
+    def __init__(self, type: str, time: Optional[str] = None, station_name: Optional[str] = None):
+        self.type = type
+        self.time = time
+        self.station_name = station_name
+        self._layout = _intern_layout(('type', 'time', 'station_name'))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StationStop":
+        """パーサーが返す駅ノードの辞書から生成"""
+        stop = cls(data.get('type'), data.get('time'), data.get('station_name'))
+        stop._layout = _intern_layout(data)
+        return stop
+
+    def to_dict(self) -> Dict[str, Any]:
+        """従来の辞書形式に変換"""
+        return {key: getattr(self, key) for key in self._layout}
+
+    def __repr__(self):
+        return f"StationStop(type={self.type!r}, time={self.time!r}, station_name={self.station_name!r})"
+
+class TransportLeg:
+    """駅間の乗車区間"""
+
+    __slots__ = ('line_name', 'is_first_train', 'destination',
+                 'departure_platform', 'arrival_platform', 'fare_segment', '_layout', '_sources')
+
+    type = 'transport'
+
+    def __init__(self,
+                 line_name: Optional[str] = None,
+                 is_first_train: bool = False,
+                 destination: Optional[str] = None,
+                 departure_platform: Optional[str] = None,
+                 arrival_platform: Optional[str] = None,
+                 fare_segment: Optional[int] = None):
+        self.line_name = line_name
+        self.is_first_train = is_first_train
+        self.destination = destination
+        self.departure_platform = departure_platform
+        self.arrival_platform = arrival_platform
+        self.fare_segment = fare_segment  # 区間料金（円）
+        self._sources: _Sources = None
+        self._layout = _intern_layout(
+            ('type', 'line_name', 'is_first_train', 'destination', 'departure_platform', 'arrival_platform')
+            + (('fare_segment',) if fare_segment is not None else ())
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TransportLeg":
+        """パーサーが返す区間情報の辞書から生成"""
+        sources: List[Tuple[str, Optional[int], str]] = []
+        leg = cls(
+            line_name=data.get('line_name'),
+            is_first_train=bool(data.get('is_first_train', False)),
+            destination=data.get('destination'),
+            departure_platform=data.get('departure_platform'),
+            arrival_platform=data.get('arrival_platform'),
+            fare_segment=_parse_source(sources, 'fare_segment', data.get('fare_segment'), _parse_int, _format_yen),
+        )
+        leg._sources = tuple(sources) or None
+        leg._layout = _intern_layout(data)
+        return leg
+
+    def to_dict(self) -> Dict[str, Any]:
+        """従来の辞書形式に変換"""
+        result = {}
+        for key in self._layout:
+            if key == 'type':
+                result[key] = self.type
+            elif key == 'fare_segment':
+                result[key] = _format_source(self._sources, key, self.fare_segment, _format_yen)
+            else:
+                result[key] = getattr(self, key)
+        return result
+
+    def __repr__(self):
+        return f"TransportLeg(line_name={self.line_name!r}, destination={self.destination!r}, fare_segment={self.fare_segment!r})"
+
+class Route:
+    """1件の経路"""
+
+    __slots__ = ('route_id', 'priority', 'departure_time', 'arrival_time',
+                 'total_time', 'time_on_board', 'transfers', 'fare', 'fare_type',
+                 'distance', 'details', '_layout', '_sources')
+
+    # 数値として保持するフィールドと、従来形式への変換関数
+    _FORMATTERS = {
+        'total_time': _format_minutes,
+        'time_on_board': _format_minutes,
+        'transfers': lambda value: _format_unit(value, '回'),
+        'fare': _format_yen,
+    }
+
+    def __init__(self,
+                 route_id: Optional[str] = None,
+                 priority: Optional[List[str]] = None,
+                 departure_time: Optional[str] = None,
+                 arrival_time: Optional[str] = None,
+                 total_time: Optional[int] = None,
+                 time_on_board: Optional[int] = None,
+                 transfers: Optional[int] = None,
+                 fare: Optional[int] = None,
+                 fare_type: Optional[str] = None,
+                 distance: Optional[str] = None,
+                 details: Optional[List[Any]] = None):
+        self.route_id = route_id
+        self.priority = priority or []
+        self.departure_time = departure_time
+        self.arrival_time = arrival_time
+        self.total_time = total_time  # 所要時間（分）
+        self.time_on_board = time_on_board  # 乗車時間（分）
+        self.transfers = transfers  # 乗り換え回数
+        self.fare = fare  # 料金（円）
+        self.fare_type = fare_type
+        self.distance = distance
+        self.details = details or []  # StationStop / TransportLeg のリスト
+        self._sources: _Sources = None
+        self._layout = _intern_layout(
+            key for key in self.__slots__
+            if key not in ('_layout', '_sources') and (key in ('route_id', 'priority', 'details') or getattr(self, key) is not None)
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Route":
+        """パーサーが返す経路の辞書から生成"""
+        details = []
+        for item in data.get('details', []):
+            if item.get('type') == 'transport':
+                details.append(TransportLeg.from_dict(item))
+            else:
+                details.append(StationStop.from_dict(item))
+
+        sources: List[Tuple[str, Optional[int], str]] = []
+        formatters = cls._FORMATTERS
+        route = cls(
+            route_id=data.get('route_id'),
+            priority=list(data.get('priority', [])),
+            departure_time=data.get('departure_time'),
+            arrival_time=data.get('arrival_time'),
+            total_time=_parse_source(sources, 'total_time', data.get('total_time'),
+                                     _parse_minutes, formatters['total_time']),
+            time_on_board=_parse_source(sources, 'time_on_board', data.get('time_on_board'),
+                                        _parse_minutes, formatters['time_on_board']),
+            transfers=_parse_source(sources, 'transfers', data.get('transfers'), _parse_int, formatters['transfers']),
+            fare=_parse_source(sources, 'fare', data.get('fare'), _parse_int, formatters['fare']),
+            fare_type=data.get('fare_type'),
+            distance=data.get('distance'),
+            details=details,
+        )
+        route._sources = tuple(sources) or None
+        route._layout = _intern_layout(data)
+        return route
+
+    def to_dict(self) -> Dict[str, Any]:
+        """従来の辞書形式（search_routesの戻り値と同じ形式）に変換"""
+        result = {}
+        for key in self._layout:
+            value = getattr(self, key)
+            if key == 'details':
+                value = [item.to_dict() for item in value]
+            elif key == 'priority':
+                value = list(value)
+            elif key in self._FORMATTERS:
+                value = _format_source(self._sources, key, value, self._FORMATTERS[key])
+            result[key] = value
+        return result
+
+    @property
+    def stations(self) -> List[StationStop]:
+        """経路上の駅ノードのリスト"""
+        return [item for item in self.details if isinstance(item, StationStop)]
+
+    @property
+    def legs(self) -> List[TransportLeg]:
+        """経路上の乗車区間のリスト"""
+        return [item for item in self.details if isinstance(item, TransportLeg)]
+
+    def __repr__(self):
+        return (f"Route(route_id={self.route_id!r}, departure_time={self.departure_time!r}, "
+                f"arrival_time={self.arrival_time!r}, total_time={self.total_time!r}, fare={self.fare!r})")
+
+def routes_from_dicts(routes: List[Dict[str, Any]]) -> List[Route]:
+    """search_routesが返す辞書のリストをRouteのリストに変換"""
+    return [Route.from_dict(route) for route in routes]
\ No newline at end of file
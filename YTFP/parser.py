@@ -1,6 +1,191 @@
 import re
 import json
-from bs4 import BeautifulSoup, NavigableString
+from bs4 import BeautifulSoup, NavigableString, FeatureNotFound
+
+from .errors import ConfigurationError
+from .logger import logger
+
+# パーサーエンジン名とBeautifulSoupのツリービルダーの対応
+# lxmlは標準のhtml.parserより高速だが、別途インストールが必要
+PARSER_ENGINES = {
+    "bs4": "html.parser",
+    "lxml": "lxml",
+}
+DEFAULT_ENGINE = "bs4"
+
+# 経路コンテナ (#srline) の開始タグと、対応する終了タグを探すためのdivタグ
+# コメント・script・styleの中にあるタグは読み飛ばす
+_ROUTE_CONTAINER_OPEN_RE = re.compile(r'<div\b[^>]*\bid=["\']srline["\'][^>]*>', re.IGNORECASE)
+_DIV_TOKEN_RE = re.compile(
+    r'(?P<skip><!--.*?-->|<(script|style)\b[^>]*>.*?</\2\s*>)|<(?P<close>/?)div\b[^>]*>',
+    re.IGNORECASE | re.DOTALL
+)
+_SKIP_OPEN_RE = re.compile(r'<!--|<(?P<raw>script|style)\b[^>]*>', re.IGNORECASE)
+_SKIP_END_RES = {
+    None: re.compile(r'-->'),
+    'script': re.compile(r'</script\s*>', re.IGNORECASE),
+    'style': re.compile(r'</style\s*>', re.IGNORECASE),
+}
+
+# extract_route_info で使用する正規表現
+_TIME_ON_BOARD_RE = re.compile(r'(\d+分)（乗車(\d+分)）')
+_HTML_COMMENT_RE = re.compile(r'<!--.*?-->')
+_DEPARTURE_PLATFORM_RE = re.compile(r'\[発\]\s*([^→]+?)(?:\s*→|$)')
+_ARRIVAL_PLATFORM_RE = re.compile(r'→\s*\[着\]\s*(.+)')
+_ROUTE_DIV_ID_RE = re.compile(r'^route\d+$')
+
+# ストリーミング解析で経路div (route01など) の開始タグからidを取り出す
+_ROUTE_OPEN_ID_RE = re.compile(r'\bid=["\'](route\d+)["\']', re.IGNORECASE)
+
+# Next.jsが埋め込む __NEXT_DATA__ スクリプトタグ
+_NEXT_DATA_RE = re.compile(
+    r'<script\b[^>]*\bid=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+
+def _make_soup(html_content, engine=DEFAULT_ENGINE):
+    """
+    指定されたエンジンでHTMLを解析しBeautifulSoupオブジェクトを返す関数。
+    """
+    builder = PARSER_ENGINES.get(engine)
+    if builder is None:
+        raise ConfigurationError(
+            f"Unknown parser engine: {engine!r} (available: {', '.join(PARSER_ENGINES)})"
+        )
+    try:
+        return BeautifulSoup(html_content, builder)
+    except FeatureNotFound:
+        raise ConfigurationError(
+            f"Parser engine {engine!r} requires the '{builder}' package to be installed"
+        ) from None
+
+def _first_text(tag):
+    """
+    タグ直下の最初の空でないテキストノードを返す関数。見つからない場合は空文字列を返す。
+    """
+    for content in tag.contents:
+        if isinstance(content, NavigableString):
+            text = content.strip()
+            if text:
+                return text
+    return ""
+
+def _is_fare_type_class(css_class):
+    """料金タイプを表すspanのクラス判定 (markとICアイコン以外)"""
+    return css_class != 'mark' and css_class != 'icnIc'
+
+def _is_detail_element(tag):
+    """ルート詳細内の駅ノード・区間情報のdiv判定"""
+    if tag.name != 'div':
+        return False
+    classes = tag.get('class', [])
+    return 'station' in classes or 'fareSection' in classes
+
+def _extract_time_summary(time_li, route_data):
+    """時間情報 (出発時刻, 到着時刻, 所要時間, 乗車時間) を抽出する"""
+    dep_arr_span = time_li.find('span', recursive=False)
+    if dep_arr_span:
+        dep_time_str = _first_text(dep_arr_span)
+        route_data['departure_time'] = dep_time_str.replace('発→', '').strip() if dep_time_str else None
+
+        arr_time_span_mark = dep_arr_span.find('span', class_='mark')
+        route_data['arrival_time'] = arr_time_span_mark.get_text(strip=True).replace('着', '').strip() if arr_time_span_mark else None
+
+    time_elements = []
+    start_collecting = False
+    for child in time_li.children:
+        if child == dep_arr_span:
+            start_collecting = True
+            continue
+        if start_collecting and isinstance(child, NavigableString):
+            cleaned_text = _HTML_COMMENT_RE.sub('', str(child)).strip()
+            if cleaned_text:
+                time_elements.append(cleaned_text)
+
+    time_details_text = "".join(time_elements)
+    time_match = _TIME_ON_BOARD_RE.search(time_details_text)
+    if time_match:
+        route_data['total_time'] = time_match.group(1)
+        route_data['time_on_board'] = time_match.group(2)
+    elif '分' in time_details_text:
+        route_data['total_time'] = time_details_text.strip()
+        route_data['time_on_board'] = time_details_text.strip() if '（乗車' not in time_details_text else None
+    else:
+        route_data['total_time'] = None
+        route_data['time_on_board'] = None
+
+def _extract_fare_summary(fare_li, route_data):
+    """料金と料金タイプ (IC優先など) を抽出する"""
+    fare_mark = fare_li.find('span', class_='mark')
+    if not fare_mark:
+        return
+    route_data['fare'] = fare_mark.get_text(strip=True) + "円"
+    fare_type_span = fare_li.find('span', class_=_is_fare_type_class)
+    if fare_type_span:
+        route_data['fare_type'] = fare_type_span.get_text(strip=True)
+    elif fare_li.find('span', class_='icnIc'):
+        if len(fare_li.contents) > 1:
+            second = fare_li.contents[1]
+            if isinstance(second, NavigableString):
+                route_data['fare_type'] = second.strip()
+            elif second.name == 'span':
+                route_data['fare_type'] = second.get_text(strip=True)
+
+def _extract_station(elem):
+    """駅ノードのdivから駅情報を抽出する"""
+    station_type = 'departure_station' if elem.find('span', class_='icnStaDep') else 'arrival_station'
+    time_ul = elem.find('ul', class_='time')
+    time_tag = time_ul.find('li') if time_ul else None
+    dl = elem.find('dl')
+    dt = dl.find('dt') if dl else None
+    station_name_tag = dt.find('a') if dt else None
+    return {
+        'type': station_type,
+        'time': time_tag.get_text(strip=True) if time_tag else None,
+        'station_name': station_name_tag.get_text(strip=True) if station_name_tag else None
+    }
+
+def _extract_transport(elem):
+    """区間情報のdivから路線・番線・区間料金を抽出する"""
+    transport_info = {'type': 'transport'}
+    access_div = elem.find('div', class_='access')
+    if not access_div:
+        return transport_info
+
+    transport_li = access_div.find('li', class_='transport')
+    if transport_li:
+        line_div = transport_li.find('div')
+        if line_div:
+            # 路線名 (アイコンの後のテキストノード)
+            transport_info['line_name'] = _first_text(line_div)
+
+            destination_span = line_div.find('span', class_='destination')
+            if destination_span:
+                full_dest_text = destination_span.get_text(strip=True)
+                first_train_icon = destination_span.find('span', class_='icnFirstTrain')
+                transport_info['is_first_train'] = bool(first_train_icon)
+                if first_train_icon:
+                    first_train_text = first_train_icon.get_text(strip=True)
+                    transport_info['destination'] = full_dest_text.replace(first_train_text, "").strip()
+                else:
+                    transport_info['destination'] = full_dest_text
+            else:
+                transport_info['destination'] = None
+                transport_info['is_first_train'] = False
+
+    platform_li = access_div.find('li', class_='platform')
+    if platform_li:
+        platform_text = platform_li.get_text(strip=True, separator=' ')
+        dep_match = _DEPARTURE_PLATFORM_RE.search(platform_text)
+        arr_match = _ARRIVAL_PLATFORM_RE.search(platform_text)
+        transport_info['departure_platform'] = dep_match.group(1).strip() if dep_match else None
+        transport_info['arrival_platform'] = arr_match.group(1).strip() if arr_match else None
+
+    fare_p = elem.find('p', class_='fare')
+    fare_span = fare_p.find('span') if fare_p else None
+    if fare_span:
+        transport_info['fare_segment'] = fare_span.get_text(strip=True) + "円"
+    return transport_info
 
 def extract_route_info(route_div):
     """
@@ -16,74 +201,38 @@ def extract_route_info(route_div):
     route_data['route_id'] = title_tag.get_text(strip=True) if title_tag else None
 
     # 優先度 (例: [早, 楽, 安])
-    priority_tags = summary_div.select('ul.priority li span')
-    route_data['priority'] = [p.get_text(strip=True) for p in priority_tags]
+    route_data['priority'] = [
+        span.get_text(strip=True)
+        for priority_ul in summary_div.find_all('ul', class_='priority')
+        for li in priority_ul.find_all('li')
+        for span in li.find_all('span')
+    ]
 
     summary_ul = summary_div.find('ul', class_='summary')
     if summary_ul:
-        # 時間情報 (出発時刻, 到着時刻, 所要時間, 乗車時間)
-        time_li = summary_ul.find('li', class_='time')
-        if time_li:
-            dep_arr_span = time_li.find('span', recursive=False) 
-            if dep_arr_span:
-                dep_time_str = ""
-                for content_part in dep_arr_span.contents:
-                    if isinstance(content_part, NavigableString):
-                        dep_time_str = content_part.strip()
-                        if dep_time_str: break
-                route_data['departure_time'] = dep_time_str.replace('発→', '').strip() if dep_time_str else None
-                
-                arr_time_span_mark = dep_arr_span.find('span', class_='mark')
-                route_data['arrival_time'] = arr_time_span_mark.get_text(strip=True).replace('着', '').strip() if arr_time_span_mark else None
-
-            time_elements = []
-            start_collecting = False
-            for child in time_li.children:
-                if child == dep_arr_span:
-                    start_collecting = True 
-                    continue
-                if start_collecting:
-                    if isinstance(child, NavigableString):
-                        cleaned_text = re.sub(r'<!--.*?-->', '', str(child)).strip()
-                        if cleaned_text:
-                            time_elements.append(cleaned_text)
-            
-            time_details_text = "".join(time_elements)
-            time_match = re.search(r'(\d+分)（乗車(\d+分)）', time_details_text)
-            if time_match:
-                route_data['total_time'] = time_match.group(1)
-                route_data['time_on_board'] = time_match.group(2)
-            elif '分' in time_details_text:
-                route_data['total_time'] = time_details_text.strip()
-
-                route_data['time_on_board'] = time_details_text.strip() if '（乗車' not in time_details_text else None
-            else:
-                route_data['total_time'] = None
-                route_data['time_on_board'] = None
+        # サマリーのli要素を一度だけ走査し、クラスごとに最初の要素を取得
+        summary_items = {}
+        for li in summary_ul.find_all('li'):
+            for css_class in li.get('class', []):
+                summary_items.setdefault(css_class, li)
 
+        time_li = summary_items.get('time')
+        if time_li:
+            _extract_time_summary(time_li, route_data)
 
         # 乗り換え回数
-        transfers_li = summary_ul.find('li', class_='transfer')
-        if transfers_li and transfers_li.find('span', class_='mark'):
-            route_data['transfers'] = transfers_li.find('span', class_='mark').get_text(strip=True) + "回"
+        transfers_li = summary_items.get('transfer')
+        transfers_mark = transfers_li.find('span', class_='mark') if transfers_li else None
+        if transfers_mark:
+            route_data['transfers'] = transfers_mark.get_text(strip=True) + "回"
 
         # 料金
-        fare_li = summary_ul.find('li', class_='fare')
-        if fare_li and fare_li.find('span', class_='mark'):
-            route_data['fare'] = fare_li.find('span', class_='mark').get_text(strip=True) + "円"
-            # 料金タイプ (IC優先など)
-            fare_type_span = fare_li.find('span', class_=lambda x: x != 'mark' and x != 'icnIc') 
-            if fare_type_span:
-                route_data['fare_type'] = fare_type_span.get_text(strip=True)
-            elif fare_li.find('span', class_='icnIc'): 
-                if len(fare_li.contents) > 1 and isinstance(fare_li.contents[1], NavigableString):
-                    route_data['fare_type'] = fare_li.contents[1].strip()
-                elif len(fare_li.contents) > 1 and fare_li.contents[1].name == 'span':
-                    route_data['fare_type'] = fare_li.contents[1].get_text(strip=True)
-
+        fare_li = summary_items.get('fare')
+        if fare_li:
+            _extract_fare_summary(fare_li, route_data)
 
         # 距離
-        distance_li = summary_ul.find('li', class_='distance')
+        distance_li = summary_items.get('distance')
         if distance_li:
             route_data['distance'] = distance_li.get_text(strip=True)
 
@@ -91,94 +240,235 @@ def extract_route_info(route_div):
     route_details_div = route_div.find('div', class_='routeDetail')
     details = []
     if route_details_div:
-        elements = route_details_div.find_all(lambda tag: tag.name == 'div' and ('station' in tag.get('class', []) or 'fareSection' in tag.get('class', [])), recursive=False)
-        
-        for elem in elements:
+        for elem in route_details_div.find_all(_is_detail_element, recursive=False):
             if 'station' in elem.get('class', []):
-                station_type = 'departure_station' if elem.find('span', class_='icnStaDep') else 'arrival_station'
-                time_tag = elem.find('ul', class_='time').find('li') if elem.find('ul', class_='time') else None
-                station_name_tag = elem.find('dl').find('dt').find('a') if elem.find('dl') and elem.find('dl').find('dt') else None
-                details.append({
-                    'type': station_type,
-                    'time': time_tag.get_text(strip=True) if time_tag else None,
-                    'station_name': station_name_tag.get_text(strip=True) if station_name_tag else None
-                })
-            elif 'fareSection' in elem.get('class', []):
-                transport_info = {'type': 'transport'}
-                access_div = elem.find('div', class_='access')
-                if access_div:
-                    transport_li = access_div.find('li', class_='transport')
-                    if transport_li:
-                        line_div = transport_li.find('div')
-                        if line_div:
-                            # 路線名 (アイコンの後のテキストノード)
-                            line_name_candidate = ""
-                            for content in line_div.contents:
-                                if isinstance(content, NavigableString):
-                                    line_name_candidate = content.strip()
-                                    if line_name_candidate: # 最初の空でないテキストノード
-                                        break
-                            transport_info['line_name'] = line_name_candidate
-                            
-                            destination_span = line_div.find('span', class_='destination')
-                            if destination_span:
-                                full_dest_text = destination_span.get_text(strip=True)
-                                first_train_icon = destination_span.find('span', class_='icnFirstTrain')
-                                transport_info['is_first_train'] = bool(first_train_icon)
-                                if transport_info['is_first_train'] and first_train_icon:
-                                    first_train_text = first_train_icon.get_text(strip=True)
-                                    transport_info['destination'] = full_dest_text.replace(first_train_text, "").strip()
-                                else:
-                                    transport_info['destination'] = full_dest_text
-                            else:
-                                transport_info['destination'] = None
-                                transport_info['is_first_train'] = False
-                    
-                    platform_li = access_div.find('li', class_='platform')
-                    if platform_li:
-                        platform_text = platform_li.get_text(strip=True, separator=' ')
-                        dep_match = re.search(r'\[発\]\s*([^→]+?)(?:\s*→|$)', platform_text)
-                        arr_match = re.search(r'→\s*\[着\]\s*(.+)', platform_text)
-                        transport_info['departure_platform'] = dep_match.group(1).strip() if dep_match else None
-                        transport_info['arrival_platform'] = arr_match.group(1).strip() if arr_match else None
-                    
-                    fare_p = elem.find('p', class_='fare')
-                    if fare_p and fare_p.find('span'):
-                        transport_info['fare_segment'] = fare_p.find('span').get_text(strip=True) + "円"
-                details.append(transport_info)
-    
+                details.append(_extract_station(elem))
+            else:
+                details.append(_extract_transport(elem))
+
+    route_data['details'] = details
+    return route_data
+
+def _with_unit(value, unit):
+    """
+    数値または文字列に単位を付加する関数。値が空の場合はNoneを返す。
+    """
+    if value is None or value == '':
+        return None
+    value = str(value).strip()
+    return value if value.endswith(unit) else value + unit
+
+def _route_from_feature(index, feature):
+    """
+    featureInfoListの1要素をextract_route_infoと同じ形式の辞書に変換する関数。
+    サマリー情報を持たない要素の場合はNoneを返す。
+    """
+    summary = feature.get('summaryInfo')
+    if not isinstance(summary, dict):
+        return None
+
+    route_data = {
+        'route_id': f"ルート{index}",
+        'priority': [str(p) for p in feature.get('priorityList') or []],
+        'departure_time': summary.get('departureTime'),
+        'arrival_time': summary.get('arrivalTime'),
+        'total_time': _with_unit(summary.get('totalTime'), '分'),
+        'time_on_board': _with_unit(summary.get('onTime'), '分'),
+    }
+    transfers = _with_unit(summary.get('transferCount'), '回')
+    if transfers is not None:
+        route_data['transfers'] = transfers
+    fare = _with_unit(summary.get('totalPrice'), '円')
+    if fare is not None:
+        route_data['fare'] = fare
+        if summary.get('priceType'):
+            route_data['fare_type'] = summary['priceType']
+    if summary.get('distance'):
+        route_data['distance'] = _with_unit(summary['distance'], 'km')
+
+    # edgeInfoListは「駅 → 区間 → 駅 ...」の順に並ぶ駅ノードと、その駅から出る区間の情報を持つ
+    details = []
+    edges = feature.get('edgeInfoList') or []
+    for i, edge in enumerate(edges):
+        details.append({
+            'type': 'departure_station' if i == 0 else 'arrival_station',
+            'time': edge.get('arrivalTime') or edge.get('departureTime'),
+            'station_name': edge.get('stationName'),
+        })
+        if i == len(edges) - 1 or not edge.get('railName'):
+            continue
+        transport_info = {
+            'type': 'transport',
+            'line_name': edge.get('railName'),
+            'is_first_train': bool(edge.get('isFirstTrain')),
+            'destination': edge.get('destination'),
+            'departure_platform': edge.get('departurePlatform'),
+            'arrival_platform': edge.get('arrivalPlatform'),
+        }
+        fare_segment = _with_unit(edge.get('price'), '円')
+        if fare_segment is not None:
+            transport_info['fare_segment'] = fare_segment
+        details.append(transport_info)
+
     route_data['details'] = details
     return route_data
 
-def extract_routes_from_html(html_content):
+def _is_complete_route(route_data):
+    """
+    JSONから変換した経路が、HTML解析の結果の代わりに使える情報を持っているかどうかを返す関数。
+    出発・到着時刻と所要時間があり、detailsが駅名のある駅ノードと路線名のある区間から成る場合にTrue。
+    """
+    if not all(route_data.get(key) for key in ('departure_time', 'arrival_time', 'total_time')):
+        return False
+    details = route_data.get('details')
+    if not details:
+        return False
+    for item in details:
+        if item['type'] == 'transport':
+            if not item.get('line_name'):
+                return False
+        elif not item.get('station_name'):
+            return False
+    return any(item['type'] == 'transport' for item in details)
+
+def _extract_routes_from_next_data(next_data):
+    """
+    __NEXT_DATA__ のJSONデータから全てのルート情報を抽出しリストとして返す関数（試験的）。
+
+    props.pageProps.naviSearchParam.featureInfoList の各要素を
+    extract_route_info と同じ形式の辞書に変換する。featureInfoList内のキーは
+    実際の検索結果ページで検証されていないため、prefer_json=True の場合に限り使用する。
+    """
+    features = next_data.get('props', {}).get('pageProps', {}).get('naviSearchParam', {}).get('featureInfoList') or []
+    all_routes_data = []
+    for index, feature in enumerate(features, 1):
+        if not isinstance(feature, dict):
+            continue
+        route_data = _route_from_feature(index, feature)
+        if route_data:
+            all_routes_data.append(route_data)
+    return all_routes_data
+
+def _find_next_data(html_content):
+    """
+    HTMLコンテンツから __NEXT_DATA__ のJSONデータを取り出す関数。
+    見つからない場合や不正なJSONの場合はNoneを返す。
+    """
+    match = _NEXT_DATA_RE.search(html_content)
+    if not match:
+        return None
+    try:
+        next_data = json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return None
+    return next_data if isinstance(next_data, dict) else None
+
+def _skip_end(html_content, skip_match, end):
+    """
+    コメント・script・styleの開始位置のマッチから、その終わりの位置を返す関数。
+    end までに閉じていない場合はNoneを返す。
+    """
+    raw = skip_match.group('raw')
+    close_match = _SKIP_END_RES[raw and raw.lower()].search(html_content, skip_match.end(), end)
+    return close_match.end() if close_match else None
+
+def _find_route_container_open(html_content, start=0, end=None):
+    """
+    経路コンテナ (#srline) の開始タグを探す関数。コメント・script・style内のタグは無視する。
+
+    (開始タグのマッチ, 走査を再開できる位置) を返す。見つからない場合のマッチはNone。
+    end までに閉じていないコメント・script・styleがある場合は、その開始位置を再開位置として返す。
+    """
+    end = len(html_content) if end is None else end
+    pos = start
+    open_match = None
+    while True:
+        if open_match is None or open_match.start() < pos:
+            open_match = _ROUTE_CONTAINER_OPEN_RE.search(html_content, pos, end)
+        skip_match = _SKIP_OPEN_RE.search(html_content, pos, open_match.start() if open_match else end)
+        if skip_match is None:
+            return open_match, open_match.start() if open_match else end
+        skip_end = _skip_end(html_content, skip_match, end)
+        if skip_end is None:
+            return None, skip_match.start()
+        pos = skip_end
+
+def _find_element_end(html_content, start):
+    """
+    start位置から始まるdiv要素の終了位置を返す関数。
+    コメント・script・style内のタグは無視し、対応する終了タグが見つからない場合はNoneを返す。
+    """
+    depth = 0
+    for match in _DIV_TOKEN_RE.finditer(html_content, start):
+        if match.group('skip'):
+            continue
+        if match.group('close'):
+            depth -= 1
+            if depth == 0:
+                return match.end()
+        else:
+            depth += 1
+    return None
+
+def _find_route_container_fragment(html_content):
+    """
+    HTMLコンテンツから経路コンテナ (#srline) の範囲だけを切り出して返す関数。
+    見つからない場合はNoneを返す。
+    """
+    open_match, _ = _find_route_container_open(html_content)
+    if not open_match:
+        return None
+    end = _find_element_end(html_content, open_match.start())
+    if end is None:
+        return None
+    return html_content[open_match.start():end]
+
+def extract_routes_from_html(html_content, engine=DEFAULT_ENGINE, scoped=False, prefer_json=False):
     """
     HTMLコンテンツから全てのルート情報を抽出しリストとして返す関数。
+
+    engine には "bs4"（標準のhtml.parser）または "lxml" を指定できる。
+    どちらのエンジンでも返されるデータ形式は同一。
+
+    scoped=True の場合は経路コンテナ (#srline) の範囲だけを切り出して解析し、
+    ヘッダーや広告、スクリプトなどページ全体のツリー構築を省略する。
+    切り出しに失敗した場合はページ全体の解析にフォールバックする。
+
+    prefer_json=True の場合、__NEXT_DATA__ のJSONデータが埋め込まれていれば
+    DOMを走査せずにそこから経路情報を抽出する（試験的）。ただし、変換した全ての経路が
+    時刻・所要時間と駅ノード・区間を持つ場合に限り、それ以外はHTMLを解析する。
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
     all_routes_data = []
-    
-    # ルート詳細の親コンテナを探す
-    route_container = soup.find('div', id='srline', class_='elmRouteDetail')
+    route_container = None
+
+    if prefer_json:
+        next_data = _find_next_data(html_content)
+        if next_data is not None:
+            json_routes = _extract_routes_from_next_data(next_data)
+            if json_routes and all(_is_complete_route(route) for route in json_routes):
+                return json_routes
+            if json_routes:
+                logger.debug("Ignoring incomplete routes from __NEXT_DATA__; parsing HTML instead.")
+
+    if scoped:
+        fragment = _find_route_container_fragment(html_content)
+        if fragment is not None:
+            route_container = _make_soup(fragment, engine).find('div', id='srline', class_='elmRouteDetail')
+
+    if route_container is None:
+        soup = _make_soup(html_content, engine)
+        # ルート詳細の親コンテナを探す
+        route_container = soup.find('div', id='srline', class_='elmRouteDetail')
     if not route_container:
-        # Next.jsの構造からデータを取得しようと試みる (フォールバック)
-        script_tag = soup.find('script', id='__NEXT_DATA__', type='application/json')
-        if script_tag:
-            print("Note: Parsing data from __NEXT_DATA__ JSON as #srline was not found directly.")
-            try:
-                next_data = json.loads(script_tag.string)
-                features = next_data.get('props', {}).get('pageProps', {}).get('naviSearchParam', {}).get('featureInfoList', [])
-                return [] 
-            except json.JSONDecodeError:
-                print("Error decoding __NEXT_DATA__ JSON.")
-                return []
-        print("Route container (#srline) not found in HTML.")
+        # __NEXT_DATA__ の経路データの形式は検証されていないため、JSONからは抽出しない
+        logger.warning("Route container (#srline) not found in HTML.")
         return []
 
     # idが "route" で始まり数字が続くdiv要素を抽出 (例: route01, route02)
-    route_divs = route_container.find_all('div', id=re.compile(r'^route\d+$'), recursive=False)
+    route_divs = route_container.find_all('div', id=_ROUTE_DIV_ID_RE, recursive=False)
     
     if not route_divs:
-        print("No route divs (e.g., #route01) found within #srline.")
+        logger.warning("No route divs (e.g., #route01) found within #srline.")
         return []
 
     for r_div in route_divs:
@@ -186,4 +476,106 @@ def extract_routes_from_html(html_content):
         if extracted_info:
             all_routes_data.append(extracted_info)
             
-    return all_routes_data
\ No newline at end of file
+    return all_routes_data
+
+class IncrementalRouteParser:
+    """
+    HTMLを分割して受け取り、経路div (route01など) が閉じた時点でその経路情報を返すパーサー。
+
+    feed() にHTMLの断片を順に渡すと、その時点で完結した経路のリストが返される。
+    最後に close() を呼び出すと残りの経路が返される。1件も経路を返せなかった場合、
+    close() は受け取ったHTML全体を extract_routes_from_html で解析する
+    （__NEXT_DATA__ のみのページなどへのフォールバック）。
+    engine, scoped, prefer_json は extract_routes_from_html と同じ意味を持つ。
+    prefer_json=True の場合は __NEXT_DATA__ がページの末尾にあるため逐次には返さず、
+    close() でページ全体を extract_routes_from_html と同じ方法で解析する。
+    """
+
+    def __init__(self, engine=DEFAULT_ENGINE, scoped=False, prefer_json=False):
+        self.engine = engine
+        self.scoped = scoped
+        self.prefer_json = prefer_json
+        self._buffer = ''
+        self._pos = 0              # 走査済みの位置
+        self._depth = None         # #srline内のdivの深さ（コンテナ発見前はNone）
+        self._route_start = None   # 解析中の経路divの開始位置
+        self._route_id = None
+        self._done = False         # #srlineが閉じた
+        self._emitted = False
+
+    def _scan_limit(self):
+        """未完結のタグ・コメント・script・styleの手前までの走査可能な位置を返す"""
+        buffer = self._buffer
+        limit = len(buffer)
+        tag_start = buffer.rfind('<', self._pos)
+        if tag_start != -1 and buffer.find('>', tag_start) == -1:
+            limit = tag_start
+        pos = self._pos
+        while True:
+            skip_match = _SKIP_OPEN_RE.search(buffer, pos, limit)
+            if skip_match is None:
+                return limit
+            pos = _skip_end(buffer, skip_match, limit)
+            if pos is None:
+                return skip_match.start()
+
+    def _parse_route(self, fragment, route_id):
+        route_div = _make_soup(fragment, self.engine).find('div', id=route_id)
+        return extract_route_info(route_div) if route_div is not None else None
+
+    def feed(self, text):
+        """HTMLの断片を追加し、新たに完結した経路情報のリストを返す"""
+        if self._done:
+            return []
+        self._buffer += text
+        if self.prefer_json:
+            return []
+
+        limit = self._scan_limit()
+        if self._depth is None:
+            open_match, resume = _find_route_container_open(self._buffer, self._pos, limit)
+            if not open_match:
+                self._pos = resume
+                return []
+            self._depth = 0
+            self._pos = open_match.start()
+
+        routes = []
+        buffer = self._buffer
+        for match in _DIV_TOKEN_RE.finditer(buffer, self._pos, limit):
+            if match.group('skip'):
+                continue
+            if not match.group('close'):
+                self._depth += 1
+                if self._depth == 2 and self._route_start is None:
+                    id_match = _ROUTE_OPEN_ID_RE.search(match.group(0))
+                    if id_match:
+                        self._route_start = match.start()
+                        self._route_id = id_match.group(1)
+                continue
+            self._depth -= 1
+            if self._depth == 1 and self._route_start is not None:
+                route_data = self._parse_route(buffer[self._route_start:match.end()], self._route_id)
+                if route_data:
+                    routes.append(route_data)
+                self._route_start = self._route_id = None
+            elif self._depth == 0:
+                self._done = True
+                break
+        self._pos = limit
+
+        if routes:
+            self._emitted = True
+        if self._emitted and self._route_start is None:
+            # 返し終えた部分はフォールバックでも不要なので破棄してメモリを解放する
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        return routes
+
+    def close(self):
+        """入力の終わりを通知し、残りの経路情報のリストを返す"""
+        if self._emitted:
+            return []
+        self._emitted = True
+        return extract_routes_from_html(self._buffer, engine=self.engine, scoped=self.scoped,
+                                        prefer_json=self.prefer_json)
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Yahoo!路線情報ライブラリのレート制限機能
+
+このモジュールは、APIへのリクエスト頻度をクライアント側で制御するトークンバケット方式の
+レートリミッターを提供します。ホストとエンドポイント（駅名候補・経路検索）ごとにバケットを持ち、
+同じRateLimiterを複数のクライアントやスレッドで共有できます。
+ファイルロックを使用する共有モードでは、同じマシン上の複数プロセスで1つの上限を守ることができます。
+"""
+
+import asyncio
+import functools
+import os
+import struct
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .errors import ConfigurationError, RateLimitError
+
+class TokenBucket:
+    """スレッドセーフなトークンバケット"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate: 1秒あたりに補充されるトークン数（許可するリクエスト数/秒）
+            capacity: バケットの容量（瞬間的に許可するリクエスト数）。Noneの場合はmax(1, rate)
+            clock: 現在時刻（秒）を返す関数（テスト時に差し替え可能）
+        """
+        if rate <= 0:
+            raise ConfigurationError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens: float, updated: float, now: float, amount: float) -> Tuple[float, float]:
+        """補充と消費を行い、(消費後のトークン数, 待機すべき秒数) を返す"""
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate) - amount
+        wait = -tokens / self.rate if tokens < 0 else 0.0
+        return tokens, wait
+
+    def reserve(self, amount: float = 1.0, max_wait: Optional[float] = None) -> float:
+        """
+        トークンを予約し、リクエストまでに待機すべき秒数を返す
+
+        待機時間がmax_waitを超える場合は予約を取り消してRateLimitErrorを送出する。
+        """
+        with self._lock:
+            now = self.clock()
+            tokens, wait = self._take(self._tokens, self._updated, now, amount)
+            if max_wait is not None and wait > max_wait:
+                raise RateLimitError(retry_after=wait)
+            self._tokens, self._updated = tokens, now
+            return wait
+
+class FileTokenBucket(TokenBucket):
+    """
+    状態をファイルに保存し、ファイルロックで複数プロセス間で共有するトークンバケット（POSIXのみ）
+    """
+
+    _STATE = struct.Struct(">dd")  # (トークン数, 最終更新時刻)
+
+    def __init__(self, path: str, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            path: バケットの状態を保存するファイルのパス
+            rate: 1秒あたりに補充されるトークン数
+            capacity: バケットの容量
+            clock: 現在時刻（秒）を返す関数。プロセス間で比較できるよう、デフォルトは実時刻
+        """
+        if fcntl is None:
+            raise ConfigurationError("Shared rate limiting is not supported on this platform")
+        super().__init__(rate, capacity, clock)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def reserve(self, amount: float = 1.0, max_wait: Optional[float] = None) -> float:
+        # ファイルロックの取得は他のプロセスを待つため、非同期クライアントからはExecutor上で呼び出される
+        with self._lock, open(self.path, 'a+b') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                data = f.read(self._STATE.size)
+                now = self.clock()
+                tokens, updated = self._STATE.unpack(data) if len(data) == self._STATE.size else (self.capacity, now)
+                tokens, wait = self._take(tokens, min(updated, now), now, amount)
+                if max_wait is not None and wait > max_wait:
+                    raise RateLimitError(retry_after=wait)
+                f.seek(0)
+                f.truncate()
+                f.write(self._STATE.pack(tokens, now))
+                f.flush()
+                return wait
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+class RateLimiter:
+    """ホスト・エンドポイントごとのトークンバケットを管理するレートリミッター"""
+
+    def __init__(self,
+                 rate: float = 1.0,
+                 capacity: Optional[float] = None,
+                 endpoint_limits: Optional[Dict[str, Tuple[float, Optional[float]]]] = None,
+                 max_wait: Optional[float] = None,
+                 shared_dir: Optional[str] = None,
+                 clock: Optional[Callable[[], float]] = None):
+        """
+        Args:
+            rate: デフォルトの1秒あたりのリクエスト数
+            capacity: デフォルトのバケット容量（瞬間的に許可するリクエスト数）
+            endpoint_limits: エンドポイントごとの (rate, capacity)。例: {"search": (0.5, 2), "suggest": (5, 10)}
+            max_wait: 待機時間の上限（秒）。超える場合はRateLimitErrorを送出する。Noneの場合は常に待機する
+            shared_dir: 指定した場合、バケットの状態をこのディレクトリのファイルに保存し、
+                同じディレクトリを指定した複数プロセスで上限を共有する
+            clock: バケットが使用する現在時刻（秒）を返す関数（テスト時に差し替え可能）。
+                Noneの場合は単調時計（共有モードでは実時刻）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.endpoint_limits = endpoint_limits or {}
+        self.max_wait = max_wait
+        self.shared_dir = shared_dir
+        self.clock = clock
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str, endpoint: str) -> TokenBucket:
+        """ホスト・エンドポイントに対応するバケットを取得（なければ作成）"""
+        key = (host, endpoint)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                rate, capacity = self.endpoint_limits.get(endpoint, (self.rate, self.capacity))
+                clock = {"clock": self.clock} if self.clock is not None else {}
+                if self.shared_dir:
+                    path = os.path.join(self.shared_dir, f"{host}_{endpoint}.bucket".replace(":", "_"))
+                    bucket = FileTokenBucket(path, rate, capacity, **clock)
+                else:
+                    bucket = TokenBucket(rate, capacity, **clock)
+                self._buckets[key] = bucket
+            return bucket
+
+    def reserve(self, url: str, endpoint: str) -> float:
+        """URLとエンドポイントに対するトークンを予約し、待機すべき秒数を返す"""
+        host = urlsplit(url).netloc
+        return self._bucket(host, endpoint).reserve(max_wait=self.max_wait)
+
+    def acquire(self, url: str, endpoint: str) -> None:
+        """リクエストが許可されるまで待機する"""
+        wait = self.reserve(url, endpoint)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str, endpoint: str) -> None:
+        """
+        リクエストが許可されるまで非同期に待機する
+
+        共有モードのバケットはファイルロックの取得でブロックするため、Executor上で予約する。
+        """
+        bucket = self._bucket(urlsplit(url).netloc, endpoint)
+        if isinstance(bucket, FileTokenBucket):
+            loop = asyncio.get_running_loop()
+            wait = await loop.run_in_executor(None, functools.partial(bucket.reserve, max_wait=self.max_wait))
+        else:
+            wait = bucket.reserve(max_wait=self.max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
\ No newline at end of file
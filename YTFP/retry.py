@@ -0,0 +1,104 @@
+"""
+Yahoo!路線情報ライブラリの再試行機能
+
+このモジュールは、一時的なHTTPエラーや通信エラーが発生したときにリクエストを再試行するための
+再試行ポリシーを提供します。指数バックオフとジッター、Retry-Afterヘッダーに対応しています。
+"""
+
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import FrozenSet, Iterable, Optional
+
+from .errors import ConfigurationError, RateLimitError, RequestError
+
+# 再試行の対象とするHTTPステータスコード
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+# 再試行してよい（冪等な）HTTPメソッド
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+class RetryPolicy:
+    """HTTPリクエストの再試行ポリシー"""
+
+    def __init__(self,
+                 max_attempts: int = 3,
+                 backoff_factor: float = 0.5,
+                 max_backoff: float = 30.0,
+                 jitter: bool = True,
+                 retry_statuses: Iterable[int] = RETRYABLE_STATUSES,
+                 methods: Iterable[str] = IDEMPOTENT_METHODS,
+                 respect_retry_after: bool = True,
+                 max_retry_after: float = 60.0):
+        """
+        Args:
+            max_attempts: 最初の1回を含む最大試行回数（1の場合は再試行しない）
+            backoff_factor: バックオフの基準時間（秒）。n回目の再試行前に最大 backoff_factor * 2**(n-1) 秒待機する
+            max_backoff: バックオフの上限（秒）
+            jitter: Trueの場合は0からバックオフ時間までの乱数だけ待機する（full jitter）
+            retry_statuses: 再試行するHTTPステータスコード
+            methods: 再試行してよいHTTPメソッド（冪等なメソッドのみを指定すること）
+            respect_retry_after: Retry-Afterヘッダーの待機時間に従うかどうか
+            max_retry_after: Retry-Afterの待機時間がこれを超える場合は再試行せずにエラーとする
+        """
+        if max_attempts < 1:
+            raise ConfigurationError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses: FrozenSet[int] = frozenset(retry_statuses)
+        self.methods: FrozenSet[str] = frozenset(m.upper() for m in methods)
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+
+    def should_retry(self, method: str, attempt: int,
+                     status: Optional[int] = None,
+                     retry_after: Optional[float] = None) -> bool:
+        """
+        再試行すべきかどうかを判定する
+
+        Args:
+            method: HTTPメソッド
+            attempt: 完了した試行の回数（1から始まる）
+            status: HTTPステータスコード（通信エラーの場合はNone）
+            retry_after: Retry-Afterヘッダーの待機時間（秒）
+        """
+        if attempt >= self.max_attempts or method.upper() not in self.methods:
+            return False
+        if status is not None and status not in self.retry_statuses:
+            return False
+        if (self.respect_retry_after and retry_after is not None
+                and retry_after > self.max_retry_after):
+            return False
+        return True
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """attempt回目の試行の後、次の試行までに待機する秒数を返す"""
+        if self.respect_retry_after and retry_after is not None:
+            return retry_after
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** (attempt - 1)))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Retry-Afterヘッダー（秒数またはHTTP日付）を秒数に変換する"""
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def error_for(status: int, reason: Optional[str], retry_after: Optional[float] = None):
+        """最終的に失敗したレスポンスに対応する例外を返す"""
+        if status == 429:
+            return RateLimitError(retry_after=retry_after)
+        return RequestError(status, reason or "")
+
+# 再試行しないポリシー（retry_policyを指定しない場合のデフォルト）
+NO_RETRY = RetryPolicy(max_attempts=1)
\ No newline at end of file
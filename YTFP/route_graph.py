@@ -0,0 +1,398 @@
+"""
+Yahoo!路線情報ライブラリの経路グラフ
+
+このモジュールは、検索済みの経路（details の駅ノードと乗車区間）を集めて駅・路線のグラフを作成し、
+Yahoo!路線情報にアクセスせずに近似的な経路を探索するためのクラスを提供します。
+区間は配列（array）に保持し、探索時には出発駅ごとにまとめた隣接リスト（CSR形式）を使用します。
+"""
+
+import heapq
+import json
+import re
+import threading
+import unicodedata
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .models import _format_unit, _parse_int
+from .station_index import normalize_station_name
+
+_CLOCK_RE = re.compile(r'(\d{1,2}):(\d{2})')
+# 列車名の号数（「のぞみ215号」の「215号」）
+_TRAIN_NUMBER_RE = re.compile(r'\s*\d+号$')
+
+# 時間・料金が不明な区間を表す値
+UNKNOWN = -1
+
+def _field(item: Any, key: str) -> Any:
+    """パーサーが返す辞書とデータモデル (models.py) の両方から値を取り出す"""
+    if isinstance(item, dict):
+        return item.get(key)
+    return getattr(item, key, None)
+
+def _line_key(name: str) -> str:
+    """
+    区間の路線名から、辺をまとめる単位の路線名を返す
+
+    特急・新幹線は列車ごとに「のぞみ215号」のような名前で返されるため、号数を除いて
+    「のぞみ」にまとめる。号数を残すと列車ごとに別の路線になり、乗り換え回数を数えられない。
+    """
+    return _TRAIN_NUMBER_RE.sub('', unicodedata.normalize('NFKC', name).strip())
+
+def _clock_minutes(text: Optional[str]) -> Optional[int]:
+    """「09:15」などの時刻を0時からの分数に変換する"""
+    match = _CLOCK_RE.search(text) if text else None
+    if not match:
+        return None
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+class _Snapshot(NamedTuple):
+    """探索に使用するグラフの写し（探索中に経路が追加されても変わらない）"""
+    offsets: array  # 出発駅ごとの辺の範囲（CSR形式）
+    order: array  # 出発駅の順に並べた辺のID
+    dst: array
+    line: array
+    time: array
+    fare: array
+    station_names: List[str]
+    line_names: List[str]
+    default_time: int  # 時間不明の区間に使う所要時間
+
+class RouteGraph:
+    """
+    検索済みの経路から作成する駅・路線のグラフ
+
+    同じ駅・同じ路線の区間は1本の辺にまとめ、観測された最短の所要時間と最安の区間料金を保持します。
+    区間の所要時間は前後の駅ノードの時刻の差から求めるため、乗り換え駅での待ち時間を含みます。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._station_names: List[str] = []
+        self._station_ids: Dict[str, int] = {}
+        self._line_names: List[str] = []
+        self._line_ids: Dict[str, int] = {}
+        self._edge_ids: Dict[Tuple[int, int, int], int] = {}
+        # 辺の情報（添字が辺のID）
+        self._src = array('i')
+        self._dst = array('i')
+        self._line = array('i')
+        self._time = array('i')  # 所要時間（分）
+        self._fare = array('i')  # 区間料金（円）
+        self._count = array('I')  # 観測回数
+        # 探索用の写し。辺・駅の追加や所要時間・料金の更新で作り直す
+        self._snapshot: Optional[_Snapshot] = None
+
+    def __len__(self) -> int:
+        return len(self._src)
+
+    def __contains__(self, station: str) -> bool:
+        return normalize_station_name(station) in self._station_ids
+
+    @property
+    def station_count(self) -> int:
+        """グラフに含まれる駅の数"""
+        return len(self._station_names)
+
+    @property
+    def edge_count(self) -> int:
+        """グラフに含まれる辺（駅・路線ごとの区間）の数"""
+        return len(self._src)
+
+    @property
+    def stations(self) -> List[str]:
+        """グラフに含まれる駅名のリスト"""
+        return list(self._station_names)
+
+    def _station_id(self, name: str) -> int:
+        key = normalize_station_name(name)
+        station_id = self._station_ids.get(key)
+        if station_id is None:
+            station_id = self._station_ids[key] = len(self._station_names)
+            self._station_names.append(name)
+            self._snapshot = None
+        return station_id
+
+    def _line_id(self, name: str) -> int:
+        name = _line_key(name)
+        line_id = self._line_ids.get(name)
+        if line_id is None:
+            line_id = self._line_ids[name] = len(self._line_names)
+            self._line_names.append(name)
+        return line_id
+
+    def _add_edge(self, src: int, dst: int, line: int, time: int, fare: int, count: int = 1) -> None:
+        edge_id = self._edge_ids.get((src, dst, line))
+        if edge_id is None:
+            self._edge_ids[(src, dst, line)] = len(self._src)
+            self._src.append(src)
+            self._dst.append(dst)
+            self._line.append(line)
+            self._time.append(time)
+            self._fare.append(fare)
+            self._count.append(count)
+            self._snapshot = None
+            return
+        if time != UNKNOWN and (self._time[edge_id] == UNKNOWN or time < self._time[edge_id]):
+            self._time[edge_id] = time
+            self._snapshot = None
+        if fare != UNKNOWN and (self._fare[edge_id] == UNKNOWN or fare < self._fare[edge_id]):
+            self._fare[edge_id] = fare
+            self._snapshot = None
+        self._count[edge_id] += count
+
+    def add_route(self, route: Any) -> int:
+        """
+        1件の経路をグラフに追加
+
+        Args:
+            route: search_routesが返す経路の辞書、またはRoute (models.py)
+
+        Returns:
+            int: 追加した区間の数
+        """
+        added = 0
+        previous = None  # (駅ID, 時刻)
+        leg = None
+        with self._lock:
+            for item in _field(route, 'details') or []:
+                if _field(item, 'type') == 'transport':
+                    leg = item
+                    continue
+                name = _field(item, 'station_name')
+                if not name:
+                    previous, leg = None, None
+                    continue
+                current = (self._station_id(name), _clock_minutes(_field(item, 'time')))
+                if previous is not None and leg is not None:
+                    start, end = previous[1], current[1]
+                    time = (end - start) % 1440 if start is not None and end is not None else UNKNOWN
+                    fare = _parse_int(_field(leg, 'fare_segment'))
+                    line = self._line_id(_field(leg, 'line_name') or '')
+                    self._add_edge(previous[0], current[0], line, time,
+                                   UNKNOWN if fare is None else fare)
+                    added += 1
+                previous, leg = current, None
+        return added
+
+    def add_routes(self, routes: Iterable[Any]) -> int:
+        """
+        複数の経路をグラフに追加
+
+        Args:
+            routes: search_routesの戻り値やキャッシュ済みの検索結果
+
+        Returns:
+            int: 追加した区間の数
+        """
+        return sum(self.add_route(route) for route in routes)
+
+    def _take_snapshot(self) -> _Snapshot:
+        """
+        探索用の写しを返す（ロック内で作成し、変更がなければ再利用する）
+
+        探索はロックの外で写しだけを読むため、探索中に別のスレッドが経路を追加しても影響を受けない。
+        """
+        with self._lock:
+            if self._snapshot is None:
+                station_count = len(self._station_names)
+                offsets = array('i', [0]) * (station_count + 1)
+                for src in self._src:
+                    offsets[src + 1] += 1
+                for i in range(station_count):
+                    offsets[i + 1] += offsets[i]
+                order = array('i', [0]) * len(self._src)
+                position = array('i', offsets)
+                for edge_id, src in enumerate(self._src):
+                    order[position[src]] = edge_id
+                    position[src] += 1
+                known = [time for time in self._time if time != UNKNOWN]
+                self._snapshot = _Snapshot(
+                    offsets, order, array('i', self._dst), array('i', self._line),
+                    array('i', self._time), array('i', self._fare),
+                    list(self._station_names), list(self._line_names),
+                    round(sum(known) / len(known)) if known else 0,
+                )
+            return self._snapshot
+
+    def _search(self, graph: _Snapshot, origin: int, target: Optional[int], time_weight: float,
+                fare_weight: float, transfer_weight: float, heuristic: Optional[Callable[[str], float]]):
+        """(駅, 乗車中の路線) を状態とするダイクストラ法 / A*探索"""
+        offsets, order, default_time = graph.offsets, graph.order, graph.default_time
+        dst, lines, times, fares = graph.dst, graph.line, graph.time, graph.fare
+        line_slots = len(graph.line_names) + 1
+
+        estimates: Dict[int, float] = {}
+
+        def estimate(station: int) -> float:
+            if heuristic is None:
+                return 0.0
+            value = estimates.get(station)
+            if value is None:
+                value = estimates[station] = heuristic(graph.station_names[station])
+            return value
+
+        # 状態 = 駅ID * line_slots + (路線ID + 1)。路線0は出発駅（未乗車）
+        start = origin * line_slots
+        costs = {start: 0.0}
+        parents: Dict[int, Tuple[int, int]] = {}
+        settled: Dict[int, Tuple[float, int]] = {}
+        queue = [(estimate(origin), 0.0, start)]
+        while queue:
+            _, cost, state = heapq.heappop(queue)
+            if cost > costs.get(state, float('inf')):
+                continue
+            station, current_line = divmod(state, line_slots)
+            if station not in settled:
+                settled[station] = (cost, state)
+                if station == target:
+                    break
+            for position in range(offsets[station], offsets[station + 1]):
+                edge_id = order[position]
+                line = lines[edge_id]
+                time = times[edge_id]
+                fare = fares[edge_id]
+                step = time_weight * (default_time if time == UNKNOWN else time)
+                if fare != UNKNOWN:
+                    step += fare_weight * fare
+                if current_line and line + 1 != current_line:
+                    step += transfer_weight
+                next_state = dst[edge_id] * line_slots + line + 1
+                next_cost = cost + step
+                if next_cost < costs.get(next_state, float('inf')):
+                    costs[next_state] = next_cost
+                    parents[next_state] = (state, edge_id)
+                    heapq.heappush(queue, (next_cost + estimate(dst[edge_id]), next_cost, next_state))
+        return settled, parents
+
+    def _station_index(self, name: str, graph: _Snapshot) -> Optional[int]:
+        station_id = self._station_ids.get(normalize_station_name(name))
+        # 写しの作成後に追加された駅は探索しない
+        return station_id if station_id is not None and station_id < len(graph.station_names) else None
+
+    def shortest_path(self, from_station: str, to_station: str,
+                      time_weight: float = 1.0,
+                      fare_weight: float = 0.0,
+                      transfer_weight: float = 5.0,
+                      heuristic: Optional[Callable[[str], float]] = None) -> Optional[Dict[str, Any]]:
+        """
+        2駅間の経路をグラフから探索
+
+        辺の重みは「所要時間（分） * time_weight + 区間料金（円） * fare_weight」で、
+        路線が変わるたびに transfer_weight を加えます。
+
+        Args:
+            from_station: 出発駅
+            to_station: 到着駅
+            time_weight: 所要時間1分あたりの重み
+            fare_weight: 区間料金1円あたりの重み
+            transfer_weight: 乗り換え1回あたりの重み
+            heuristic: 駅名を受け取り、到着駅までの重みの下限を返す関数（A*探索）。
+                省略した場合はダイクストラ法で探索する
+
+        Returns:
+            dict: 経路情報（total_time, fare, transfers は整数）。見つからない場合は None
+        """
+        graph = self._take_snapshot()
+        origin = self._station_index(from_station, graph)
+        target = self._station_index(to_station, graph)
+        if origin is None or target is None:
+            return None
+
+        settled, parents = self._search(graph, origin, target, time_weight, fare_weight, transfer_weight,
+                                        heuristic)
+        if target not in settled:
+            return None
+
+        cost, state = settled[target]
+        edges = []
+        while state in parents:
+            state, edge_id = parents[state]
+            edges.append(edge_id)
+        edges.reverse()
+        return self._build_route(graph, origin, edges, cost)
+
+    def _build_route(self, graph: _Snapshot, origin: int, edges: List[int], cost: float) -> Dict[str, Any]:
+        """辺のIDのリストをsearch_routesと同様の経路情報に変換する"""
+        names = graph.station_names
+        details = [{'type': 'departure_station', 'time': None, 'station_name': names[origin]}]
+        total_time = 0
+        fare = 0
+        transfers = 0
+        previous_line = None
+        for edge_id in edges:
+            line, time, segment_fare = graph.line[edge_id], graph.time[edge_id], graph.fare[edge_id]
+            if previous_line is not None and line != previous_line:
+                transfers += 1
+            previous_line = line
+            if total_time is not None:
+                total_time = None if time == UNKNOWN else total_time + time
+            if fare is not None:
+                fare = None if segment_fare == UNKNOWN else fare + segment_fare
+            details.append({
+                'type': 'transport',
+                'line_name': graph.line_names[line],
+                'time_segment': None if time == UNKNOWN else time,
+                'fare_segment': _format_unit(None if segment_fare == UNKNOWN else segment_fare, '円'),
+            })
+            details.append({'type': 'arrival_station', 'time': None, 'station_name': names[graph.dst[edge_id]]})
+        return {
+            'from_station': names[origin],
+            'to_station': details[-1]['station_name'],
+            'total_time': total_time,  # 所要時間（分）。不明な区間を含む場合は None
+            'fare': fare,  # 区間料金の合計（円）。不明な区間を含む場合は None
+            'transfers': transfers,
+            'cost': cost,
+            'details': details,
+        }
+
+    def costs_from(self, from_station: str,
+                   time_weight: float = 1.0,
+                   fare_weight: float = 0.0,
+                   transfer_weight: float = 5.0) -> Dict[str, float]:
+        """
+        1つの出発駅から到達できる全ての駅までの重みを求める
+
+        多数の出発駅・到着駅の組を調べる場合は、出発駅ごとに1回呼び出すと効率的です。
+
+        Returns:
+            dict: 駅名 -> 重み。到達できない駅は含まれない
+        """
+        graph = self._take_snapshot()
+        origin = self._station_index(from_station, graph)
+        if origin is None:
+            return {}
+        settled, _ = self._search(graph, origin, None, time_weight, fare_weight, transfer_weight, None)
+        return {graph.station_names[station]: cost for station, (cost, _) in settled.items()}
+
+    def save(self, path: str) -> None:
+        """グラフをJSONファイルに保存"""
+        with self._lock:
+            data = {
+                'stations': list(self._station_names),
+                'lines': list(self._line_names),
+                'edges': {
+                    'src': self._src.tolist(),
+                    'dst': self._dst.tolist(),
+                    'line': self._line.tolist(),
+                    'time': self._time.tolist(),
+                    'fare': self._fare.tolist(),
+                    'count': self._count.tolist(),
+                },
+            }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "RouteGraph":
+        """save() で保存したJSONファイルからグラフを作成"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        graph = cls()
+        station_ids = [graph._station_id(name) for name in data['stations']]
+        line_ids = [graph._line_id(name) for name in data['lines']]
+        edges = data['edges']
+        for src, dst, line, time, fare, count in zip(edges['src'], edges['dst'], edges['line'],
+                                                     edges['time'], edges['fare'], edges['count']):
+            graph._add_edge(station_ids[src], station_ids[dst], line_ids[line], time, fare, count)
+        return graph
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Yahoo!路線情報ライブラリのリクエスト集約機能
+
+このモジュールは、同じキーに対する同時実行中の処理を1回にまとめる（single-flight）ための
+クラスを提供します。キャッシュの期限切れ直後に同一の検索が大量に発生した場合でも、
+上流へのリクエストとHTML解析は1回だけ行われ、結果は待機中の全ての呼び出し元で共有されます。
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class _Call:
+    """実行中の処理の状態"""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """スレッド間で同一キーの処理を1回にまとめるクラス"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        keyに対する処理を実行する
+
+        同じkeyの処理が既に実行中であれば、その完了を待って同じ結果（または例外）を返す。
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def in_flight(self, key: Hashable) -> bool:
+        """keyに対する処理が実行中かどうか"""
+        with self._lock:
+            return key in self._calls
+
+class AsyncSingleFlight:
+    """コルーチン間で同一キーの処理を1回にまとめるクラス"""
+
+    def __init__(self):
+        self._futures: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    async def do(self, key: Hashable, coro_fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        keyに対する処理を実行する
+
+        同じkeyの処理が既に実行中であれば、その完了を待って同じ結果（または例外）を返す。
+        待機中の呼び出し元がキャンセルされても、共有している処理はキャンセルされない。
+        """
+        future, _ = self.start(key, coro_fn, *args, **kwargs)
+        return await asyncio.shield(future)
+
+    def start(self, key: Hashable, coro_fn: Callable[..., Awaitable[Any]],
+              *args, **kwargs) -> Tuple["asyncio.Future[Any]", bool]:
+        """
+        keyに対する処理を開始し、(共有のFuture, このcallで開始したかどうか) を返す
+
+        同じkeyの処理が既に実行中であれば、新たには開始せずにそのFutureを返す。
+        開始した側は返されたFutureをキャンセルして共有の処理を止めることができる。
+        """
+        future = self._futures.get(key)
+        if future is not None:
+            return future, False
+        future = asyncio.ensure_future(coro_fn(*args, **kwargs))
+        self._futures[key] = future
+        future.add_done_callback(lambda _: self._futures.pop(key, None))
+        return future, True
+
+    def in_flight(self, key: Hashable) -> bool:
+        """keyに対する処理が実行中かどうか"""
+        return key in self._futures
\ No newline at end of file
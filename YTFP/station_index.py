@@ -0,0 +1,282 @@
+"""
+Yahoo!路線情報ライブラリの駅名インデックス
+
+このモジュールは、駅名候補APIの応答や駅名リストから作成するローカルの駅名インデックスを提供します。
+駅名・読み（ひらがな）・ローマ字の前方一致で検索でき、既知の駅名はAPIを呼び出さずに候補を返せます。
+"""
+
+import json
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+# ひらがな -> ローマ字（ヘボン式）。拗音は2文字の組で先に照合する
+_KANA_ROMAJI = {
+    'あ': 'a', 'い': 'i', 'う': 'u', 'え': 'e', 'お': 'o',
+    'か': 'ka', 'き': 'ki', 'く': 'ku', 'け': 'ke', 'こ': 'ko',
+    'さ': 'sa', 'し': 'shi', 'す': 'su', 'せ': 'se', 'そ': 'so',
+    'た': 'ta', 'ち': 'chi', 'つ': 'tsu', 'て': 'te', 'と': 'to',
+    'な': 'na', 'に': 'ni', 'ぬ': 'nu', 'ね': 'ne', 'の': 'no',
+    'は': 'ha', 'ひ': 'hi', 'ふ': 'fu', 'へ': 'he', 'ほ': 'ho',
+    'ま': 'ma', 'み': 'mi', 'む': 'mu', 'め': 'me', 'も': 'mo',
+    'や': 'ya', 'ゆ': 'yu', 'よ': 'yo',
+    'ら': 'ra', 'り': 'ri', 'る': 'ru', 'れ': 're', 'ろ': 'ro',
+    'わ': 'wa', 'ゐ': 'i', 'ゑ': 'e', 'を': 'o', 'ん': 'n',
+    'が': 'ga', 'ぎ': 'gi', 'ぐ': 'gu', 'げ': 'ge', 'ご': 'go',
+    'ざ': 'za', 'じ': 'ji', 'ず': 'zu', 'ぜ': 'ze', 'ぞ': 'zo',
+    'だ': 'da', 'ぢ': 'ji', 'づ': 'zu', 'で': 'de', 'ど': 'do',
+    'ば': 'ba', 'び': 'bi', 'ぶ': 'bu', 'べ': 'be', 'ぼ': 'bo',
+    'ぱ': 'pa', 'ぴ': 'pi', 'ぷ': 'pu', 'ぺ': 'pe', 'ぽ': 'po',
+    'ぁ': 'a', 'ぃ': 'i', 'ぅ': 'u', 'ぇ': 'e', 'ぉ': 'o',
+    'ゃ': 'ya', 'ゅ': 'yu', 'ょ': 'yo', 'ゎ': 'wa', 'ゔ': 'vu',
+    'きゃ': 'kya', 'きゅ': 'kyu', 'きょ': 'kyo',
+    'しゃ': 'sha', 'しゅ': 'shu', 'しょ': 'sho',
+    'ちゃ': 'cha', 'ちゅ': 'chu', 'ちょ': 'cho',
+    'にゃ': 'nya', 'にゅ': 'nyu', 'にょ': 'nyo',
+    'ひゃ': 'hya', 'ひゅ': 'hyu', 'ひょ': 'hyo',
+    'みゃ': 'mya', 'みゅ': 'myu', 'みょ': 'myo',
+    'りゃ': 'rya', 'りゅ': 'ryu', 'りょ': 'ryo',
+    'ぎゃ': 'gya', 'ぎゅ': 'gyu', 'ぎょ': 'gyo',
+    'じゃ': 'ja', 'じゅ': 'ju', 'じょ': 'jo',
+    'ぢゃ': 'ja', 'ぢゅ': 'ju', 'ぢょ': 'jo',
+    'びゃ': 'bya', 'びゅ': 'byu', 'びょ': 'byo',
+    'ぴゃ': 'pya', 'ぴゅ': 'pyu', 'ぴょ': 'pyo',
+}
+
+# 訓令式などの綴りをヘボン式に揃える（入力側・索引側の両方に適用）
+_ROMAJI_VARIANTS = [
+    (re.compile(r'sy([auo])'), r'sh\1'), (re.compile(r'si'), 'shi'),
+    (re.compile(r'(?:ty|cy)([auo])'), r'ch\1'), (re.compile(r'ti'), 'chi'),
+    (re.compile(r'tu'), 'tsu'), (re.compile(r'(?<![sc])hu'), 'fu'),
+    (re.compile(r'(?:zy|jy)([auo])'), r'j\1'), (re.compile(r'zi'), 'ji'),
+    # 長音の「oh」（ohno → ono）だけを対象とし、「oh」+母音（ohashi のは行）は残す
+    (re.compile(r'(?:oo|ou|oh(?![aiueo]))'), 'o'), (re.compile(r'uu'), 'u'),
+    (re.compile(r'm(?=[bmp])'), 'n'), (re.compile(r"n'"), 'n'),
+]
+
+_NON_WORD_RE = re.compile(r"[\s・･\-‐_'’.()（）]+")
+_ASCII_RE = re.compile(r"^[a-z0-9']+$")
+
+def katakana_to_hiragana(text: str) -> str:
+    """カタカナをひらがなに変換"""
+    return ''.join(chr(ord(c) - 0x60) if 'ァ' <= c <= 'ヶ' else c for c in text)
+
+def normalize_station_name(text: str) -> str:
+    """
+    駅名・読みを検索用に正規化
+
+    NFKC正規化（全角英数・半角カナの統一）、小文字化、カタカナのひらがな化を行い、
+    空白・記号と末尾の「駅」を取り除く。
+    """
+    text = katakana_to_hiragana(unicodedata.normalize('NFKC', text).lower())
+    text = _NON_WORD_RE.sub('', text)
+    return text[:-1] if len(text) > 1 and text.endswith('駅') else text
+
+def _canonical_romaji(text: str) -> str:
+    for pattern, replacement in _ROMAJI_VARIANTS:
+        text = pattern.sub(replacement, text)
+    return text
+
+def kana_to_romaji(text: str) -> str:
+    """ひらがな（正規化済み）をヘボン式のローマ字に変換（変換できない文字はそのまま残す）"""
+    result = []
+    i = 0
+    double_next = False
+    while i < len(text):
+        romaji = _KANA_ROMAJI.get(text[i:i + 2]) if i + 1 < len(text) else None
+        if romaji:
+            i += 2
+        elif text[i] == 'っ':
+            double_next = True
+            i += 1
+            continue
+        elif text[i] == 'ー':
+            i += 1
+            continue
+        else:
+            romaji = _KANA_ROMAJI.get(text[i], text[i])
+            i += 1
+        if double_next:
+            romaji = ('t' if romaji.startswith('ch') else romaji[0]) + romaji
+            double_next = False
+        result.append(romaji)
+    return _canonical_romaji(''.join(result))
+
+class StationIndex:
+    """駅名・読み・ローマ字の前方一致で検索できるローカルの駅名インデックス"""
+
+    def __init__(self,
+                 name_keys: Sequence[str] = ("Suggest", "Name", "name"),
+                 reading_keys: Sequence[str] = ("Yomi", "Kana", "yomi", "kana"),
+                 complete: bool = False):
+        """
+        Args:
+            name_keys: 駅名候補APIの応答の各要素で、駅名を表すキーの候補（先頭から順に探す）
+            reading_keys: 同じく読みを表すキーの候補
+            complete: すべての駅を登録済み（全駅のリストから作成した）であればTrue。
+                Trueの場合は任意の入力にローカルで候補を返す
+        """
+        self.name_keys = tuple(name_keys)
+        self.reading_keys = tuple(reading_keys)
+        self.complete = complete
+        # APIが応答済みの入力（正規化済み）。これらの入力にはローカルで候補を返す
+        self._answered: Set[str] = set()
+        # 正規化済みの検索キーとエントリ番号の組をソートして保持し、bisectで前方一致検索する
+        self._keys: List[Tuple[str, int]] = []
+        self._entries: List[Dict[str, Any]] = []
+        self._by_name: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_station_name(name) in self._by_name
+
+    def _first(self, item: Dict[str, Any], keys: Sequence[str]) -> Optional[str]:
+        for key in keys:
+            value = item.get(key)
+            if isinstance(value, str) and value:
+                return value
+        return None
+
+    def add(self, name: str, reading: Optional[str] = None,
+            item: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        駅を追加する（同じ駅名が登録済みの場合は何もしない）
+
+        Args:
+            name: 駅名
+            reading: 読み（ひらがな・カタカナ）。指定するとかな・ローマ字でも検索できる
+            item: 検索結果として返す辞書（指定しない場合は name_keys/reading_keys の先頭のキーで作成）
+
+        Returns:
+            bool: 新たに追加された場合はTrue
+        """
+        normalized = normalize_station_name(name)
+        if not normalized:
+            return False
+        if item is None:
+            item = {self.name_keys[0]: name}
+            if reading:
+                item[self.reading_keys[0]] = reading
+
+        keys = {normalized}
+        if reading:
+            kana = normalize_station_name(reading)
+            keys.update((kana, kana_to_romaji(kana)))
+        if _ASCII_RE.match(normalized):
+            keys.add(_canonical_romaji(normalized))
+
+        with self._lock:
+            if normalized in self._by_name:
+                return False
+            entry_id = len(self._entries)
+            self._entries.append(item)
+            self._by_name[normalized] = entry_id
+            for key in keys:
+                insort(self._keys, (key, entry_id))
+        return True
+
+    def _query_key(self, query: str) -> str:
+        key = normalize_station_name(query)
+        return _canonical_romaji(key) if _ASCII_RE.match(key) else key
+
+    def add_suggestions(self, response: Dict[str, Any], query: Optional[str] = None) -> int:
+        """
+        駅名候補APIの応答 ({"Result": [...]}) に含まれる駅を追加し、追加した件数を返す
+
+        Args:
+            response: 駅名候補APIの応答
+            query: 応答を得た入力。指定すると、以降は同じ入力にローカルで候補を返す
+        """
+        if query is not None:
+            key = self._query_key(query)
+            if key:
+                with self._lock:
+                    self._answered.add(key)
+        added = 0
+        for item in (response or {}).get("Result") or []:
+            if not isinstance(item, dict):
+                continue
+            name = self._first(item, self.name_keys)
+            if name and self.add(name, self._first(item, self.reading_keys), item):
+                added += 1
+        return added
+
+    def add_stations(self, stations: Iterable[Union[str, Tuple[str, str], Dict[str, Any]]]) -> int:
+        """
+        駅名リストから駅を追加し、追加した件数を返す
+
+        各要素は駅名の文字列、(駅名, 読み) のタプル、または駅名候補APIの応答と同じ形式の辞書。
+        """
+        added = 0
+        for station in stations:
+            if isinstance(station, dict):
+                added += self.add_suggestions({"Result": [station]})
+            elif isinstance(station, str):
+                added += self.add(station)
+            else:
+                added += self.add(*station)
+        return added
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """駅名・読み・ローマ字の前方一致で駅を検索し、完全一致・短い駅名の順に返す"""
+        prefix = normalize_station_name(query)
+        if not prefix:
+            return []
+        prefixes = {prefix}
+        if _ASCII_RE.match(prefix):
+            prefixes.add(_canonical_romaji(prefix))
+
+        matches: Dict[int, Tuple[int, int]] = {}
+        with self._lock:
+            for p in prefixes:
+                i = bisect_left(self._keys, (p, -1))
+                while i < len(self._keys) and self._keys[i][0].startswith(p):
+                    key, entry_id = self._keys[i]
+                    rank = (key != p, len(key))
+                    if entry_id not in matches or rank < matches[entry_id]:
+                        matches[entry_id] = rank
+                    i += 1
+            ranked = sorted(matches, key=lambda entry_id: (matches[entry_id], entry_id))
+            return [self._entries[entry_id] for entry_id in ranked[:limit]]
+
+    def suggest(self, query: str, limit: int = 10) -> Optional[Dict[str, Any]]:
+        """
+        駅名候補APIと同じ形式 ({"Result": [...]}) で候補を返す
+
+        ローカルで応答するのは、全駅を登録済み (complete) の場合か、APIが応答済みの入力の場合だけで、
+        それ以外はNoneを返す（クライアントはAPIに問い合わせる）。前方一致する駅が一部しか登録されて
+        いない状態で、APIより少ない候補を返さないようにするため。
+        """
+        if not self.complete:
+            key = self._query_key(query)
+            with self._lock:
+                if key not in self._answered:
+                    return None
+        return {"Result": self.search(query, limit)}
+
+    def save(self, path: str) -> None:
+        """インデックスに登録された駅とAPIが応答済みの入力をJSONファイルに保存"""
+        with self._lock:
+            entries = list(self._entries)
+            answered = sorted(self._answered)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"Result": entries, "Queries": answered}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "StationIndex":
+        """
+        save() で保存したJSONファイル（または駅名候補APIの応答）からインデックスを作成
+
+        全駅のリストから作成したファイルであれば complete=True を指定する。
+        """
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls(**kwargs)
+        index.add_suggestions(data)
+        index._answered.update(q for q in data.get("Queries") or [] if isinstance(q, str))
+        return index
\ No newline at end of file
@@ -7,12 +7,24 @@ setup(
     author="choko",
     author_email="choko@example.com",
     packages=find_packages(),
+    package_data={
+        "YTFP.benchmarks": ["data/*.html", "data/*.json"],
+    },
     install_requires=[
         "requests>=2.25.0",
         "beautifulsoup4>=4.9.0",
         "aiohttp>=3.8.0",
     ],
     extras_require={
+        "lxml": [
+            "lxml>=4.6.0",
+        ],
+        "msgpack": [
+            "msgpack>=1.0.0",
+        ],
+        "zstd": [
+            "zstandard>=0.15.0",
+        ],
         "dev": [
             "pytest>=6.0.0",
             "pytest-asyncio>=0.16.0",
@@ -0,0 +1,43 @@
+"""
+テスト共通のフィクスチャ
+
+検索結果ページは tests/data と YTFP/benchmarks/data（ベンチマークと共用の同梱ページ）に置き、
+*.golden.json には変更前のパーサー（html.parser・ページ全体の解析）の出力を保存しています。
+"""
+
+import json
+import os
+
+import pytest
+
+from YTFP.benchmarks.fixtures import RESULT_PAGE
+from YTFP.parser import PARSER_ENGINES
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# ページ名 -> HTMLファイル
+PAGES = {
+    "result_page": RESULT_PAGE,
+    "simple_page": os.path.join(DATA_DIR, "simple_page.html"),
+}
+
+def read_text(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def load_golden(name):
+    """変更前のパーサーの出力"""
+    with open(os.path.join(DATA_DIR, f"{name}.golden.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.fixture(params=sorted(PAGES))
+def page(request):
+    """(HTML, 期待する経路のリスト)"""
+    return read_text(PAGES[request.param]), load_golden(request.param)
+
+@pytest.fixture(params=sorted(PARSER_ENGINES))
+def engine(request):
+    """パーサーエンジン名（ライブラリがない場合はスキップ）"""
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+    return request.param
\ No newline at end of file
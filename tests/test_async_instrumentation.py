@@ -0,0 +1,78 @@
+"""
+非同期クライアントの計測イベントのテスト
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import PAGES, load_golden, read_text
+from YTFP.async_api import AsyncYahooTransitAPI
+from YTFP.instrumentation import Instrumentation
+
+class _Content:
+    def __init__(self, body):
+        self._body = body
+
+    async def iter_chunked(self, size):
+        for i in range(0, len(self._body), size):
+            yield self._body[i:i + size]
+
+class _StreamResponse:
+    charset = "utf-8"
+    status = 200
+
+    def __init__(self, body):
+        self.content = _Content(body)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+class _API(AsyncYahooTransitAPI):
+    def __init__(self, html, **kwargs):
+        self.events = []
+        super().__init__(instrumentation=Instrumentation([self.events.append]), **kwargs)
+        self._html = html
+
+    async def _ensure_session(self):
+        pass
+
+    async def _get(self, url, endpoint, params=None, json=False, stream=False):
+        if stream:
+            return _StreamResponse(self._html.encode("utf-8")), time.perf_counter()
+        return self._html
+
+def test_stream_emits_request_download_and_parse_events():
+    api = _API(read_text(PAGES["simple_page"]))
+
+    async def main():
+        return [route async for route in api.search_routes_stream("大阪", "新大阪")]
+
+    assert asyncio.run(main()) == load_golden("simple_page")
+    names = [event.name for event in api.events]
+    assert sorted(names) == ["download", "parse", "request"]
+    request = next(event for event in api.events if event.name == "request")
+    assert request.labels == {"endpoint": "search", "status": 200}
+
+def test_parse_event_excludes_semaphore_wait():
+    executor = ThreadPoolExecutor(max_workers=2)
+    api = _API(read_text(PAGES["simple_page"]), parse_executor=executor, max_pending_parses=1)
+
+    async def main():
+        await api._ensure_session()
+        api._parse_semaphore = asyncio.Semaphore(1)
+        await api._parse_semaphore.acquire()
+        task = asyncio.ensure_future(api.search_routes_async("大阪", "新大阪"))
+        await asyncio.sleep(0.2)
+        api._parse_semaphore.release()
+        return await task
+
+    try:
+        assert asyncio.run(main()) == load_golden("simple_page")
+    finally:
+        executor.shutdown()
+    parse = [event for event in api.events if event.name == "parse"]
+    assert len(parse) == 1 and parse[0].duration < 0.2
\ No newline at end of file
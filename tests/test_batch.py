@@ -0,0 +1,55 @@
+"""
+バッチ検索 (search_many) のテスト
+"""
+
+import asyncio
+
+import pytest
+
+from YTFP.api import YahooTransitAPI
+from YTFP.async_api import AsyncYahooTransitAPI
+
+class _QueryError(Exception):
+    pass
+
+def _queries(count, fail_at=None):
+    for i in range(count):
+        if i == fail_at:
+            raise _QueryError(i)
+        yield (f"駅{i}", "東京")
+
+class _SyncAPI(YahooTransitAPI):
+    def search_routes(self, from_station, to_station, **kwargs):
+        return [{"route_id": from_station}]
+
+class _AsyncAPI(AsyncYahooTransitAPI):
+    async def _ensure_session(self):
+        pass
+
+    async def search_routes_async(self, from_station, to_station, **kwargs):
+        await asyncio.sleep(0.001)
+        return [{"route_id": from_station}]
+
+def test_sync_search_many_returns_all_results():
+    results = list(_SyncAPI().search_many(_queries(10), concurrency=3))
+    assert sorted(result.index for result in results) == list(range(10))
+
+def test_sync_search_many_raises_query_errors():
+    with pytest.raises(_QueryError):
+        list(_SyncAPI().search_many(_queries(10, fail_at=4), concurrency=3))
+
+async def _collect(api, queries, concurrency):
+    return [result async for result in api.search_many(queries, concurrency=concurrency)]
+
+def test_async_search_many_returns_all_results():
+    results = asyncio.run(_collect(_AsyncAPI(), _queries(10), 3))
+    assert sorted(result.index for result in results) == list(range(10))
+
+@pytest.mark.parametrize("concurrency", [1, 3, 20])
+def test_async_search_many_raises_query_errors(concurrency):
+    async def main():
+        with pytest.raises(_QueryError):
+            await asyncio.wait_for(_collect(_AsyncAPI(), _queries(10, fail_at=4), concurrency), timeout=5)
+        # 取り消したワーカーのタスクが残っていない
+        assert [task for task in asyncio.all_tasks() if task is not asyncio.current_task()] == []
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+メモリ内キャッシュ（LRU）のテスト
+"""
+
+import json
+
+from YTFP.cache import CACHE_FRESH, CACHE_MISS, CACHE_STALE, CacheManager
+
+def _cache(**kwargs):
+    return CacheManager(use_file_cache=False, ttl=3600, **kwargs)
+
+def _size(data):
+    return len(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+def test_lookup_moves_entry_to_most_recent():
+    cache = _cache(max_memory_entries=3)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    assert cache.get("a") == "a"
+    assert list(cache.memory_cache) == ["b", "c", "a"]
+    cache.set("d", "d")
+    # 参照された "a" ではなく、最も長く使われていない "b" が削除される
+    assert list(cache.memory_cache) == ["c", "a", "d"]
+    assert cache.get("b") is None
+
+def test_overwrite_moves_entry_to_most_recent():
+    cache = _cache(max_memory_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 3)
+    cache.set("c", 4)
+    assert list(cache.memory_cache) == ["a", "c"]
+    assert cache.get("a") == 3
+
+def test_evicts_by_entry_count():
+    cache = _cache(max_memory_entries=2)
+    for i in range(5):
+        cache.set(f"key{i}", i)
+    assert list(cache.memory_cache) == ["key3", "key4"]
+    assert cache.get_stats()["evictions"] == 3
+
+def test_evicts_by_memory_bytes():
+    value = "x" * 100
+    cache = _cache(max_memory_entries=100, max_memory_bytes=_size(value) * 2)
+    cache.set("a", value)
+    cache.set("b", value)
+    assert cache.memory_bytes == _size(value) * 2
+    cache.set("c", value)
+    assert list(cache.memory_cache) == ["b", "c"]
+    assert cache.memory_bytes == _size(value) * 2
+    # 上限を超える1件だけのエントリは削除しない
+    large = "y" * 1000
+    cache.set("d", large)
+    assert list(cache.memory_cache) == ["d"]
+    assert cache.memory_bytes == _size(large)
+    assert cache.get_stats()["evictions"] == 3
+
+def test_memory_bytes_follow_overwrite_and_delete():
+    cache = _cache(max_memory_bytes=10000)
+    cache.set("a", "x" * 10)
+    cache.set("a", "x" * 50)
+    assert cache.memory_bytes == _size("x" * 50)
+    cache.invalidate("a")
+    assert cache.memory_bytes == 0
+
+def test_stats_count_hits_misses_and_expirations():
+    cache = _cache(max_memory_entries=10)
+    cache.set("a", 1)
+    cache.set("expired", 2, ttl=-1)
+    assert cache.lookup("a") == (CACHE_FRESH, 1)
+    assert cache.lookup("missing") == (CACHE_MISS, None)
+    assert cache.lookup("expired") == (CACHE_MISS, None)
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["expirations"] == 1
+    assert stats["evictions"] == 0
+    assert stats["memory_entries"] == 1
+
+def test_stats_count_stale_hits():
+    cache = _cache(stale_ttl=60)
+    cache.set("a", 1, ttl=-1)
+    assert cache.lookup("a") == (CACHE_STALE, 1)
+    assert cache.get_stats()["stale_hits"] == 1
\ No newline at end of file
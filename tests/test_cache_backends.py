@@ -0,0 +1,95 @@
+"""
+永続キャッシュバックエンドのテスト
+"""
+
+import os
+import threading
+
+import pytest
+
+from YTFP.cache import CacheManager
+from YTFP.cache_backends import _EXPIRY, CacheCodec, FileCacheBackend, SQLiteCacheBackend
+
+class _Payload:
+    """読み込まれると executed に記録するpickleペイロード"""
+
+    executed = []
+
+    def __reduce__(self):
+        return (_Payload.executed.append, ("loaded",))
+
+def _backend(kind, cache_dir, codec):
+    if kind == "file":
+        return FileCacheBackend(cache_dir, codec)
+    return SQLiteCacheBackend(os.path.join(cache_dir, "cache.sqlite3"), codec=codec)
+
+@pytest.mark.parametrize("kind", ["file", "sqlite"])
+def test_pickle_entries_are_ignored_unless_configured(tmp_path, kind):
+    cache_dir = str(tmp_path)
+    _backend(kind, cache_dir, CacheCodec("pickle")).set("key", 1e12, _Payload())
+
+    assert CacheManager(cache_dir=cache_dir, backend=kind).get("key") is None
+    assert _Payload.executed == []
+
+    _backend(kind, cache_dir, CacheCodec("pickle")).set("safe", 1e12, {"a": 1})
+    assert CacheManager(cache_dir=cache_dir, backend=kind, serializer="pickle").get("safe") == {"a": 1}
+
+def test_safe_formats_are_readable_after_changing_serializer():
+    pytest.importorskip("msgpack")
+    assert CacheCodec("json").decode(CacheCodec("msgpack").encode([1, "a"])) == [1, "a"]
+
+@pytest.mark.parametrize("serializer,compression,body", [
+    ("json", "zstd", b"not zstd"),
+    ("json", "zlib", b"not zlib"),
+    ("pickle", None, b"\x80\x05"),
+    ("pickle", None, b"\x80\x05\x95\x10\x00\x00\x00\x00\x00\x00\x00\x8c\x03nomodule\x94"),
+])
+def test_corrupt_file_entries_are_misses(tmp_path, serializer, compression, body):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    codec = CacheCodec(serializer, compression)
+    backend = FileCacheBackend(str(tmp_path), codec)
+    header = codec.encode(None)[:codec.header_size]
+    with open(backend._get_cache_file_path("key"), "wb") as f:
+        f.write(header + _EXPIRY.pack(1e12) + body)
+    assert backend.get("key") is None
+
+def test_corrupt_sqlite_entries_are_misses(tmp_path):
+    pytest.importorskip("zstandard")
+    codec = CacheCodec("json", "zstd")
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), codec=codec)
+    header = codec.encode(None)[:codec.header_size]
+    backend._connect().execute("INSERT INTO cache VALUES (?, ?, ?)", ("key", 1e12, header + b"junk"))
+    assert backend.get("key") is None
+
+
+@pytest.mark.parametrize("kind", ["file", "sqlite"])
+def test_delete_expired_keeps_rewritten_entries(tmp_path, kind):
+    backend = _backend(kind, str(tmp_path), CacheCodec())
+    backend.set("old", 100.0, "old")
+    backend.set("new", 100.0, "old")
+    # 期限切れと判定した後に他のプロセスが書き込んだ場合
+    backend.set("new", 1e12, "new")
+    assert backend.delete_expired("old", 200.0)
+    assert not backend.delete_expired("new", 200.0)
+    assert backend.get("old") is None
+    assert backend.get("new") == (1e12, "new")
+
+def test_purge_expired_holds_file_lock(tmp_path):
+    pytest.importorskip("fcntl")
+    backend = FileCacheBackend(str(tmp_path), lock=True)
+    backend.set("old", 100.0, "old")
+    backend.set("new", 100.0, "old")
+    result = []
+    with backend._locked():
+        thread = threading.Thread(target=lambda: result.append(backend.purge_expired(200.0)))
+        thread.start()
+        thread.join(0.2)
+        # ロックを保持している間は削除されない
+        assert thread.is_alive()
+        # ロックを持つ他のプロセスの書き込みの代わり
+        FileCacheBackend(str(tmp_path)).set("new", 1e12, "new")
+    thread.join(5)
+    assert result == [1]
+    assert backend.get("old") is None
+    assert backend.get("new") == (1e12, "new")
\ No newline at end of file
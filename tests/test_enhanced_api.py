@@ -0,0 +1,142 @@
+"""
+キャッシュ対応クライアントのテスト
+"""
+
+import asyncio
+import threading
+
+from YTFP.api import YahooTransitAPI
+from YTFP.async_api import AsyncYahooTransitAPI
+from YTFP.async_enhanced_api import AsyncEnhancedYahooTransitAPI
+from YTFP.cache import CacheManager
+from YTFP.cache_policy import RouteCachePolicy
+from YTFP.enhanced_api import EnhancedYahooTransitAPI
+
+def test_async_close_cancels_and_awaits_refresh():
+    state = {"started": False, "cancelled": False}
+
+    async def fetch(cache_key):
+        state["started"] = True
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def main():
+        api = AsyncEnhancedYahooTransitAPI(cache_config=False)
+        api._schedule_refresh("key", fetch, "key")
+        await asyncio.sleep(0)
+        assert state["started"]
+        await api.close()
+        assert state["cancelled"]
+        assert not api._inflight.in_flight("key")
+        # 閉じた後は更新を開始しない
+        api._schedule_refresh("key", fetch, "key")
+        assert not api._inflight.in_flight("key")
+        assert api._session is None
+
+    asyncio.run(main())
+
+def test_async_refresh_errors_are_retrieved():
+    async def fetch(cache_key):
+        raise RuntimeError("boom")
+
+    async def main():
+        api = AsyncEnhancedYahooTransitAPI(cache_config=False)
+        api._schedule_refresh("key", fetch, "key")
+        await asyncio.sleep(0.01)
+        assert not api._refresh_tasks
+        await api.close()
+
+    asyncio.run(main())
+
+def test_sync_close_waits_for_refresh_and_stops_scheduling():
+    started = threading.Event()
+    release = threading.Event()
+    finished = []
+
+    def fetch(cache_key):
+        started.set()
+        release.wait(5)
+        finished.append(cache_key)
+
+    api = EnhancedYahooTransitAPI(cache_config=False)
+    api._schedule_refresh("key", fetch, "key")
+    assert started.wait(5)
+    threading.Timer(0.05, release.set).start()
+    api.close()
+    assert finished == ["key"]
+    # 閉じた後は更新用のスレッドを作り直さない
+    api._schedule_refresh("other", fetch, "other")
+    assert api._refresh_executor is None
+    assert finished == ["key"]
+
+
+class _RecordingAPI(EnhancedYahooTransitAPI):
+    def __init__(self, **kwargs):
+        super().__init__(cache_config={"use_file_cache": False}, cache_policy=RouteCachePolicy(), **kwargs)
+        self.requests = []
+
+    def _fetch_routes(self, cache_key, from_station, to_station, kwargs, ttl=None):
+        self.requests.append(kwargs)
+        return super()._fetch_routes(cache_key, from_station, to_station, kwargs, ttl)
+
+class _AsyncRecordingAPI(AsyncEnhancedYahooTransitAPI):
+    def __init__(self, **kwargs):
+        super().__init__(cache_config={"use_file_cache": False}, cache_policy=RouteCachePolicy(), **kwargs)
+        self.requests = []
+
+    async def _fetch_routes(self, cache_key, from_station, to_station, kwargs, ttl=None):
+        self.requests.append(kwargs)
+        return await super()._fetch_routes(cache_key, from_station, to_station, kwargs, ttl)
+
+def _departures(kwargs):
+    """指定した時刻から0・3・10分後に出発する経路（上流の検索結果の代わり）"""
+    start = int(kwargs["time"][:2]) * 60 + int(kwargs["time"][2:])
+    return [{"departure_time": f"{(start + m) // 60:02d}:{(start + m) % 60:02d}"} for m in (0, 3, 10)]
+
+def test_route_fetch_uses_requested_time(monkeypatch):
+    monkeypatch.setattr(YahooTransitAPI, "search_routes",
+                        lambda self, from_station, to_station, **kwargs: _departures(kwargs))
+    api = _RecordingAPI()
+    first = api.search_routes("渋谷", "新大阪", date="20250522", time="0901")
+    # 同じ5分枠のためキャッシュを共有し、09:03より前に出発する経路は除かれる
+    second = api.search_routes("渋谷", "新大阪", date="20250522", time="0903")
+    assert api.requests == [{"date": "20250522", "time": "0901"}]
+    assert [route["departure_time"] for route in first] == ["09:01", "09:04", "09:11"]
+    assert [route["departure_time"] for route in second] == ["09:04", "09:11"]
+
+def test_async_route_fetch_uses_requested_time(monkeypatch):
+    async def search_routes_async(self, from_station, to_station, **kwargs):
+        return _departures(kwargs)
+
+    monkeypatch.setattr(AsyncYahooTransitAPI, "search_routes_async", search_routes_async)
+
+    async def main():
+        api = _AsyncRecordingAPI()
+        first = await api.search_routes_async("渋谷", "新大阪", date="20250522", time="0901")
+        second = await api.search_routes_async("渋谷", "新大阪", date="20250522", time="0903")
+        streamed = [route async for route in api.search_routes_stream(
+            "渋谷", "新大阪", date="20250522", time="0904")]
+        return api, first, second, streamed
+
+    api, first, second, streamed = asyncio.run(main())
+    assert api.requests == [{"date": "20250522", "time": "0901"}]
+    assert [route["departure_time"] for route in first] == ["09:01", "09:04", "09:11"]
+    assert [route["departure_time"] for route in second] == ["09:04", "09:11"]
+    assert [route["departure_time"] for route in streamed] == ["09:04", "09:11"]
+
+def test_filter_routes_keeps_routes_outside_the_bucket():
+    policy = RouteCachePolicy(bucket_minutes=5)
+    routes = [{"departure_time": t} for t in ("23:55", "23:57", "23:58", "00:02", None)]
+    kept = policy.filter_routes(routes, {"date": "20250522", "time": "2358"})
+    assert [route["departure_time"] for route in kept] == ["23:58", "00:02", None]
+    assert policy.filter_routes(routes, {}) is routes
+
+def test_zero_ttl_is_not_replaced_by_default():
+    cache = CacheManager(use_file_cache=False, ttl=3600)
+    cache.set("key", "value", ttl=0)
+    assert cache.get("key") is None
+    asyncio.run(cache.aset("key", "value", ttl=0))
+    assert cache.get("key") is None
\ No newline at end of file
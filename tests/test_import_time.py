@@ -0,0 +1,35 @@
+"""
+インポート時間と遅延読み込みのテスト
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from YTFP.benchmarks.import_time import _package_root
+
+def _loaded_modules(code, modules):
+    """新しいプロセスでcodeを実行し、modulesのうち読み込まれたものを返す"""
+    script = f"{code}\nimport json, sys\nprint(json.dumps([m for m in {list(modules)!r} if m in sys.modules]))"
+    completed = subprocess.run([sys.executable, "-c", script], cwd=_package_root(),
+                               stdout=subprocess.PIPE, check=True, universal_newlines=True)
+    return json.loads(completed.stdout)
+
+def test_import_does_not_load_heavy_dependencies():
+    assert _loaded_modules("import YTFP", ("requests", "aiohttp", "bs4", "lxml")) == []
+
+def test_sync_client_does_not_load_aiohttp():
+    pytest.importorskip("requests")
+    assert _loaded_modules("from YTFP import YahooTransitAPI", ("aiohttp",)) == []
+
+def test_async_client_does_not_load_requests():
+    pytest.importorskip("aiohttp")
+    assert _loaded_modules("from YTFP import AsyncYahooTransitAPI", ("requests",)) == []
+
+def test_import_time_benchmark_does_not_load_stub_server():
+    assert _loaded_modules("import YTFP.benchmarks.import_time",
+                           ("aiohttp", "YTFP.benchmarks.stub_server")) == []
+    assert _loaded_modules("from YTFP.benchmarks import StubServer", ("YTFP.benchmarks.stub_server",)) == [
+        "YTFP.benchmarks.stub_server"]
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+計測イベントの集計・出力のテスト
+"""
+
+import socket
+
+import pytest
+
+from YTFP.instrumentation import Histogram, Instrumentation, MetricsAggregator, StatsDExporter, TimingEvent
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    histogram = Histogram(buckets=(0.1, 0.5, 1.0))
+    for value in (0.05, 0.1, 0.3, 0.5, 2.0):
+        histogram.observe(value)
+    # 上限ちょうどの値はそのバケットに含まれる（Prometheusの le と同じ）
+    assert histogram.cumulative() == [(0.1, 2), (0.5, 4), (1.0, 4), (float("inf"), 5)]
+    assert histogram.count == 5
+    assert histogram.sum == pytest.approx(2.95)
+
+def test_histogram_quantile_uses_bucket_upper_bound():
+    histogram = Histogram(buckets=(0.1, 0.5, 1.0))
+    assert histogram.quantile(0.5) is None
+    for value in (0.05, 0.05, 0.3, 0.7):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 0.5
+    assert histogram.quantile(0.99) == 1.0
+    histogram.observe(5.0)
+    assert histogram.quantile(1.0) == float("inf")
+
+def test_aggregator_groups_by_name_and_selected_labels():
+    aggregator = MetricsAggregator(buckets=(0.1, 1.0))
+    instrumentation = Instrumentation([aggregator])
+    instrumentation.emit("request", 0.05, endpoint="search", status=200, url="ignored")
+    instrumentation.emit("request", 0.5, endpoint="search", status=200)
+    instrumentation.emit("request", 0.2, endpoint="suggest", status=200)
+    instrumentation.emit("parse", 0.01, engine=None)
+    snapshot = aggregator.snapshot()
+    assert [entry["labels"] for entry in snapshot["request"]] == [
+        {"endpoint": "search", "status": "200"},
+        {"endpoint": "suggest", "status": "200"},
+    ]
+    search = snapshot["request"][0]
+    assert (search["count"], search["p50"], search["p99"]) == (2, 0.1, 1.0)
+    assert snapshot["parse"][0]["labels"] == {}
+    aggregator.reset()
+    assert aggregator.snapshot() == {}
+
+def test_to_prometheus_text_format():
+    aggregator = MetricsAggregator(buckets=(0.1, 1.0))
+    aggregator(TimingEvent("request", 0.05, {"endpoint": "search", "status": 200}))
+    aggregator(TimingEvent("request", 2.0, {"endpoint": "search", "status": 200}))
+    aggregator(TimingEvent("parse", 0.25, {"error": 'Bad "quote"\n'}))
+    assert aggregator.to_prometheus(prefix="test") == (
+        '# TYPE test_parse_seconds histogram\n'
+        'test_parse_seconds_bucket{error="Bad \\"quote\\"\\n",le="0.1"} 0\n'
+        'test_parse_seconds_bucket{error="Bad \\"quote\\"\\n",le="1.0"} 1\n'
+        'test_parse_seconds_bucket{error="Bad \\"quote\\"\\n",le="+Inf"} 1\n'
+        'test_parse_seconds_sum{error="Bad \\"quote\\"\\n"} 0.25\n'
+        'test_parse_seconds_count{error="Bad \\"quote\\"\\n"} 1\n'
+        '# TYPE test_request_seconds histogram\n'
+        'test_request_seconds_bucket{endpoint="search",status="200",le="0.1"} 1\n'
+        'test_request_seconds_bucket{endpoint="search",status="200",le="1.0"} 1\n'
+        'test_request_seconds_bucket{endpoint="search",status="200",le="+Inf"} 2\n'
+        'test_request_seconds_sum{endpoint="search",status="200"} 2.05\n'
+        'test_request_seconds_count{endpoint="search",status="200"} 2\n'
+    )
+
+def test_prometheus_type_line_is_written_once_per_metric():
+    aggregator = MetricsAggregator(buckets=(1.0,))
+    aggregator(TimingEvent("request", 0.1, {"endpoint": "search"}))
+    aggregator(TimingEvent("request", 0.1, {"endpoint": "suggest"}))
+    text = aggregator.to_prometheus()
+    assert text.count("# TYPE yahoosc_request_seconds histogram") == 1
+    assert 'yahoosc_request_seconds_count{endpoint="suggest"} 1' in text
+
+def test_statsd_line_format():
+    exporter = StatsDExporter(prefix="app")
+    tagged = StatsDExporter(prefix="app", tags=True)
+    try:
+        event = TimingEvent("request", 0.0123456, {"endpoint": "search", "status": 200, "error": None})
+        assert exporter.format(event) == "app.request:12.346|ms"
+        assert tagged.format(event) == "app.request:12.346|ms|#endpoint:search,status:200"
+        assert tagged.format(TimingEvent("parse", 0.5, {})) == "app.parse:500.000|ms"
+    finally:
+        exporter.close()
+        tagged.close()
+
+def test_statsd_sends_one_datagram_per_event():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(5)
+    exporter = StatsDExporter(port=receiver.getsockname()[1], tags=True)
+    try:
+        exporter(TimingEvent("ttfb", 0.002, {"endpoint": "suggest"}))
+        assert receiver.recv(1024) == b"yahoosc.ttfb:2.000|ms|#endpoint:suggest"
+    finally:
+        exporter.close()
+        receiver.close()
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+ロギング機能のテスト
+"""
+
+import logging
+import threading
+from logging.handlers import QueueHandler
+
+import pytest
+
+from YTFP.logger import Logger
+
+class _RecordingHandler(logging.Handler):
+    """処理したレコードと処理したスレッドを記録するハンドラ"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record.getMessage(), threading.current_thread()))
+
+class _Arg:
+    """文字列に変換された回数を数える引数"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "arg"
+
+@pytest.fixture
+def make_logger(request):
+    """テストごとに独立したlogging.Loggerを使うLoggerを作る"""
+    created = []
+
+    def make(*handlers, **kwargs):
+        log = Logger(**kwargs)
+        log._logger = logging.getLogger(f"yahoosc.test.{request.node.name}.{len(created)}")
+        log._logger.propagate = False
+        for handler in handlers:
+            log._logger.addHandler(handler)
+        created.append(log)
+        return log
+
+    yield make
+    for log in created:
+        log.disable_queue()
+        for handler in list(log._logger.handlers):
+            log._logger.removeHandler(handler)
+
+def test_queue_moves_handlers_to_listener_thread(make_logger):
+    handler = _RecordingHandler()
+    log = make_logger(handler, use_queue=True)
+    log._logger.setLevel(logging.INFO)
+    log.info("経路検索: %s", "渋谷")
+    assert [type(h) for h in log.logger.handlers] == [QueueHandler]
+    log.disable_queue()
+    [(message, thread)] = handler.records
+    assert message == "経路検索: 渋谷"
+    assert thread is not threading.current_thread()
+    # 停止後は元のハンドラに戻る
+    assert log.logger.handlers == [handler]
+
+def test_queue_is_enabled_by_environment(make_logger, monkeypatch):
+    monkeypatch.setenv("YAHOOSC_LOG_QUEUE", "1")
+    assert [type(h) for h in make_logger(_RecordingHandler()).logger.handlers] == [QueueHandler]
+    monkeypatch.setenv("YAHOOSC_LOG_QUEUE", "0")
+    assert [type(h) for h in make_logger(_RecordingHandler()).logger.handlers] == [_RecordingHandler]
+
+def test_enable_queue_is_idempotent(make_logger):
+    log = make_logger(_RecordingHandler(), use_queue=True)
+    log.logger
+    listener = log._listener
+    log.enable_queue()
+    assert log._listener is listener
+    assert len(log.logger.handlers) == 1
+
+def test_arguments_are_not_formatted_when_level_is_disabled(make_logger):
+    handler = _RecordingHandler()
+    log = make_logger(handler)
+    log._logger.setLevel(logging.WARNING)
+    arg = _Arg()
+    log.debug("キャッシュヒット: %s", arg)
+    log.info("キャッシュヒット: %s", arg)
+    assert arg.formatted == 0
+    assert not log.isEnabledFor(logging.DEBUG)
+    assert handler.records == []
+    log.warning("キャッシュヒット: %s", arg)
+    assert arg.formatted == 1
+    assert handler.records[0][0] == "キャッシュヒット: arg"
+
+def test_default_handlers_use_configured_level(make_logger, monkeypatch, tmp_path):
+    monkeypatch.setenv("YAHOOSC_LOG_LEVEL", "error")
+    log_file = tmp_path / "yahoosc.log"
+    log = make_logger(log_file=str(log_file))
+    log.error("失敗")
+    log.warning("出力されない")
+    assert log.logger.level == logging.ERROR
+    assert [h.level for h in log.logger.handlers] == [logging.ERROR, logging.ERROR]
+    for handler in log.logger.handlers:
+        handler.flush()
+        if isinstance(handler, logging.FileHandler):
+            handler.close()
+    contents = log_file.read_text(encoding="utf-8")
+    assert "ERROR - 失敗" in contents and "出力されない" not in contents
\ No newline at end of file
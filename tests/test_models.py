@@ -0,0 +1,42 @@
+"""
+型付き経路モデルのテスト
+"""
+
+import pytest
+
+from conftest import load_golden
+from YTFP.models import Route, _format_minutes, _format_unit, routes_from_dicts
+
+@pytest.mark.parametrize("name", ["simple_page", "result_page"])
+def test_to_dict_round_trips_parser_output(name):
+    routes = load_golden(name)
+    assert [route.to_dict() for route in routes_from_dicts(routes)] == routes
+
+def test_numbers_are_parsed():
+    route = Route.from_dict({"total_time": "2時間38分（乗車2時間16分）", "transfers": "1回",
+                             "fare": "14,720円", "details": [
+                                 {"type": "transport", "line_name": "新幹線", "fare_segment": "1,240円"}]})
+    assert (route.total_time, route.transfers, route.fare) == (158, 1, 14720)
+    assert route.legs[0].fare_segment == 1240
+
+def test_only_non_canonical_strings_are_kept():
+    route = Route.from_dict({"total_time": "32分", "transfers": "1回", "fare": "1,240円", "details": [
+        {"type": "transport", "line_name": "新幹線", "fare_segment": "230円"}]})
+    assert route._sources is None and route.legs[0]._sources is None
+    route = Route.from_dict({"total_time": "2時間38分（乗車2時間16分）", "fare": "1,240円"})
+    assert route._sources == (("total_time", 158, "2時間38分（乗車2時間16分）"),)
+
+def test_changed_numbers_are_formatted():
+    route = Route.from_dict({"total_time": "32分", "fare": "1240円"})
+    assert route.to_dict() == {"total_time": "32分", "fare": "1240円"}
+    route.total_time = 60
+    route.fare = 1300
+    assert route.to_dict() == {"total_time": "1時間", "fare": "1,300円"}
+
+@pytest.mark.parametrize("minutes, text", [(None, None), (5, "5分"), (60, "1時間"), (65, "1時間5分")])
+def test_format_minutes(minutes, text):
+    assert _format_minutes(minutes) == text
+
+def test_format_unit():
+    assert _format_unit(None, "円") is None
+    assert _format_unit(1240, "円") == "1,240円"
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+パーサーの互換性テスト
+
+各エンジン・スコープ解析・ストリーミング解析が、
+変更前のパーサーと同じ経路情報を返すことを確認します。
+"""
+
+import json
+import os
+
+import pytest
+
+from YTFP.parser import IncrementalRouteParser, extract_routes_from_html
+
+from conftest import DATA_DIR, load_golden, read_text
+
+def _stream(html, chunk_size, **parser_options):
+    parser = IncrementalRouteParser(**parser_options)
+    routes = []
+    for start in range(0, len(html), chunk_size):
+        routes.extend(parser.feed(html[start:start + chunk_size]))
+    return routes + parser.close()
+
+def _with_next_data(html, next_data):
+    script = '<script id="__NEXT_DATA__" type="application/json">' + json.dumps(next_data) + '</script>'
+    return html.replace('</body>', script + '</body>')
+
+@pytest.mark.parametrize("scoped", [False, True])
+def test_engines_match_golden(page, engine, scoped):
+    html, expected = page
+    assert extract_routes_from_html(html, engine=engine, scoped=scoped) == expected
+
+@pytest.mark.parametrize("chunk_size", [1, 97, 4096, 1 << 20])
+def test_streaming_matches_golden(page, engine, chunk_size):
+    html, expected = page
+    assert _stream(html, chunk_size, engine=engine) == expected
+
+def test_streaming_returns_routes_before_end_of_page(page):
+    html, expected = page
+    parser = IncrementalRouteParser()
+    end = html.index('id="footer"')
+    assert parser.feed(html[:end]) == expected
+    assert parser.feed(html[end:]) == []
+    assert parser.close() == []
+
+# featureInfoListのキーは実際のページで検証されていないため、不完全な経路だけを含むデータで確認する
+_SKELETAL_NEXT_DATA = {"props": {"pageProps": {"naviSearchParam": {"featureInfoList": [
+    {"summaryInfo": {"departureTime": "09:00", "arrivalTime": "09:30", "totalTime": 30}},
+]}}}}
+
+def test_incomplete_json_falls_back_to_dom(page):
+    html, expected = page
+    html = _with_next_data(html, _SKELETAL_NEXT_DATA)
+    assert extract_routes_from_html(html) == expected
+    assert extract_routes_from_html(html, prefer_json=True) == expected
+
+@pytest.mark.parametrize("prefer_json", [False, True])
+def test_page_without_container_returns_no_routes(engine, prefer_json):
+    html = read_text(os.path.join(DATA_DIR, "simple_page.html"))
+    start = html.index('<div id="srline"')
+    end = html.index('<div id="footer"')
+    html = _with_next_data(html[:start] + html[end:], _SKELETAL_NEXT_DATA)
+    assert extract_routes_from_html(html, engine=engine, prefer_json=prefer_json) == []
+
+@pytest.mark.parametrize("prefer_json", [False, True])
+def test_streaming_follows_prefer_json(prefer_json):
+    html = _with_next_data(read_text(os.path.join(DATA_DIR, "simple_page.html")), _SKELETAL_NEXT_DATA)
+    expected = extract_routes_from_html(html, prefer_json=prefer_json)
+    assert _stream(html, 512, prefer_json=prefer_json) == expected
+
+def test_commented_container_is_ignored():
+    html = read_text(os.path.join(DATA_DIR, "simple_page.html"))
+    expected = load_golden("simple_page")
+    decoy = '<!-- <div id="srline" class="elmRouteDetail"> --><script>var t = \'<div id="srline">\';</script>'
+    html = html.replace('<div id="header">', decoy + '<div id="header">')
+    assert extract_routes_from_html(html, scoped=True) == expected
+    assert _stream(html, 256) == expected
+
+def test_parser_stops_buffering_after_container():
+    html = read_text(os.path.join(DATA_DIR, "simple_page.html"))
+    parser = IncrementalRouteParser()
+    parser.feed(html)
+    buffered = len(parser._buffer)
+    parser.feed("<div>" * 10000)
+    assert len(parser._buffer) == buffered
\ No newline at end of file
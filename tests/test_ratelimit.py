@@ -0,0 +1,159 @@
+"""
+レートリミッターのテスト
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from YTFP import ratelimit
+from YTFP.async_api import AsyncYahooTransitAPI
+from YTFP.errors import RateLimitError
+from YTFP.ratelimit import FileTokenBucket, RateLimiter, TokenBucket
+
+URL = "https://transit.yahoo.co.jp/search/result"
+
+class _Clock:
+    """テスト用の手動で進める時計"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+class _Response:
+    status = 200
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def text(self):
+        return "<html></html>"
+
+class _Session:
+    async def get(self, url, params=None, **kwargs):
+        return _Response()
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """ratelimitモジュールのsleepを記録のみ行うものに置き換える"""
+    recorded = []
+
+    async def fake_async_sleep(seconds):
+        recorded.append(seconds)
+
+    monkeypatch.setattr(ratelimit.time, "sleep", recorded.append)
+    monkeypatch.setattr(ratelimit.asyncio, "sleep", fake_async_sleep)
+    return recorded
+
+def test_burst_up_to_capacity_then_waits():
+    clock = _Clock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+def test_tokens_refill_with_elapsed_time():
+    clock = _Clock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+    bucket.reserve()
+    bucket.reserve()
+    clock.advance(0.5)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+
+def test_refill_does_not_exceed_capacity():
+    clock = _Clock()
+    bucket = TokenBucket(rate=10, capacity=2, clock=clock)
+    clock.advance(60)
+    assert [bucket.reserve() for _ in range(2)] == [0, 0]
+    assert bucket.reserve() == pytest.approx(0.1)
+
+def test_max_wait_raises_without_consuming():
+    clock = _Clock()
+    bucket = TokenBucket(rate=1, capacity=1, clock=clock)
+    bucket.reserve()
+    with pytest.raises(RateLimitError) as excinfo:
+        bucket.reserve(max_wait=0.5)
+    assert excinfo.value.retry_after == pytest.approx(1.0)
+    clock.advance(1)
+    assert bucket.reserve(max_wait=0.5) == 0
+
+def test_limiter_keeps_buckets_per_endpoint():
+    clock = _Clock()
+    limiter = RateLimiter(rate=1, capacity=1, endpoint_limits={"suggest": (5, 5)}, clock=clock)
+    assert limiter.reserve(URL, "search") == 0
+    assert limiter.reserve(URL, "search") == pytest.approx(1.0)
+    assert [limiter.reserve(URL, "suggest") for _ in range(5)] == [0] * 5
+
+def test_bucket_is_shared_across_threads():
+    clock = _Clock()
+    limiter = RateLimiter(rate=10, capacity=2, clock=clock)
+    waits = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(5):
+            wait = limiter.reserve(URL, "search")
+            with lock:
+                waits.append(wait)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 時計を止めているため、2件のバーストの後は0.1秒ずつ待ち時間が伸びる
+    expected = [0, 0] + [0.1 * i for i in range(1, 19)]
+    assert sorted(waits) == pytest.approx(expected)
+
+def test_bucket_is_shared_with_async_client(sleeps):
+    clock = _Clock()
+    limiter = RateLimiter(rate=10, capacity=2, clock=clock)
+    assert [limiter.reserve(URL, "search") for _ in range(2)] == [0, 0]
+
+    async def main():
+        api = AsyncYahooTransitAPI(session=_Session(), rate_limiter=limiter)
+        await api._get(URL, "search")
+        await api._get(URL, "search")
+
+    asyncio.run(main())
+    assert sleeps == pytest.approx([0.1, 0.2])
+    assert limiter.reserve(URL, "search") == pytest.approx(0.3)
+
+def test_shared_bucket_state_is_stored_in_file(tmp_path):
+    clock = _Clock()
+    first = FileTokenBucket(str(tmp_path / "bucket"), rate=1, capacity=1, clock=clock)
+    second = FileTokenBucket(str(tmp_path / "bucket"), rate=1, capacity=1, clock=clock)
+    assert first.reserve() == 0
+    assert second.reserve() == pytest.approx(1.0)
+    clock.advance(2)
+    assert first.reserve() == 0
+
+def test_shared_bucket_is_reserved_off_the_event_loop(tmp_path, sleeps, monkeypatch):
+    limiter = RateLimiter(rate=1, capacity=1, shared_dir=str(tmp_path), clock=_Clock())
+    threads = []
+    reserve = FileTokenBucket.reserve
+
+    def recording_reserve(self, *args, **kwargs):
+        threads.append(threading.current_thread())
+        return reserve(self, *args, **kwargs)
+
+    monkeypatch.setattr(FileTokenBucket, "reserve", recording_reserve)
+
+    async def main():
+        await limiter.acquire_async(URL, "search")
+        await limiter.acquire_async(URL, "search")
+
+    asyncio.run(main())
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+    assert sleeps == pytest.approx([1.0])
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+再試行ポリシーのテスト
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+import aiohttp
+import pytest
+import requests
+
+from YTFP import api as api_module
+from YTFP import async_api as async_api_module
+from YTFP import retry
+from YTFP.api import YahooTransitAPI
+from YTFP.async_api import AsyncYahooTransitAPI
+from YTFP.errors import RateLimitError, RequestError
+from YTFP.retry import RetryPolicy
+
+URL = "https://transit.yahoo.co.jp/search/result"
+
+class _Response:
+    """requests.Response の代わりに使う最小限のレスポンス"""
+
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.reason = "Reason"
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+class _Session:
+    """用意した結果（レスポンスまたは例外）を順に返すセッション"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def get(self, url, params=None, **kwargs):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+class _AsyncSession(_Session):
+    async def get(self, url, params=None, **kwargs):
+        return super().get(url, params)
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """クライアントの待機を記録のみ行うものに置き換える"""
+    recorded = []
+
+    async def fake_async_sleep(seconds):
+        recorded.append(seconds)
+
+    monkeypatch.setattr(api_module.time, "sleep", recorded.append)
+    monkeypatch.setattr(async_api_module.asyncio, "sleep", fake_async_sleep)
+    return recorded
+
+def _api(session, **policy):
+    client = YahooTransitAPI(retry_policy=RetryPolicy(jitter=False, **policy))
+    client.session = session
+    return client
+
+def test_backoff_grows_exponentially_up_to_cap():
+    policy = RetryPolicy(backoff_factor=0.5, max_backoff=3.0, jitter=False)
+    assert [policy.backoff(n) for n in range(1, 6)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+def test_jitter_stays_within_backoff(monkeypatch):
+    policy = RetryPolicy(backoff_factor=1.0, max_backoff=4.0)
+    bounds = []
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: bounds.append((low, high)) or high)
+    for attempt in range(1, 5):
+        policy.backoff(attempt)
+    assert bounds == [(0, 1.0), (0, 2.0), (0, 4.0), (0, 4.0)]
+    monkeypatch.undo()
+    assert all(0 <= policy.backoff(3) <= 4.0 for _ in range(100))
+
+def test_retry_after_seconds_overrides_backoff():
+    policy = RetryPolicy(jitter=False)
+    assert policy.parse_retry_after(" 7 ") == 7.0
+    assert policy.backoff(1, retry_after=7.0) == 7.0
+    assert RetryPolicy(respect_retry_after=False, jitter=False).backoff(1, retry_after=7.0) == 0.5
+
+def test_retry_after_http_date(monkeypatch):
+    now = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    monkeypatch.setattr(retry.time, "time", now.timestamp)
+    later = format_datetime(datetime(2024, 1, 1, 12, 0, 30, tzinfo=timezone.utc), usegmt=True)
+    earlier = format_datetime(datetime(2024, 1, 1, 11, 59, 0, tzinfo=timezone.utc), usegmt=True)
+    assert RetryPolicy.parse_retry_after(later) == pytest.approx(30.0)
+    assert RetryPolicy.parse_retry_after(earlier) == 0.0
+    assert RetryPolicy.parse_retry_after("soon") is None
+    assert RetryPolicy.parse_retry_after(None) is None
+
+def test_should_retry_limits():
+    policy = RetryPolicy(max_attempts=3, max_retry_after=10)
+    assert policy.should_retry("GET", 1, 503)
+    assert not policy.should_retry("GET", 3, 503)
+    assert not policy.should_retry("POST", 1, 503)
+    assert not policy.should_retry("GET", 1, 404)
+    assert not policy.should_retry("GET", 1, 429, retry_after=11)
+    assert policy.should_retry("GET", 2)
+
+def test_error_for_maps_status():
+    error = RetryPolicy.error_for(429, "Too Many Requests", 5.0)
+    assert isinstance(error, RateLimitError) and error.retry_after == 5.0
+    error = RetryPolicy.error_for(503, "Service Unavailable")
+    assert isinstance(error, RequestError) and not isinstance(error, RateLimitError)
+    assert error.status_code == 503
+
+def test_retries_status_until_max_attempts(sleeps):
+    session = _Session(_Response(503), _Response(503), _Response(503))
+    with pytest.raises(RequestError) as excinfo:
+        _api(session, max_attempts=3)._get(URL, "search")
+    assert excinfo.value.status_code == 503
+    assert session.calls == 3
+    assert sleeps == [0.5, 1.0]
+
+def test_rate_limited_response_raises_with_retry_after(sleeps):
+    session = _Session(_Response(429, {"Retry-After": "2"}), _Response(429, {"Retry-After": "3"}))
+    with pytest.raises(RateLimitError) as excinfo:
+        _api(session, max_attempts=2)._get(URL, "search")
+    assert excinfo.value.retry_after == 3.0
+    assert sleeps == [2.0]
+
+def test_connection_errors_and_timeouts_are_retried(sleeps):
+    ok = _Response(200)
+    session = _Session(requests.ConnectionError("reset"), requests.Timeout("slow"), ok)
+    assert _api(session, max_attempts=3)._get(URL, "search") is ok
+    assert session.calls == 3
+
+@pytest.mark.parametrize("error", [requests.exceptions.InvalidURL("bad"),
+                                   requests.exceptions.MissingSchema("no scheme")])
+def test_invalid_request_is_not_retried(sleeps, error):
+    session = _Session(error, _Response(200))
+    with pytest.raises(RequestError):
+        _api(session, max_attempts=3)._get(URL, "search")
+    assert session.calls == 1
+    assert sleeps == []
+
+def test_async_client_retries_only_connection_errors(sleeps):
+    def run(*results):
+        session = _AsyncSession(*results)
+        client = AsyncYahooTransitAPI(session=session,
+                                      retry_policy=RetryPolicy(max_attempts=3, jitter=False))
+        with pytest.raises(RequestError):
+            asyncio.run(client._get(URL, "search"))
+        return session.calls
+
+    assert run(aiohttp.ClientConnectionError("reset"), asyncio.TimeoutError(),
+               aiohttp.ServerDisconnectedError()) == 3
+    assert run(aiohttp.InvalidURL("bad"), aiohttp.ClientConnectionError("reset")) == 1
\ No newline at end of file
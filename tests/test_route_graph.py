@@ -0,0 +1,115 @@
+"""
+経路グラフのテスト
+"""
+
+import pytest
+
+from conftest import load_golden
+from YTFP.models import routes_from_dicts
+from YTFP.route_graph import RouteGraph
+
+def _route(*items):
+    """(駅名, 時刻) と (路線名, 区間料金) を交互に並べて経路の辞書を作る"""
+    details = []
+    for i, item in enumerate(items):
+        if i % 2 == 0:
+            station, time = item
+            details.append({'type': 'departure_station' if i == 0 else 'arrival_station',
+                            'time': time, 'station_name': station})
+        else:
+            line, fare = item
+            details.append({'type': 'transport', 'line_name': line, 'fare_segment': fare})
+    return {'details': details}
+
+# A -(急行: 10分, 300円)-> C と、A -(各停: 8分, 100円)-> B -(各停: 8分, 100円)-> C
+ROUTES = [
+    _route(("A", "09:00"), ("急行", "300円"), ("C", "09:10")),
+    _route(("A", "09:00"), ("各停", "100円"), ("B", "09:08"), ("各停", "100円"), ("C", "09:16")),
+]
+
+@pytest.fixture
+def graph():
+    graph = RouteGraph()
+    graph.add_routes(ROUTES)
+    return graph
+
+def test_add_route(graph):
+    assert graph.station_count == 3
+    assert graph.edge_count == 3
+    assert "Ａ駅" in graph
+    # 同じ駅・路線の区間は1本にまとめ、最短の所要時間と最安の料金を保持する
+    assert graph.add_route(_route(("A", "09:00"), ("急行", "250円"), ("C", "09:12"))) == 1
+    assert graph.edge_count == 3
+    assert graph.shortest_path("A", "C", transfer_weight=0)["total_time"] == 10
+    assert graph.shortest_path("A", "C", time_weight=0, fare_weight=1)["fare"] == 200
+
+def test_add_route_accepts_models():
+    graph = RouteGraph()
+    assert graph.add_routes(routes_from_dicts(load_golden("result_page"))) > 0
+    assert "新大阪" in graph
+
+def test_shortest_path_by_time(graph):
+    route = graph.shortest_path("A", "C")
+    assert [item['line_name'] for item in route['details'] if item['type'] == 'transport'] == ["急行"]
+    assert (route['total_time'], route['fare'], route['transfers']) == (10, 300, 0)
+    assert route['to_station'] == "C"
+
+def test_shortest_path_by_fare(graph):
+    route = graph.shortest_path("A", "C", time_weight=0, fare_weight=1)
+    assert [item['station_name'] for item in route['details'] if item['type'] != 'transport'] == ["A", "B", "C"]
+    assert (route['total_time'], route['fare'], route['transfers']) == (16, 200, 0)
+
+def test_unknown_or_unreachable_stations(graph):
+    assert graph.shortest_path("A", "Z") is None
+    assert graph.shortest_path("C", "A") is None
+
+def test_astar_matches_dijkstra():
+    graph = RouteGraph()
+    graph.add_routes(load_golden("result_page") + ROUTES)
+    costs = {station: graph.costs_from(station) for station in graph.stations}
+    for from_station in graph.stations:
+        for to_station, cost in costs[from_station].items():
+            # 各駅から到着駅までの重みの半分（実際の重みを超えない推定値）
+            def heuristic(name):
+                return costs[name].get(to_station, 0.0) / 2
+
+            route = graph.shortest_path(from_station, to_station, heuristic=heuristic)
+            assert route['cost'] == pytest.approx(cost)
+            assert graph.shortest_path(from_station, to_station)['cost'] == pytest.approx(cost)
+
+def test_train_numbers_share_a_line():
+    graph = RouteGraph()
+    graph.add_routes([
+        _route(("東京", "09:00"), ("のぞみ215号", None), ("名古屋", "10:30"), ("のぞみ215号", None), ("新大阪", "11:20")),
+        _route(("東京", "10:00"), ("のぞみ1号", None), ("名古屋", "11:35")),
+    ])
+    assert graph.edge_count == 2
+    route = graph.shortest_path("東京", "新大阪")
+    assert route['transfers'] == 0
+    assert route['details'][1]['line_name'] == "のぞみ"
+
+def test_default_time_follows_updated_edges():
+    graph = RouteGraph()
+    graph.add_route(_route(("A", "09:00"), ("X", None), ("B", "09:30")))
+    graph.add_route(_route(("B", None), ("Y", None), ("C", None)))
+    assert graph.shortest_path("A", "C", transfer_weight=0)['cost'] == 60
+    # 既存の辺の所要時間だけが更新された場合も、時間不明の区間の見積もりを更新する
+    graph.add_route(_route(("A", "09:00"), ("X", None), ("B", "09:10")))
+    assert graph.shortest_path("A", "C", transfer_weight=0)['cost'] == 20
+
+def test_save_and_load_round_trip(graph, tmp_path):
+    path = str(tmp_path / "graph.json")
+    graph.save(path)
+    loaded = RouteGraph.load(path)
+    assert loaded.stations == graph.stations
+    assert loaded.edge_count == graph.edge_count
+    for from_station in graph.stations:
+        assert loaded.costs_from(from_station) == graph.costs_from(from_station)
+    assert loaded.shortest_path("A", "C", fare_weight=1) == graph.shortest_path("A", "C", fare_weight=1)
+def test_search_reads_a_snapshot(graph):
+    snapshot = graph._take_snapshot()
+    assert graph._take_snapshot() is snapshot
+    graph.add_route(_route(("C", "09:20"), ("急行", "200円"), ("D", "09:30")))
+    # 探索中の写しは経路の追加で変わらない
+    assert len(snapshot.dst) == 3 and len(snapshot.station_names) == 3
+    assert graph.shortest_path("A", "D")['total_time'] == 20
\ No newline at end of file
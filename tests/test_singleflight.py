@@ -0,0 +1,151 @@
+"""
+リクエスト集約（single-flight）のテスト
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from YTFP.api import YahooTransitAPI
+from YTFP.async_api import AsyncYahooTransitAPI
+from YTFP.async_enhanced_api import AsyncEnhancedYahooTransitAPI
+from YTFP.enhanced_api import EnhancedYahooTransitAPI
+from YTFP.errors import RequestError
+from YTFP.singleflight import AsyncSingleFlight, SingleFlight
+
+ROUTES = [{"departure_time": "09:00"}]
+
+class _Upstream:
+    """呼び出し回数を数え、releaseされるまで応答しない上流の代わり"""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.error = error
+        self.release = threading.Event()
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return ROUTES
+
+    async def call_async(self, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.error is not None:
+            raise self.error
+        return ROUTES
+
+def _run_threads(target, count=8):
+    """count個のスレッドでtargetを同時に呼び出し、(結果, 例外) のリストを返す"""
+    outcomes = []
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            outcome = (target(), None)
+        except Exception as e:
+            outcome = (None, e)
+        with lock:
+            outcomes.append(outcome)
+
+    return outcomes, [threading.Thread(target=worker) for _ in range(count)]
+
+def _join_all(upstream, threads):
+    for thread in threads:
+        thread.start()
+    # 全てのスレッドが実行中の処理に合流するまで待ってから応答させる
+    time.sleep(0.1)
+    upstream.release.set()
+    for thread in threads:
+        thread.join()
+
+def test_concurrent_calls_share_one_execution():
+    upstream = _Upstream()
+    flight = SingleFlight()
+    outcomes, threads = _run_threads(lambda: flight.do("key", upstream))
+    _join_all(upstream, threads)
+    assert upstream.calls == 1
+    assert all(result is ROUTES and error is None for result, error in outcomes)
+    assert not flight.in_flight("key")
+
+def test_failure_reaches_every_waiter():
+    error = RequestError(503, "Service Unavailable")
+    upstream = _Upstream(error)
+    flight = SingleFlight()
+    outcomes, threads = _run_threads(lambda: flight.do("key", upstream))
+    _join_all(upstream, threads)
+    assert upstream.calls == 1
+    assert len(outcomes) == 8
+    assert all(result is None and caught is error for result, caught in outcomes)
+    # 失敗した処理は残らず、次の呼び出しで再実行される
+    upstream.error = None
+    assert flight.do("key", upstream) is ROUTES
+    assert upstream.calls == 2
+
+def test_concurrent_identical_searches_make_one_upstream_call(monkeypatch):
+    upstream = _Upstream()
+    monkeypatch.setattr(YahooTransitAPI, "search_routes", upstream)
+    api = EnhancedYahooTransitAPI(cache_config={"use_file_cache": False})
+    outcomes, threads = _run_threads(lambda: api.search_routes("渋谷", "新大阪", date="20250522", time="0900"))
+    _join_all(upstream, threads)
+    assert upstream.calls == 1
+    assert [result for result, _ in outcomes] == [ROUTES] * 8
+
+def test_async_calls_share_one_execution():
+    upstream = _Upstream()
+    flight = AsyncSingleFlight()
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", upstream.call_async) for _ in range(8)))
+
+    assert asyncio.run(main()) == [ROUTES] * 8
+    assert upstream.calls == 1
+    assert not flight.in_flight("key")
+
+def test_async_failure_reaches_every_waiter():
+    error = RequestError(503, "Service Unavailable")
+    upstream = _Upstream(error)
+    flight = AsyncSingleFlight()
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", upstream.call_async) for _ in range(8)),
+                                    return_exceptions=True)
+
+    assert asyncio.run(main()) == [error] * 8
+    assert upstream.calls == 1
+
+def test_async_waiter_cancellation_does_not_cancel_shared_call():
+    upstream = _Upstream()
+    flight = AsyncSingleFlight()
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("key", upstream.call_async))
+        second = asyncio.ensure_future(flight.do("key", upstream.call_async))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) is ROUTES
+    assert upstream.calls == 1
+
+def test_concurrent_identical_async_searches_make_one_upstream_call(monkeypatch):
+    upstream = _Upstream()
+
+    async def search_routes_async(self, from_station, to_station, **kwargs):
+        return await upstream.call_async()
+
+    monkeypatch.setattr(AsyncYahooTransitAPI, "search_routes_async", search_routes_async)
+
+    async def main():
+        api = AsyncEnhancedYahooTransitAPI(cache_config={"use_file_cache": False})
+        return await asyncio.gather(*(api.search_routes_async("渋谷", "新大阪", date="20250522", time="0900")
+                                      for _ in range(8)))
+
+    assert asyncio.run(main()) == [ROUTES] * 8
+    assert upstream.calls == 1
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+駅名インデックスのテスト
+"""
+
+import pytest
+
+from YTFP.api import YahooTransitAPI
+from YTFP.station_index import StationIndex, kana_to_romaji
+
+@pytest.mark.parametrize("kana, romaji", [
+    ("しゅんぶん", "shunbun"),
+    ("ちゅうおう", "chuo"),
+    ("ふくしま", "fukushima"),
+    ("しんじゅく", "shinjuku"),
+    ("とうきょう", "tokyo"),
+    ("おおはし", "ohashi"),
+    ("おはら", "ohara"),
+])
+def test_kana_to_romaji(kana, romaji):
+    assert kana_to_romaji(kana) == romaji
+
+@pytest.mark.parametrize("query", ["hukusima", "fukushima", "ふくしま", "フクシマ"])
+def test_search_spelling_variants(query):
+    index = StationIndex()
+    index.add("福島", "ふくしま")
+    assert index.search(query) == [{"Suggest": "福島", "Yomi": "ふくしま"}]
+
+@pytest.mark.parametrize("query, name, yomi", [
+    ("ohashi", "大橋", "おおはし"),
+    ("oohashi", "大橋", "おおはし"),
+    ("ohno", "大野", "おおの"),
+    ("oono", "大野", "おおの"),
+])
+def test_search_long_vowel_spellings(query, name, yomi):
+    index = StationIndex()
+    index.add(name, yomi)
+    assert index.search(query) == [{"Suggest": name, "Yomi": yomi}]
+
+def test_suggest_only_answers_queries_seen_by_api():
+    index = StationIndex()
+    index.add_suggestions({"Result": [{"Suggest": "新宿", "Yomi": "しんじゅく"}]}, "しんじゅく")
+    # 一部の駅しか登録されていない前方一致はAPIに問い合わせる
+    assert index.suggest("しん") is None
+    assert index.suggest("shinjuku") is None
+    assert index.suggest("ｼﾝｼﾞｭｸ") == {"Result": [{"Suggest": "新宿", "Yomi": "しんじゅく"}]}
+
+def test_complete_index_answers_any_query(tmp_path):
+    index = StationIndex()
+    index.add_stations([("新宿", "しんじゅく"), ("新大阪", "しんおおさか")])
+    path = str(tmp_path / "stations.json")
+    index.save(path)
+    assert StationIndex.load(path).suggest("しん") is None
+    complete = StationIndex.load(path, complete=True)
+    assert [item["Suggest"] for item in complete.suggest("しん")["Result"]] == ["新宿", "新大阪"]
+    assert complete.suggest("とうきょう") == {"Result": []}
+
+def test_answered_queries_survive_save_and_load(tmp_path):
+    index = StationIndex()
+    index.add_suggestions({"Result": [{"Suggest": "新宿", "Yomi": "しんじゅく"}]}, "sinjuku")
+    path = str(tmp_path / "stations.json")
+    index.save(path)
+    assert StationIndex.load(path).suggest("shinjuku") is not None
+
+class _CountingAPI(YahooTransitAPI):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = []
+
+    def _get(self, url, endpoint, params=None):
+        self.requests.append(url)
+        return _Response({"Result": [{"Suggest": "新宿", "Yomi": "しんじゅく"}]})
+
+class _Response:
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+def test_client_asks_api_for_unseen_prefixes():
+    api = _CountingAPI(station_index=StationIndex())
+    api.get_station_suggestions("しんじゅく")
+    api.get_station_suggestions("しんじゅく")
+    api.get_station_suggestions("しん")
+    assert len(api.requests) == 2
\ No newline at end of file